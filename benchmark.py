@@ -0,0 +1,312 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for Ice Cream Database Generator
+Measures generation and load throughput so changes can be compared between commits.
+
+Cases:
+  engine/null  - order generation only, batches are discarded
+  sqlite       - generation plus executemany loads (with daily summaries) into a temporary
+                 SQLite database
+  files/csv    - generation plus CSV files (one per table)
+  weather      - generate_boston_weather_pattern for one year
+  weighting    - daily demand weights and apportionment for one year
+  analytics    - the analytic query suite on a loaded SQLite database, without and with
+                 the analytic indexes
+
+Results are written as JSON; pass --compare to print ratios against an earlier run.
+"""
+
+import argparse
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime, timedelta
+
+import ice_cream_data as icd
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000]
+BENCH_YEAR = 2023
+BENCH_CUSTOMERS = 100_000
+BENCH_FLAVORS = 36
+BENCH_TOPPINGS = 33
+
+
+class NullSink:
+    """Discards every batch: measures the generation engine alone."""
+
+    summary = None
+
+    def write(self, batch):
+        batch.clear()
+
+    def close(self):
+        pass
+
+
+class SQLiteSink:
+    """
+    Loads batches into a temporary SQLite database through write_order_batch, maintaining
+    the daily summary tables as a generator run does.
+    """
+
+    def __init__(self, directory):
+        self.conn = sqlite3.connect(os.path.join(directory, "bench.db"))
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        icd.recreate_schema(self.conn, "main")
+        self.cursor = self.conn.cursor()
+        icd.ensure_summary_tables(self.cursor, "main")
+        self.summary = icd.DailySummary()
+
+    def write(self, batch):
+        icd.write_order_batch(self.cursor, "main", batch, self.summary)
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+class CsvSink:
+    """Appends batches to one CSV file per table."""
+
+    summary = None
+
+    def __init__(self, directory):
+        self.files = {
+            table: open(os.path.join(directory, f"{table}.csv"), "w", newline="")
+            for table in icd.OrderBatch.TABLES
+        }
+        self.header = True
+
+    def write(self, batch):
+        for table, fh in self.files.items():
+            batch.write_csv(table, fh, header=self.header)
+        self.header = False
+        batch.clear()
+
+    def close(self):
+        for fh in self.files.values():
+            fh.close()
+
+
+SINKS = {
+    "engine/null": lambda directory: NullSink(),
+    "sqlite": SQLiteSink,
+    "files/csv": CsvSink,
+}
+
+
+def bench_reference():
+    """In-memory catalogue of realistic size, so no database is needed to generate."""
+    return icd.ReferenceSnapshot.synthetic(BENCH_CUSTOMERS, BENCH_FLAVORS, BENCH_TOPPINGS)
+
+
+def run_generation(count, sink, reference, weather):
+    """Spread `count` orders evenly over BENCH_YEAR and push them through `sink`."""
+    start = datetime(BENCH_YEAR, 1, 1)
+    days = len(weather)
+    per_day, extra = divmod(count, days)
+    batch = icd.OrderBatch()
+    stats = {"orders": 0, "details": 0, "toppings": 0}
+
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        temperature = weather.get(day.strftime('%Y-%m-%d'))
+        day_count = per_day + (1 if offset < extra else 0)
+        if day_count:
+            profile = icd.get_day_profile(temperature)
+            day_stats = icd.generate_detailed_orders(None, "main", day_count, day, temperature,
+                                                     profile, reference, batch, summary=sink.summary)
+            for key in stats:
+                stats[key] += day_stats[key]
+        if len(batch) >= icd.ORDER_BATCH_SIZE:
+            sink.write(batch)
+    sink.write(batch)
+    sink.close()
+    return stats
+
+
+def measure(fn, track_memory):
+    """Run `fn` once, returning (result, seconds, peak MB or None)."""
+    if track_memory:
+        tracemalloc.start()
+    started = time.perf_counter()
+    result = fn()
+    seconds = time.perf_counter() - started
+    peak_mb = None
+    if track_memory:
+        peak_mb = round(tracemalloc.get_traced_memory()[1] / (1024 * 1024), 2)
+        tracemalloc.stop()
+    return result, seconds, peak_mb
+
+
+def bench_orders(case, count, reference, weather, track_memory):
+    with tempfile.TemporaryDirectory() as directory:
+        sink = SINKS[case](directory)
+        stats, seconds, _ = measure(lambda: run_generation(count, sink, reference, weather), False)
+
+    peak_mb = None
+    if track_memory:
+        # Separate traced run: tracemalloc slows allocation-heavy code down considerably
+        with tempfile.TemporaryDirectory() as directory:
+            sink = SINKS[case](directory)
+            _, _, peak_mb = measure(lambda: run_generation(count, sink, reference, weather), True)
+
+    return {
+        "case": case,
+        "orders": stats["orders"],
+        "line_items": stats["details"],
+        "toppings": stats["toppings"],
+        "seconds": round(seconds, 4),
+        "orders_per_sec": round(stats["orders"] / seconds, 1),
+        "line_items_per_sec": round(stats["details"] / seconds, 1),
+        "peak_mb": peak_mb,
+    }
+
+
+def bench_weather(repeat):
+    _, seconds, _ = measure(lambda: [icd.generate_boston_weather_pattern(BENCH_YEAR) for _ in range(repeat)], False)
+    return {"case": "weather", "years": repeat, "seconds": round(seconds, 4),
+            "days_per_sec": round(repeat * 365 / seconds, 1)}
+
+
+def bench_weighting(weather, repeat):
+    start = datetime(BENCH_YEAR, 1, 1)
+
+    def weigh():
+        for _ in range(repeat):
+            temperatures = icd.span_temperatures(weather, start, len(weather))
+            icd.apportion_counts(icd.daily_demand_weights(start, temperatures), 100_000)
+
+    _, seconds, _ = measure(weigh, False)
+    return {"case": "weighting", "years": repeat, "seconds": round(seconds, 4),
+            "days_per_sec": round(repeat * len(weather) / seconds, 1)}
+
+
+def bench_analytics(count, reference, weather):
+    """Load `count` orders into SQLite, then time the query suite before and after indexing."""
+    with tempfile.TemporaryDirectory() as directory:
+        sink = SQLiteSink(directory)
+        sink.cursor.executemany("INSERT INTO main.Flavors (FlavorID, Name) VALUES (?, ?)", reference.flavors)
+        sink.cursor.executemany("INSERT INTO main.Toppings (ToppingID, Name, ExtraCost) VALUES (?, ?, ?)",
+                                reference.toppings)
+        icd.generate_customers(sink.cursor, "main", BENCH_CUSTOMERS)
+        run_generation(count, sink, reference, weather)
+
+        conn = sqlite3.connect(os.path.join(directory, "bench.db"))
+        cursor = conn.cursor()
+        before = icd.run_analytic_queries(cursor, "main")
+        started = time.perf_counter()
+        icd.create_analytic_indexes(cursor, "main")
+        icd.refresh_statistics(cursor, "main")
+        index_seconds = time.perf_counter() - started
+        after = icd.run_analytic_queries(cursor, "main")
+        conn.close()
+
+    results = []
+    for unindexed, indexed in zip(before, after):
+        results.append({
+            "case": "analytics",
+            "orders": count,
+            "query": indexed["query"],
+            "rows": indexed["rows"],
+            "seconds_unindexed": unindexed["seconds"],
+            "seconds": indexed["seconds"],
+            "queries_per_sec": round(1 / indexed["seconds"], 1) if indexed["seconds"] else None,
+            "index_build_seconds": round(index_seconds, 4),
+        })
+    return results
+
+
+def git_commit():
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"],
+                                       stderr=subprocess.DEVNULL, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(current, previous_path):
+    """Print throughput ratios (current / previous) for cases present in both runs."""
+    with open(previous_path) as fh:
+        previous = json.load(fh)
+    key = lambda r: (r["case"], r.get("orders") or r.get("years"), r.get("query"))
+    before = {key(r): r for r in previous["results"]}
+    print(f"\n📊 Compared with {previous_path} (commit {previous.get('commit')})")
+    for result in current["results"]:
+        old = before.get(key(result))
+        if not old:
+            continue
+        metric = next(m for m in ("orders_per_sec", "days_per_sec", "queries_per_sec") if m in result)
+        if not result[metric] or not old.get(metric):
+            continue
+        ratio = result[metric] / old[metric]
+        label = f"{result['case']} {result['query']}" if result.get("query") else result["case"]
+        print(f"   {label:<12} {str(key(result)[1]):>9}  {metric}: {ratio:.2f}x")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark order generation and load throughput")
+    parser.add_argument("--sizes", type=int, nargs="+", default=DEFAULT_SIZES, help="order counts to run")
+    parser.add_argument("--cases", nargs="+", default=list(SINKS) + ["weather", "weighting", "analytics"],
+                        choices=list(SINKS) + ["weather", "weighting", "analytics"])
+    parser.add_argument("--no-memory", action="store_true", help="skip the traced peak-memory runs")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="earlier results JSON to compare against")
+    args = parser.parse_args(argv)
+
+    icd.random.seed(args.seed)
+    reference = bench_reference()
+    weather = icd.generate_boston_weather_pattern(BENCH_YEAR)
+    results = []
+
+    print("🍦 Ice Cream Database Generator - Benchmarks")
+    print("=" * 50)
+    for case in args.cases:
+        if case in SINKS:
+            for count in args.sizes:
+                result = bench_orders(case, count, reference, weather, not args.no_memory)
+                print(f"   {case:<12} {count:>9} orders: {result['orders_per_sec']:>12,.0f} orders/s "
+                      f"{result['line_items_per_sec']:>12,.0f} items/s  peak {result['peak_mb']} MB")
+                results.append(result)
+        elif case == "analytics":
+            for count in args.sizes:
+                for result in bench_analytics(count, reference, weather):
+                    print(f"   analytics    {count:>9} {result['query']:<24} {result['seconds_unindexed'] * 1000:>9.1f} ms"
+                          f" -> {result['seconds'] * 1000:>8.1f} ms indexed")
+                    results.append(result)
+        elif case == "weather":
+            result = bench_weather(20)
+            print(f"   weather      {result['days_per_sec']:>12,.0f} days/s")
+            results.append(result)
+        else:
+            result = bench_weighting(weather, 20)
+            print(f"   weighting    {result['days_per_sec']:>12,.0f} days/s")
+            results.append(result)
+
+    report = {
+        "commit": git_commit(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "numpy": icd.np.__version__ if icd.np is not None else None,
+        "seed": args.seed,
+        "results": results,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\n✅ Results written to {args.output}")
+
+    if args.compare:
+        compare(report, args.compare)
+    return report
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
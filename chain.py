@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+Multi-store chain generator for Ice Cream Database Generator
+Plans a chain of stores (each with a location and therefore its own weather, a size factor
+and a share of the catalogue), shards the stores across worker processes and has every
+store written to its own schema (SQL Server) or database file (SQLite), so workers never
+contend for the same tables. Stores get disjoint customer and key ranges, which lets the
+optional consolidation step copy every shard into the main schema unchanged, with
+Orders.StoreID pointing into a Stores table.
+
+Shards are named <schema>_s<StoreID> (SQL Server) or <file>.store<StoreID>.db (SQLite).
+The main schema's flavors and toppings are the chain catalogue.
+"""
+
+import argparse
+import json
+import os
+import sqlite3
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime
+
+import ice_cream_data as icd
+
+SHARD_TABLES = ("OrderToppings", "OrderDetails", "Orders", "Toppings", "Flavors", "Customers", "Inventory",
+                *icd.SUMMARY_TABLES)
+
+
+def connect(target):
+    """DB-API connection for a target: {"sqlite": path} or SQL Server connection settings."""
+    if target.get("sqlite"):
+        conn = sqlite3.connect(target["sqlite"], timeout=60)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        return conn
+    return icd.connect_to_db(target["server"], target["database"], target["user"], target["password"],
+                             target["driver"], target["encrypt"], target["trust_cert"])
+
+
+def shard_target(target, schema, store):
+    """(target, schema) a store's shard is written to."""
+    if target.get("sqlite"):
+        root, ext = os.path.splitext(target["sqlite"])
+        return {"sqlite": f"{root}.store{store.store_id:03d}{ext or '.db'}"}, "main"
+    return target, f"{schema}_s{store.store_id:03d}"
+
+
+def load_catalogue(cursor, schema):
+    """The chain catalogue: (FlavorID, Name, Description, IsAvailable) and (ToppingID, Name, ExtraCost, IsAvailable) rows."""
+    cursor.execute(f"SELECT FlavorID, Name, Description, IsAvailable FROM {schema}.Flavors")
+    flavors = [tuple(r) for r in cursor.fetchall()]
+    if not any(available for *_, available in flavors):
+        raise RuntimeError("No available flavors found: generate flavors first.")
+    cursor.execute(f"SELECT ToppingID, Name, ExtraCost, IsAvailable FROM {schema}.Toppings")
+    toppings = [(r[0], r[1], float(r[2]), r[3]) for r in cursor.fetchall()]
+    return flavors, toppings
+
+
+def _insert_with_keys(cursor, schema, table, sql, rows=None):
+    """
+    Run an INSERT with explicit IDENTITY values on SQL Server: executemany over `rows`,
+    or a single INSERT ... SELECT when `rows` is None. Returns the cursor's rowcount.
+    """
+    mssql = icd.db_dialect(cursor) == "mssql"
+    if mssql:
+        cursor.execute(f"SET IDENTITY_INSERT {schema}.{table} ON")
+    try:
+        if rows is None:
+            cursor.execute(sql)
+        else:
+            cursor.executemany(sql, rows)
+        return cursor.rowcount
+    finally:
+        if mssql:
+            icd.identity_insert_off(cursor, schema, table)
+
+
+def shard_weather(location, weather):
+    """Weather loader for a worker: stored history for the store's location, else synthetic weather."""
+    if weather == "synthetic":
+        return lambda first, last: icd.synthetic_weather(first, last, location)
+
+    def load(first, last):
+        stored = icd.stored_weather(first, last, location)
+        return stored if stored is not None else icd.synthetic_weather(first, last, location)
+    return load
+
+
+def generate_store(task):
+    """
+    Worker-process body: recreate one store's shard, load its catalogue share and customers,
+    then generate its orders (with daily summaries) in flushed and committed batches.
+    Returns the store's stats.
+    """
+    store, schema = task["store"], task["shard_schema"]
+    started = time.perf_counter()
+    icd.random.seed(task["seed"] * 1_000_003 + store.store_id)  # forked workers would share one RNG state
+
+    conn = connect(task["shard_target"])
+    cursor = conn.cursor()
+    if icd.db_dialect(conn) == "mssql":
+        cursor.execute(f"IF SCHEMA_ID('{schema}') IS NULL EXEC('CREATE SCHEMA {schema}')")
+    icd.recreate_schema(conn, schema, task["layout"])
+
+    flavors, toppings = task["catalogue"]
+    _insert_with_keys(cursor, schema, "Flavors",
+                      f"INSERT INTO {schema}.Flavors (FlavorID, Name, Description, IsAvailable) VALUES (?,?,?,?)",
+                      flavors)
+    _insert_with_keys(cursor, schema, "Toppings",
+                      f"INSERT INTO {schema}.Toppings (ToppingID, Name, ExtraCost, IsAvailable) VALUES (?,?,?,?)",
+                      toppings)
+    icd.generate_customers(cursor, schema, store.customers, first_id=store.first_customer_id)
+    conn.commit()
+
+    reference = store.reference([(f[0], f[1]) for f in flavors if f[3]], [t[:3] for t in toppings if t[3]])
+    summary = icd.DailySummary()
+    orders = 0
+    for batch in icd.iter_order_batches(store.orders, task["start_date"], task["end_date"], reference,
+                                        shard_weather(store.location, task["weather"]), task["pricing_scenario"],
+                                        store.first_order_id, store.first_detail_id,
+                                        chunk_orders=icd.ORDER_BATCH_SIZE,
+                                        dated_details=icd.order_details_dated(cursor, schema), summary=summary):
+        orders += len(batch)
+        icd.write_order_batch(cursor, schema, batch, summary)
+        conn.commit()
+    conn.close()
+    return {"store_id": store.store_id, "location": store.location, "orders": orders,
+            "flavors": len(reference.flavors), "toppings": len(reference.toppings),
+            "seconds": round(time.perf_counter() - started, 3)}
+
+
+def consolidate(target, schema, stores, drop_shards=False, log=print):
+    """
+    Copy every store's shard into `schema`: customers, orders (with their StoreID), details
+    and toppings keep their keys, and the daily sales summaries are added together.
+    Returns the number of orders copied.
+    """
+    conn = connect(target)
+    cursor = conn.cursor()
+    dialect = icd.db_dialect(conn)
+    icd.ensure_store_tables(cursor, schema)
+    dated = icd.order_details_dated(cursor, schema)
+    detail_columns = "OrderDetailID, OrderID, FlavorID, ScoopCount, Size, Price" + (", OrderDate" if dated else "")
+    detail_select = ("SELECT d.OrderDetailID, d.OrderID, d.FlavorID, d.ScoopCount, d.Size, d.Price"
+                     + (", o.OrderDate" if dated else ""))
+    copied = 0
+
+    for store in stores:
+        shard_conn, shard = shard_target(target, schema, store)
+        if dialect == "sqlite":
+            cursor.execute("ATTACH DATABASE ? AS shard", (shard_conn["sqlite"],))
+            shard = "shard"
+        statements = [
+            ("Customers", f"INSERT INTO {schema}.Customers (CustomerID, FirstName, LastName, Email, Phone, CreatedAt) "
+                          f"SELECT CustomerID, FirstName, LastName, Email, Phone, CreatedAt FROM {shard}.Customers"),
+            ("Orders", f"INSERT INTO {schema}.Orders (OrderID, CustomerID, OrderDate, TotalAmount, StoreID) "
+                       f"SELECT OrderID, CustomerID, OrderDate, TotalAmount, {store.store_id} FROM {shard}.Orders"),
+            ("OrderDetails", f"INSERT INTO {schema}.OrderDetails ({detail_columns}) {detail_select} "
+                             f"FROM {shard}.OrderDetails d JOIN {shard}.Orders o ON o.OrderID = d.OrderID"),
+            ("OrderToppings", f"INSERT INTO {schema}.OrderToppings (OrderDetailID, ToppingID) "
+                              f"SELECT OrderDetailID, ToppingID FROM {shard}.OrderToppings"),
+        ]
+        for table, sql in statements:
+            if table == "OrderToppings":
+                cursor.execute(sql)
+            else:
+                rowcount = _insert_with_keys(cursor, schema, table, sql)
+                if table == "Orders":
+                    copied += max(rowcount, 0)
+        icd.merge_daily_summaries(cursor, schema, shard)
+        cursor.execute(f"INSERT INTO {schema}.Stores (StoreID, Name, Location, SizeFactor, CatalogueShare) "
+                       f"VALUES (?,?,?,?,?)", store.to_row())
+        conn.commit()
+        if dialect == "sqlite":
+            cursor.execute("DETACH DATABASE shard")
+        if drop_shards:
+            drop_shard(cursor, shard_conn, shard)
+            conn.commit()
+        log(f"📦 Consolidated {store.name}")
+    conn.close()
+    return copied
+
+
+def drop_shard(cursor, shard_conn, shard):
+    """Remove a consolidated shard: its database file (SQLite) or its tables and schema (SQL Server)."""
+    if shard_conn.get("sqlite"):
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(shard_conn["sqlite"] + suffix):
+                os.remove(shard_conn["sqlite"] + suffix)
+        return
+    for table in SHARD_TABLES:
+        cursor.execute(f"IF OBJECT_ID('{shard}.{table}','U') IS NOT NULL DROP TABLE {shard}.{table}")
+    cursor.execute(f"IF EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = 'ps_{shard}_OrderMonth') "
+                   f"DROP PARTITION SCHEME ps_{shard}_OrderMonth")
+    cursor.execute(f"IF EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = 'pf_{shard}_OrderMonth') "
+                   f"DROP PARTITION FUNCTION pf_{shard}_OrderMonth")
+    cursor.execute(f"DROP SCHEMA {shard}")
+
+
+def run_chain(target, schema, store_count, orders, customers, start_date, end_date, workers=None,
+              layout="rowstore", weather="history", pricing_scenario=icd.DEFAULT_PRICING_SCENARIO, seed=0,
+              consolidate_shards=True, drop_shards=False, log=print):
+    """
+    Plan `store_count` stores sharing `orders` and `customers`, generate every store's shard
+    on a pool of `workers` processes, then optionally consolidate into `schema`.
+    Keys and store IDs continue after those already in `schema`. Returns a run report dict.
+    """
+    started = time.perf_counter()
+    conn = connect(target)
+    cursor = conn.cursor()
+    catalogue = load_catalogue(cursor, schema)
+    icd.ensure_store_tables(cursor, schema)
+    cursor.execute(
+        f"SELECT (SELECT COALESCE(MAX(StoreID), 0) FROM {schema}.Stores), "
+        f"(SELECT COALESCE(MAX(CustomerID), 0) FROM {schema}.Customers), "
+        f"(SELECT COALESCE(MAX(OrderID), 0) FROM {schema}.Orders), "
+        f"(SELECT COALESCE(MAX(OrderDetailID), 0) FROM {schema}.OrderDetails)"
+    )
+    max_store, max_customer, max_order, max_detail = cursor.fetchone()
+    conn.commit()
+    conn.close()
+    stores = icd.plan_stores(store_count, orders, customers, seed, max_store + 1, max_customer + 1,
+                             max_order + 1, max_detail + 1)
+    if not target.get("sqlite") and stores[-1].first_detail_id + stores[-1].orders * 4 > 2 ** 31:
+        raise ValueError("Planned keys exceed the INT key range: generate the chain in smaller runs")
+
+    if weather == "history":
+        # Fetched once per location here, then read from the weather store by every worker
+        for location in sorted({store.location for store in stores}):
+            icd.get_boston_weather_data_range(start_date, end_date, log, location)
+
+    tasks = []
+    for store in stores:
+        shard_conn, shard = shard_target(target, schema, store)
+        tasks.append({"store": store, "shard_target": shard_conn, "shard_schema": shard, "layout": layout,
+                      "catalogue": catalogue, "start_date": start_date, "end_date": end_date, "weather": weather,
+                      "pricing_scenario": pricing_scenario, "seed": seed})
+
+    log(f"🏪 Generating {orders:,} orders for {store_count} stores on {workers or os.cpu_count()} processes")
+    results = []
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        for future in as_completed([pool.submit(generate_store, task) for task in tasks]):
+            result = future.result()
+            results.append(result)
+            log(f"✅ Store {result['store_id']} ({result['location']}): {result['orders']:,} orders "
+                f"in {result['seconds']}s ({len(results)}/{store_count})")
+    generated_seconds = time.perf_counter() - started
+
+    copied = None
+    if consolidate_shards:
+        consolidate_started = time.perf_counter()
+        copied = consolidate(target, schema, stores, drop_shards, log)
+        log(f"📦 Consolidated {copied:,} orders into {schema} in {time.perf_counter() - consolidate_started:.1f}s")
+
+    total = sum(r["orders"] for r in results)
+    return {
+        "stores": sorted(results, key=lambda r: r["store_id"]),
+        "orders": total,
+        "generation_seconds": round(generated_seconds, 3),
+        "orders_per_sec": round(total / generated_seconds, 1) if generated_seconds else None,
+        "consolidated_orders": copied,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate a multi-store chain, one shard per store, in parallel")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--sqlite", metavar="PATH", help="main SQLite database file (local stand-in)")
+    target.add_argument("--server", help="SQL Server host")
+    parser.add_argument("--database", default="IceCreamShop")
+    parser.add_argument("--user", default="")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--driver", default="ODBC Driver 17 for SQL Server")
+    parser.add_argument("--encrypt", action="store_true")
+    parser.add_argument("--trust-cert", action="store_true")
+    parser.add_argument("--schema", help="main schema with the chain catalogue (default dbo, or main for SQLite)")
+    parser.add_argument("--stores", type=int, default=50)
+    parser.add_argument("--orders", type=int, default=1_000_000, help="orders across the whole chain")
+    parser.add_argument("--customers", type=int, default=100_000, help="customers across the whole chain")
+    parser.add_argument("--start-date", default=f"{datetime.now().year}-01-01")
+    parser.add_argument("--end-date", default=datetime.now().strftime('%Y-%m-%d'))
+    parser.add_argument("--workers", type=int, help="worker processes (default: one per CPU)")
+    parser.add_argument("--layout", choices=icd.SCHEMA_LAYOUTS, default="rowstore", help="shard schema layout")
+    parser.add_argument("--weather", choices=("history", "synthetic"), default="history")
+    parser.add_argument("--pricing-scenario", choices=list(icd.PRICING_SCENARIOS), default=icd.DEFAULT_PRICING_SCENARIO)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-consolidate", action="store_true", help="leave the data in the per-store shards")
+    parser.add_argument("--drop-shards", action="store_true", help="remove each shard once consolidated")
+    parser.add_argument("--output", default="chain_report.json")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        target_spec = {"sqlite": args.sqlite}
+        schema = args.schema or "main"
+    else:
+        target_spec = {"server": args.server, "database": args.database, "user": args.user,
+                       "password": args.password, "driver": args.driver, "encrypt": args.encrypt,
+                       "trust_cert": args.trust_cert}
+        schema = args.schema or "dbo"
+
+    print("🍦 Ice Cream Database Generator - Chain Generator")
+    print("=" * 50)
+    report = run_chain(target_spec, schema, args.stores, args.orders, args.customers,
+                       datetime.strptime(args.start_date, '%Y-%m-%d'), datetime.strptime(args.end_date, '%Y-%m-%d'),
+                       args.workers, args.layout, args.weather, args.pricing_scenario, args.seed,
+                       not args.no_consolidate, args.drop_shards)
+    print(f"\n✅ {report['orders']:,} orders for {args.stores} stores at {report['orders_per_sec']:,} orders/s")
+
+    report = {"timestamp": datetime.now().isoformat(timespec="seconds"),
+              "target": args.sqlite or f"{args.server}/{args.database}", "schema": schema, **report}
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"📄 Report written to {args.output}")
+    return report
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
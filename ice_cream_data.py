@@ -3,10 +3,29 @@ from tkinter import ttk, messagebox
 from tkinter.scrolledtext import ScrolledText
 import pyodbc
 import random
+import math
+import heapq
+import mmap
+import struct
+from array import array
 import requests
 from bs4 import BeautifulSoup
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
 import json
+import csv
+import zlib
+import os
+import re
+import time
+import threading
+import queue
+import cProfile
+from contextlib import contextmanager
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional: order generation falls back to the scalar loop
+    np = None
 
 
 def get_ice_cream_flavors():
@@ -44,6 +63,17 @@ def get_ice_cream_flavors():
         return default
 
 
+def db_dialect(conn_or_cursor):
+    """
+    Identify the database behind a DB-API connection or cursor: 'mssql' (pyodbc),
+    'sqlite' (sqlite3, used as a local stand-in) or 'postgres' (psycopg2).
+    """
+    if isinstance(conn_or_cursor, CountingCursor):
+        conn_or_cursor = conn_or_cursor.cursor
+    module = type(conn_or_cursor).__module__.split('.')[0]
+    return {"sqlite3": "sqlite", "psycopg2": "postgres"}.get(module, "mssql")
+
+
 def connect_to_db(server, database, user, password, driver, encrypt, trust_cert):
     """
     Build and return a pyodbc connection string that matches DBeaver's
@@ -59,36 +89,289 @@ def connect_to_db(server, database, user, password, driver, encrypt, trust_cert)
     return pyodbc.connect(conn_str)
 
 
-def generate_customers(cursor, schema, count):
-    """Insert `count` random customers with expanded variety."""
-    first_names = [
-        "Alice", "Bob", "Charlie", "Diana", "Ethan", "Fiona", "Grace", "Henry", 
-        "Isabella", "Jack", "Katherine", "Liam", "Mia", "Noah", "Olivia", "Paul",
-        "Quinn", "Rachel", "Samuel", "Taylor", "Uma", "Victor", "Wendy", "Xavier",
-        "Yara", "Zachary", "Sophia", "James", "Emma", "William", "Ava", "Benjamin",
-        "Charlotte", "Lucas", "Amelia", "Mason", "Harper", "Elijah", "Evelyn", "Oliver",
-        "Abigail", "Jacob", "Emily", "Michael", "Elizabeth", "Alexander", "Sofia",
-        "Daniel", "Madison", "Matthew", "Scarlett", "Jackson", "Victoria", "David"
-    ]
-    last_names = [
-        "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
-        "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
-        "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson",
-        "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson", "Walker",
-        "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores",
-        "Green", "Adams", "Nelson", "Baker", "Hall", "Rivera", "Campbell", "Mitchell"
-    ]
-    domains = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "company.com", "email.com"]
-    
-    for _ in range(count):
-        fn, ln = random.choice(first_names), random.choice(last_names)
-        domain = random.choice(domains)
-        email = f"{fn.lower()}.{ln.lower()}@{domain}"
-        phone = f"{random.choice(['555', '123', '456', '789'])}-{random.randint(1000,9999)}"
-        cursor.execute(
-            f"INSERT INTO {schema}.Customers (FirstName,LastName,Email,Phone) VALUES (?,?,?,?)",
-            fn, ln, email, phone
-        )
+class RunReport:
+    """
+    Phase timings plus statement and row counters for one generation run.
+    Pass it to the generator functions (and wrap the cursor in CountingCursor)
+    to see where a run spent its time: weather API, reference queries, Python
+    generation, inserts or the final commit.
+    """
+
+    def __init__(self, name=None):
+        self.name = name
+        self.started = datetime.now()
+        self.phases = {}        # phase name -> seconds, in first-seen order
+        self.statements = 0
+        self.rows = {}          # table -> rows written
+        self._clock = time.perf_counter()
+        self._profiler = None
+        self.profile_path = None
+
+    @contextmanager
+    def phase(self, name):
+        """Time a block; repeated phases of the same name accumulate."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - started
+
+    def count(self, table=None, rows=0, statements=1):
+        self.statements += statements
+        if table:
+            self.rows[table] = self.rows.get(table, 0) + rows
+
+    @property
+    def elapsed(self):
+        return time.perf_counter() - self._clock
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started": self.started.isoformat(timespec="seconds"),
+            "elapsed_seconds": round(self.elapsed, 4),
+            "phases": {name: round(seconds, 4) for name, seconds in self.phases.items()},
+            "statements": self.statements,
+            "rows": dict(self.rows),
+            "profile": self.profile_path,
+        }
+
+    def summary_lines(self):
+        """Human-readable summary for the activity log."""
+        total = self.elapsed
+        lines = [f"⏱️ Run summary: {total:.2f}s total, {self.statements:,} statements"]
+        for name, seconds in sorted(self.phases.items(), key=lambda kv: -kv[1]):
+            share = seconds / total * 100 if total else 0
+            lines.append(f"   {name}: {seconds:.2f}s ({share:.0f}%)")
+        if self.rows:
+            lines.append("   rows: " + ", ".join(f"{t}={n:,}" for t, n in self.rows.items()))
+        return lines
+
+    def save(self, directory="run_reports"):
+        """Write the report as JSON and return its path."""
+        os.makedirs(directory, exist_ok=True)
+        stamp = self.started.strftime("%Y%m%d-%H%M%S")
+        path = os.path.join(directory, f"{self.name or 'run'}-{stamp}.json")
+        with open(path, "w") as fh:
+            json.dump(self.to_dict(), fh, indent=2)
+        return path
+
+    def start_profiling(self):
+        """Opt-in deep dive: pyinstrument if installed, otherwise cProfile."""
+        try:
+            import pyinstrument
+            self._profiler = pyinstrument.Profiler()
+        except ImportError:
+            self._profiler = cProfile.Profile()
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.enable()
+        else:
+            self._profiler.start()
+
+    def stop_profiling(self, directory="run_reports"):
+        """Stop the profiler and save its output (.prof for cProfile, .html for pyinstrument)."""
+        if self._profiler is None:
+            return None
+        os.makedirs(directory, exist_ok=True)
+        stamp = self.started.strftime("%Y%m%d-%H%M%S")
+        if isinstance(self._profiler, cProfile.Profile):
+            self._profiler.disable()
+            path = os.path.join(directory, f"{self.name or 'run'}-{stamp}.prof")
+            self._profiler.dump_stats(path)
+        else:
+            self._profiler.stop()
+            path = os.path.join(directory, f"{self.name or 'run'}-{stamp}.html")
+            with open(path, "w") as fh:
+                fh.write(self._profiler.output_html())
+        self._profiler = None
+        self.profile_path = path
+        return path
+
+
+class CountingCursor:
+    """Cursor proxy that counts statements, and rows per table for INSERTs, into a RunReport."""
+
+    _INSERT_TABLE = re.compile(r"INSERT\s+INTO\s+(?:[\w\[\]\"]+\.)?[\[\"]?(\w+)", re.IGNORECASE)
+
+    def __init__(self, cursor, report):
+        object.__setattr__(self, "cursor", cursor)
+        object.__setattr__(self, "report", report)
+
+    def _table(self, sql):
+        match = self._INSERT_TABLE.match(sql.lstrip())
+        return match.group(1) if match else None
+
+    def execute(self, sql, *params):
+        self.report.count(self._table(sql), 1)
+        return self.cursor.execute(sql, *params)
+
+    def executemany(self, sql, seq_of_params):
+        rows = len(seq_of_params) if hasattr(seq_of_params, "__len__") else 0
+        self.report.count(self._table(sql), rows)
+        return self.cursor.executemany(sql, seq_of_params)
+
+    def __getattr__(self, name):
+        return getattr(self.cursor, name)
+
+    def __setattr__(self, name, value):
+        setattr(self.cursor, name, value)
+
+
+class RunProgress:
+    """
+    Days and orders completed so far in a long run, with throughput and ETA derived
+    from them. The generator reports through update() from the worker thread; the
+    GUI reads it on its own timer.
+    """
+
+    def __init__(self):
+        self.days_done = self.days_total = 0
+        self.orders_done = self.orders_total = 0
+        self._started = None
+        self._orders_at_start = 0
+
+    def update(self, days_done, days_total, orders_done, orders_total):
+        if self._started is None:
+            self._started = time.perf_counter()
+            self._orders_at_start = orders_done
+        self.days_done, self.days_total = days_done, days_total
+        self.orders_done, self.orders_total = orders_done, orders_total
+
+    @property
+    def fraction(self):
+        if self.orders_total:
+            return min(1.0, self.orders_done / self.orders_total)
+        return self.days_done / self.days_total if self.days_total else 0.0
+
+    @property
+    def rate(self):
+        """Orders per second since the first update, or None before any progress."""
+        if self._started is None:
+            return None
+        seconds = time.perf_counter() - self._started
+        done = self.orders_done - self._orders_at_start
+        return done / seconds if seconds > 0 and done > 0 else None
+
+    @property
+    def eta(self):
+        rate = self.rate
+        if not rate:
+            return None
+        return max(0.0, (self.orders_total - self.orders_done) / rate)
+
+    def describe(self):
+        if self._started is None:
+            return "Preparing…"
+        parts = [f"Day {self.days_done}/{self.days_total}",
+                 f"{self.orders_done:,}/{self.orders_total:,} orders"]
+        rate, eta = self.rate, self.eta
+        if rate:
+            parts.append(f"{rate:,.0f} orders/s")
+        if eta is not None:
+            minutes, seconds = divmod(int(eta), 60)
+            parts.append(f"ETA {minutes}m {seconds:02d}s")
+        return " · ".join(parts)
+
+
+class LiveProgress(RunProgress):
+    """Progress of an open-ended live stream: orders so far and the rate currently being targeted."""
+
+    def __init__(self):
+        super().__init__()
+        self.target_rate = 0.0
+
+    def update(self, orders_done, target_rate):
+        super().update(0, 0, orders_done, 0)
+        self.target_rate = target_rate
+
+    @property
+    def fraction(self):
+        return 0.0
+
+    def describe(self):
+        if self._started is None:
+            return "Opening shop…"
+        parts = [f"Live · {self.orders_done:,} orders"]
+        rate = self.rate
+        if rate:
+            parts.append(f"{rate:,.0f} orders/s")
+        parts.append(f"target {self.target_rate:,.0f}/s")
+        return " · ".join(parts)
+
+
+CUSTOMER_FIRST_NAMES = [
+    "Alice", "Bob", "Charlie", "Diana", "Ethan", "Fiona", "Grace", "Henry", 
+    "Isabella", "Jack", "Katherine", "Liam", "Mia", "Noah", "Olivia", "Paul",
+    "Quinn", "Rachel", "Samuel", "Taylor", "Uma", "Victor", "Wendy", "Xavier",
+    "Yara", "Zachary", "Sophia", "James", "Emma", "William", "Ava", "Benjamin",
+    "Charlotte", "Lucas", "Amelia", "Mason", "Harper", "Elijah", "Evelyn", "Oliver",
+    "Abigail", "Jacob", "Emily", "Michael", "Elizabeth", "Alexander", "Sofia",
+    "Daniel", "Madison", "Matthew", "Scarlett", "Jackson", "Victoria", "David"
+]
+CUSTOMER_LAST_NAMES = [
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson",
+    "Thomas", "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson",
+    "White", "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson", "Walker",
+    "Young", "Allen", "King", "Wright", "Scott", "Torres", "Nguyen", "Hill", "Flores",
+    "Green", "Adams", "Nelson", "Baker", "Hall", "Rivera", "Campbell", "Mitchell"
+]
+CUSTOMER_DOMAINS = ["gmail.com", "yahoo.com", "hotmail.com", "outlook.com", "company.com", "email.com"]
+PHONE_AREA_CODES = ["555", "123", "456", "789"]
+
+# Customer IDs map onto names, emails and phones through fixed affine permutations, so the
+# same ID always yields the same customer and no two IDs share an email (or, below
+# CUSTOMER_PHONE_SPACE customers, a phone number) - without any uniqueness lookups.
+CUSTOMER_NAME_COMBOS = len(CUSTOMER_FIRST_NAMES) * len(CUSTOMER_LAST_NAMES) * len(CUSTOMER_DOMAINS)
+CUSTOMER_NAME_MULTIPLIER, CUSTOMER_NAME_OFFSET = 7919, 4099
+CUSTOMER_PHONE_SPACE = len(PHONE_AREA_CODES) * 10_000_000
+CUSTOMER_PHONE_MULTIPLIER, CUSTOMER_PHONE_OFFSET = 7_368_787, 1_234_567
+CUSTOMER_BATCH_SIZE = 50000  # rows per executemany when bulk loading customers
+
+
+def customer_row(customer_id):
+    """
+    (CustomerID, FirstName, LastName, Email, Phone) for one customer ID. The ID is split
+    mixed-radix into a permuted (first, last, domain) combination and a block number
+    used as the email suffix, so emails are unique for every ID.
+    """
+    block, combo = divmod(customer_id, CUSTOMER_NAME_COMBOS)
+    combo = (combo * CUSTOMER_NAME_MULTIPLIER + CUSTOMER_NAME_OFFSET) % CUSTOMER_NAME_COMBOS
+    combo, domain = divmod(combo, len(CUSTOMER_DOMAINS))
+    first, last = divmod(combo, len(CUSTOMER_LAST_NAMES))
+    fn, ln = CUSTOMER_FIRST_NAMES[first], CUSTOMER_LAST_NAMES[last]
+    email = f"{fn.lower()}.{ln.lower()}{block + 1}@{CUSTOMER_DOMAINS[domain]}"
+
+    number = (customer_id * CUSTOMER_PHONE_MULTIPLIER + CUSTOMER_PHONE_OFFSET) % CUSTOMER_PHONE_SPACE
+    area, local = divmod(number, 10_000_000)
+    phone = f"{PHONE_AREA_CODES[area]}-{local // 10_000:03d}-{local % 10_000:04d}"
+    return customer_id, fn, ln, email, phone
+
+
+def generate_customers(cursor, schema, count, batch_size=CUSTOMER_BATCH_SIZE, first_id=None):
+    """
+    Bulk insert `count` customers with unique emails and phones, in batches of `batch_size`.
+    IDs continue after the current MAX(CustomerID), or start at `first_id`, and are supplied explicitly.
+    """
+    if first_id is None:
+        cursor.execute(f"SELECT MAX(CustomerID) FROM {schema}.Customers")
+        first_id = (cursor.fetchone()[0] or 0) + 1
+    if count <= 0:
+        return 0
+    if hasattr(cursor, "fast_executemany"):
+        cursor.fast_executemany = True  # pyodbc: bind the whole parameter array at once
+    mssql = db_dialect(cursor) == "mssql"
+    if mssql:
+        cursor.execute(f"SET IDENTITY_INSERT {schema}.Customers ON")
+    sql = f"INSERT INTO {schema}.Customers (CustomerID,FirstName,LastName,Email,Phone) VALUES (?,?,?,?,?)"
+    try:
+        for start in range(first_id, first_id + count, batch_size):
+            stop = min(start + batch_size, first_id + count)
+            cursor.executemany(sql, [customer_row(customer_id) for customer_id in range(start, stop)])
+    finally:
+        if mssql:
+            identity_insert_off(cursor, schema, "Customers")
+    return count
 
 
 def generate_flavors(cursor, schema, count):
@@ -118,7 +401,7 @@ def generate_flavors(cursor, schema, count):
         avail = random.choice([0, 1])
         cursor.execute(
             f"INSERT INTO {schema}.Flavors (Name,Description,IsAvailable) VALUES (?,?,?)",
-            flavor_name, desc, avail
+            (flavor_name, desc, avail)
         )
 
 
@@ -140,69 +423,242 @@ def generate_toppings(cursor, schema, count):
         avail = random.choice([0, 1])
         cursor.execute(
             f"INSERT INTO {schema}.Toppings (Name,ExtraCost,IsAvailable) VALUES (?,?,?)",
-            topping_name, cost, avail
+            (topping_name, cost, avail)
         )
 
 
-def generate_inventory(cursor, schema):
-    """Generate inventory records based on existing flavors and toppings."""
-    # Get all flavors
-    cursor.execute(f"SELECT FlavorID, Name FROM {schema}.Flavors")
-    flavors = cursor.fetchall()
-    
-    # Get all toppings
-    cursor.execute(f"SELECT ToppingID, Name FROM {schema}.Toppings")
-    toppings = cursor.fetchall()
-    
-    inventory_count = 0
-    
-    # Add inventory for flavors
-    for flavor_id, flavor_name in flavors:
-        # Generate realistic inventory quantities for flavors
-        if "Vanilla" in flavor_name or "Chocolate" in flavor_name:
-            # Popular flavors have more stock
-            quantity = random.randint(50, 150)
-        elif "Seasonal" in flavor_name or "Limited" in flavor_name:
-            # Seasonal/limited flavors have less stock
-            quantity = random.randint(5, 25)
-        else:
-            # Regular flavors
-            quantity = random.randint(20, 80)
-        
+# Inventory is sized from consumption: a category minimum plus enough units to cover
+# INVENTORY_COVER_DAYS of the average daily usage seen in the order history.
+INVENTORY_COVER_DAYS = 7
+SCOOPS_PER_TUB = 40
+TOPPING_PORTIONS_PER_UNIT = 50
+INVENTORY_MINIMUMS = {  # (name patterns, minimum stock), checked in order; last entry is the default
+    "Flavor": [(("Vanilla", "Chocolate"), 50),   # popular flavors have more stock
+               (("Seasonal", "Limited"), 5),     # seasonal/limited flavors have less stock
+               ((), 20)],
+    "Topping": [(("Sprinkles", "Sauce"), 30),    # popular toppings have more stock
+                (("Fresh",), 5),                 # perishable items have less stock
+                ((), 15)],
+}
+
+
+def _inventory_source(schema, item_type, days):
+    """SELECT of (ItemType, ItemName, Quantity) for one catalogue table, from aggregated consumption."""
+    if item_type == "Flavor":
+        catalogue, key = f"{schema}.Flavors", "FlavorID"
+        usage = f"SELECT FlavorID AS ItemID, SUM(ScoopCount) AS Used FROM {schema}.OrderDetails GROUP BY FlavorID"
+        per_unit = SCOOPS_PER_TUB
+    else:
+        catalogue, key = f"{schema}.Toppings", "ToppingID"
+        usage = f"SELECT ToppingID AS ItemID, COUNT(*) AS Used FROM {schema}.OrderToppings GROUP BY ToppingID"
+        per_unit = TOPPING_PORTIONS_PER_UNIT
+
+    *patterns, (_, default) = INVENTORY_MINIMUMS[item_type]
+    minimum = "CASE " + " ".join(
+        "WHEN " + " OR ".join(f"c.Name LIKE '%{word}%'" for word in words) + f" THEN {stock}"
+        for words, stock in patterns
+    ) + f" ELSE {default} END"
+    # Integer ceiling of used * cover / (days * per_unit), portable across dialects
+    divisor = max(days, 1) * per_unit
+    cover = f"(SUM(COALESCE(u.Used, 0)) * {INVENTORY_COVER_DAYS} + {divisor - 1}) / {divisor}"
+    return (
+        f"SELECT '{item_type}' AS ItemType, c.Name AS ItemName, MAX({minimum}) + {cover} AS Quantity "
+        f"FROM {catalogue} c LEFT JOIN ({usage}) u ON u.ItemID = c.{key} GROUP BY c.Name"
+    )
+
+
+def _ensure_inventory_key(cursor, schema, dialect):
+    """Collapse duplicate Inventory rows from older runs and add the UNIQUE (ItemType, ItemName) key."""
+    cursor.execute(
+        f"DELETE FROM {schema}.Inventory WHERE ItemID NOT IN "
+        f"(SELECT keep FROM (SELECT MIN(ItemID) AS keep FROM {schema}.Inventory GROUP BY ItemType, ItemName) k)"
+    )
+    if dialect == "mssql":
         cursor.execute(
-            f"INSERT INTO {schema}.Inventory (ItemType, ItemName, QuantityInStock) VALUES (?,?,?)",
-            "Flavor", flavor_name, quantity
+            f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = 'UQ_Inventory_Item' "
+            f"AND object_id = OBJECT_ID('{schema}.Inventory')) "
+            f"CREATE UNIQUE INDEX UQ_Inventory_Item ON {schema}.Inventory (ItemType, ItemName)"
         )
-        inventory_count += 1
-    
-    # Add inventory for toppings
-    for topping_id, topping_name in toppings:
-        # Generate realistic inventory quantities for toppings
-        if "Sprinkles" in topping_name or "Sauce" in topping_name:
-            # Popular toppings have more stock
-            quantity = random.randint(30, 100)
-        elif "Fresh" in topping_name:
-            # Perishable items have less stock
-            quantity = random.randint(5, 20)
+    elif dialect == "sqlite":
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS {schema}.UQ_Inventory_Item ON Inventory (ItemType, ItemName)")
+    else:
+        cursor.execute(f"CREATE UNIQUE INDEX IF NOT EXISTS UQ_Inventory_Item ON {schema}.Inventory (ItemType, ItemName)")
+
+
+def generate_inventory(cursor, schema):
+    """
+    Upsert one Inventory row per flavor and topping name, sized from order consumption.
+    One set-based statement per catalogue table (MERGE on SQL Server, INSERT ... ON CONFLICT
+    elsewhere), so repeated runs update the existing rows instead of appending new ones.
+    Returns the number of inventory rows written.
+    """
+    dialect = db_dialect(cursor)
+    _ensure_inventory_key(cursor, schema, dialect)
+
+    # Average daily usage is measured over the span of the order history
+    cursor.execute(f"SELECT MIN(OrderDate), MAX(OrderDate) FROM {schema}.Orders")
+    first, last = cursor.fetchone()
+    days = 1
+    if first is not None and last is not None:
+        if isinstance(first, str):
+            first, last = datetime.fromisoformat(first), datetime.fromisoformat(last)
+        days = (last.date() - first.date()).days + 1
+
+    inventory_count = 0
+    for item_type in ("Flavor", "Topping"):
+        source = _inventory_source(schema, item_type, days)
+        if dialect == "mssql":
+            cursor.execute(
+                f"MERGE {schema}.Inventory AS target USING ({source}) AS source "
+                f"ON target.ItemType = source.ItemType AND target.ItemName = source.ItemName "
+                f"WHEN MATCHED THEN UPDATE SET QuantityInStock = source.Quantity "
+                f"WHEN NOT MATCHED THEN INSERT (ItemType, ItemName, QuantityInStock) "
+                f"VALUES (source.ItemType, source.ItemName, source.Quantity);"
+            )
         else:
-            # Regular toppings
-            quantity = random.randint(15, 60)
-        
-        cursor.execute(
-            f"INSERT INTO {schema}.Inventory (ItemType, ItemName, QuantityInStock) VALUES (?,?,?)",
-            "Topping", topping_name, quantity
-        )
-        inventory_count += 1
-    
+            cursor.execute(
+                f"INSERT INTO {schema}.Inventory (ItemType, ItemName, QuantityInStock) {source} "
+                f"ON CONFLICT (ItemType, ItemName) DO UPDATE SET QuantityInStock = excluded.QuantityInStock"
+            )
+        inventory_count += max(cursor.rowcount, 0)
     return inventory_count
 
 
+class CustomerIndex:
+    """
+    Compact, sampleable set of CustomerIDs.
+
+    IDENTITY keys are usually contiguous, so in the common case only the
+    (low, high) range is kept. Mostly-contiguous keys add a one-bit-per-ID gap
+    bitmap and are sampled by rejection; sparse keys fall back to an
+    array('i') buffer. No per-customer Python objects are kept in any mode.
+
+    `loyalty` is an optional Zipf exponent: when set, a small group of
+    customers places most orders (rank r is drawn with weight r ** -loyalty).
+    """
+
+    DENSE_THRESHOLD = 0.5  # minimum fraction of the ID span present to use a gap bitmap
+    FETCH_SIZE = 50000
+
+    def __init__(self, low, high, count, gaps=None, ids=None, loyalty=None):
+        self.low = low
+        self.high = high
+        self.count = count
+        self.gaps = gaps    # bytearray, bit set = ID missing
+        self.ids = ids      # array('i') for sparse key sets
+        self.loyalty = loyalty
+
+        # Population that samples are drawn over: ID slots for range/bitmap modes, buffer positions otherwise
+        self.population = len(ids) if ids is not None else high - low + 1
+        # Multiplier for an affine permutation of ranks, so loyal customers are spread over the ID space
+        stride = 2654435761 % self.population or 1
+        while math.gcd(stride, self.population) != 1:
+            stride += 1
+        self._stride = stride
+
+    def __len__(self):
+        return self.count
+
+    @classmethod
+    def from_ids(cls, ids, loyalty=None):
+        """Build an index from an in-memory iterable of IDs."""
+        ids = array('i', sorted(ids))
+        if not ids:
+            raise RuntimeError("No customers found: generate customers first.")
+        low, high = ids[0], ids[-1]
+        if high - low + 1 == len(ids):
+            return cls(low, high, len(ids), loyalty=loyalty)
+        return cls(low, high, len(ids), ids=ids, loyalty=loyalty)
+
+    @classmethod
+    def load(cls, cursor, schema, loyalty=None):
+        """Load the index, downloading individual IDs only when the key range has gaps."""
+        cursor.execute(f"SELECT MIN(CustomerID), MAX(CustomerID), COUNT(*) FROM {schema}.Customers")
+        low, high, count = cursor.fetchone()
+        if not count:
+            raise RuntimeError("No customers found: generate customers first.")
+
+        span = high - low + 1
+        if count == span:
+            return cls(low, high, count, loyalty=loyalty)
+
+        cursor.execute(f"SELECT CustomerID FROM {schema}.Customers")
+        if count >= span * cls.DENSE_THRESHOLD:
+            # Start with every slot marked missing and clear the bits of IDs present
+            gaps = bytearray(b"\xff" * ((span + 7) // 8))
+            while True:
+                rows = cursor.fetchmany(cls.FETCH_SIZE)
+                if not rows:
+                    break
+                for (customer_id,) in rows:
+                    slot = customer_id - low
+                    gaps[slot >> 3] &= ~(1 << (slot & 7)) & 0xFF
+            return cls(low, high, count, gaps=gaps, loyalty=loyalty)
+
+        ids = array('i')
+        while True:
+            rows = cursor.fetchmany(cls.FETCH_SIZE)
+            if not rows:
+                break
+            ids.extend(r[0] for r in rows)
+        return cls(low, high, count, ids=ids, loyalty=loyalty)
+
+    def _slot(self, u):
+        """Map a uniform in [0, 1) to a population slot, honouring the loyalty skew."""
+        n = self.population
+        if not self.loyalty:
+            return min(int(u * n), n - 1)
+        # Inverse CDF of a bounded power law over ranks 1..n, then scatter ranks across slots
+        s = self.loyalty
+        if s == 1:
+            rank = n ** u
+        else:
+            rank = ((n ** (1 - s) - 1) * u + 1) ** (1 / (1 - s))
+        rank = min(int(rank), n) - 1
+        return (rank * self._stride) % n
+
+    def sample(self):
+        """Draw one CustomerID."""
+        while True:
+            slot = self._slot(random.random())
+            if self.ids is not None:
+                return self.ids[slot]
+            if self.gaps is None or not self.gaps[slot >> 3] >> (slot & 7) & 1:
+                return self.low + slot
+
+    def _slots_array(self, rng, size):
+        n = self.population
+        u = rng.random(size)
+        if not self.loyalty:
+            return np.minimum((u * n).astype(np.int64), n - 1)
+        s = self.loyalty
+        if s == 1:
+            rank = np.power(float(n), u)
+        else:
+            rank = np.power((n ** (1 - s) - 1) * u + 1, 1 / (1 - s))
+        rank = np.minimum(rank.astype(np.int64), n) - 1
+        return (rank * self._stride) % n
+
+    def sample_array(self, rng, size):
+        """Draw `size` CustomerIDs as a NumPy array."""
+        slots = self._slots_array(rng, size)
+        if self.ids is not None:
+            # Zero-copy view over the array('i') buffer
+            return np.frombuffer(self.ids, dtype=np.int32)[slots].astype(np.int64)
+        if self.gaps is not None:
+            # Test the packed bits in place: unpacking would cost O(span) per call
+            gaps = np.frombuffer(self.gaps, dtype=np.uint8)
+            missing = np.flatnonzero((gaps[slots >> 3] >> (slots & 7)) & 1)
+            while len(missing):
+                slots[missing] = self._slots_array(rng, len(missing))
+                retry = slots[missing]
+                missing = missing[((gaps[retry >> 3] >> (retry & 7)) & 1) == 1]
+        return slots + self.low
+
+
 def generate_orders(cursor, schema, count):
     """Insert `count` random orders for existing customers with more realistic data."""
-    cursor.execute(f"SELECT CustomerID FROM {schema}.Customers")
-    custs = [r[0] for r in cursor.fetchall()]
-    if not custs:
-        raise RuntimeError("No customers found: generate customers first.")
+    customers = CustomerIndex.load(cursor, schema)
     
     for _ in range(count):
         # More varied date range (last 90 days)
@@ -223,298 +679,2263 @@ def generate_orders(cursor, schema, count):
         
         cursor.execute(
             f"INSERT INTO {schema}.Orders (CustomerID,OrderDate,TotalAmount) VALUES (?,?,?)",
-            random.choice(custs), dt, total
+            customers.sample(), dt, total
         )
 
 
-def generate_detailed_orders(cursor, schema, count, order_date=None, temperature=None):
-    """Insert detailed orders with OrderDetails and OrderToppings."""
-    # Get required data
-    cursor.execute(f"SELECT CustomerID FROM {schema}.Customers")
-    custs = [r[0] for r in cursor.fetchall()]
-    if not custs:
-        raise RuntimeError("No customers found: generate customers first.")
-    
-    cursor.execute(f"SELECT FlavorID, Name FROM {schema}.Flavors WHERE IsAvailable = 1")
-    flavors = cursor.fetchall()
-    if not flavors:
-        raise RuntimeError("No available flavors found: generate flavors first.")
-    
-    cursor.execute(f"SELECT ToppingID, Name, ExtraCost FROM {schema}.Toppings WHERE IsAvailable = 1")
-    toppings = cursor.fetchall()
-    
-    orders_created = 0
-    details_created = 0
-    toppings_added = 0
-    
-    for _ in range(count):
-        # Use provided date or generate random date
-        if order_date:
-            # Random time during business hours for the specific date
-            hour = random.randint(8, 22)
-            minute = random.randint(0, 59)
-            dt = order_date.replace(hour=hour, minute=minute)
-        else:
-            # Random date in last 90 days
-            days_ago = random.randint(0, 90)
-            hours_ago = random.randint(8, 22)
-            minutes_ago = random.randint(0, 59)
-            dt = datetime.now() - timedelta(days=days_ago, hours=hours_ago, minutes=minutes_ago)
-        
-        # Calculate pricing based on temperature and season
-        if temperature and temperature >= 85:  # Very hot day pricing
-            base_prices = {"Small": 4.50, "Medium": 7.00, "Large": 9.50}
-            scoop_prices = {"Small": 2.50, "Medium": 3.50, "Large": 4.50}
-        elif temperature and temperature >= 75:  # Hot day pricing
-            base_prices = {"Small": 4.00, "Medium": 6.50, "Large": 9.00}
-            scoop_prices = {"Small": 2.25, "Medium": 3.25, "Large": 4.25}
-        elif temperature and temperature >= 55:  # Normal pricing
-            base_prices = {"Small": 3.50, "Medium": 6.00, "Large": 8.50}
-            scoop_prices = {"Small": 2.00, "Medium": 3.00, "Large": 4.00}
-        else:  # Cold day pricing
-            base_prices = {"Small": 3.00, "Medium": 5.50, "Large": 8.00}
-            scoop_prices = {"Small": 1.75, "Medium": 2.75, "Large": 3.75}
-        
-        # Create the order
-        cursor.execute(
-            f"INSERT INTO {schema}.Orders (CustomerID, OrderDate, TotalAmount) OUTPUT INSERTED.OrderID VALUES (?,?,?)",
-            random.choice(custs), dt, 0  # Will calculate total later
-        )
-        order_id = cursor.fetchone()[0]
-        
-        # Determine number of items in this order (1-4 items per order)
-        num_items = random.choices([1, 2, 3, 4], weights=[40, 35, 20, 5])[0]
-        order_total = 0
-        
-        for item_num in range(num_items):
-            # Choose size based on temperature (hot days = larger sizes)
-            if temperature and temperature >= 80:
-                size = random.choices(["Small", "Medium", "Large"], weights=[20, 40, 40])[0]
-            elif temperature and temperature >= 65:
-                size = random.choices(["Small", "Medium", "Large"], weights=[30, 45, 25])[0]
-            else:
-                size = random.choices(["Small", "Medium", "Large"], weights=[50, 35, 15])[0]
-            
-            # Choose number of scoops (1-3 scoops, larger sizes more likely to have more scoops)
-            if size == "Large":
-                scoop_count = random.choices([1, 2, 3], weights=[10, 50, 40])[0]
-            elif size == "Medium":
-                scoop_count = random.choices([1, 2, 3], weights=[25, 60, 15])[0]
-            else:  # Small
-                scoop_count = random.choices([1, 2], weights=[70, 30])[0]
-            
-            # Choose flavor(s)
-            selected_flavors = random.sample(flavors, min(scoop_count, len(flavors)))
-            primary_flavor = selected_flavors[0]
-            
-            # Calculate item price
-            base_price = base_prices[size]
-            scoop_price = scoop_prices[size] * scoop_count
-            item_price = base_price + scoop_price
-            
-            # Create OrderDetail
-            cursor.execute(
-                f"INSERT INTO {schema}.OrderDetails (OrderID, FlavorID, ScoopCount, Size, Price) OUTPUT INSERTED.OrderDetailID VALUES (?,?,?,?,?)",
-                order_id, primary_flavor[0], scoop_count, size, round(item_price, 2)
-            )
-            order_detail_id = cursor.fetchone()[0]
-            details_created += 1
-            
-            # Add toppings (30% chance per item, more likely on larger sizes)
-            topping_chance = 0.15 if size == "Small" else 0.25 if size == "Medium" else 0.40
-            if random.random() < topping_chance and toppings:
-                # Choose 1-3 toppings
-                num_toppings = random.choices([1, 2, 3], weights=[60, 30, 10])[0]
-                selected_toppings = random.sample(toppings, min(num_toppings, len(toppings)))
-                
-                for topping_id, topping_name, extra_cost in selected_toppings:
-                    cursor.execute(
-                        f"INSERT INTO {schema}.OrderToppings (OrderDetailID, ToppingID) VALUES (?,?)",
-                        order_detail_id, topping_id
-                    )
-                    item_price += float(extra_cost)  # Convert Decimal to float
-                    toppings_added += 1
-            
-            order_total += item_price
-        
-        # Update order total
-        cursor.execute(
-            f"UPDATE {schema}.Orders SET TotalAmount = ? WHERE OrderID = ?",
-            round(order_total, 2), order_id
-        )
-        
-        orders_created += 1
-    
-    return {"orders": orders_created, "details": details_created, "toppings": toppings_added}
+ORDER_SIZES = ("Small", "Medium", "Large")
 
+# Weighted distributions used by order generation, as (values, weights).
+# Defined once here and compiled into alias tables below.
+ITEM_COUNT_DISTRIBUTION = ((1, 2, 3, 4), (40, 35, 20, 5))
+SIZE_DISTRIBUTIONS = {  # keyed by temperature band, see size_band()
+    "hot": (ORDER_SIZES, (20, 40, 40)),   # 80°F and above: larger sizes
+    "warm": (ORDER_SIZES, (30, 45, 25)),  # 65-79°F
+    "cool": (ORDER_SIZES, (50, 35, 15)),  # below 65°F or unknown
+}
+SCOOP_DISTRIBUTIONS = {  # keyed by size: larger sizes more likely to have more scoops
+    "Small": ((1, 2), (70, 30)),
+    "Medium": ((1, 2, 3), (25, 60, 15)),
+    "Large": ((1, 2, 3), (10, 50, 40)),
+}
+TOPPING_COUNT_DISTRIBUTION = ((1, 2, 3), (60, 30, 10))
+TOPPING_CHANCE = {"Small": 0.15, "Medium": 0.25, "Large": 0.40}
 
-def generate_yearly_orders(cursor, schema, count, year=None, weather_data=None):
-    """Insert `count` random orders distributed across a full year for existing customers, influenced by weather."""
-    cursor.execute(f"SELECT CustomerID FROM {schema}.Customers")
-    custs = [r[0] for r in cursor.fetchall()]
-    if not custs:
-        raise RuntimeError("No customers found: generate customers first.")
-    
-    # Use specified year or current year
-    if year is None:
-        year = datetime.now().year
-    
-    # Calculate date range for the specified year
-    start_date = datetime(year, 1, 1)
-    end_date = datetime(year, 12, 31)
-    days_in_year = (end_date - start_date).days + 1
-    
-    # If no weather data provided, try to fetch it
-    if weather_data is None:
-        weather_data = get_boston_weather_data(year)
-    
-    # Calculate daily order distribution based on weather and habits
-    daily_orders = []
-    total_weight = 0
-    
-    for day_offset in range(days_in_year):
-        current_date = start_date + timedelta(days=day_offset)
-        date_str = current_date.strftime('%Y-%m-%d')
-        
-        # Get temperature for this date
-        temperature = weather_data.get(date_str)
-        
-        # Calculate base weight from temperature
-        temp_multiplier = calculate_order_multiplier(temperature)
-        
-        # Add buying habit variations
-        base_daily_orders = count / days_in_year  # Average orders per day
-        adjusted_orders = add_buying_habit_variations(base_daily_orders, current_date, temperature)
-        
-        # Apply temperature multiplier
-        daily_weight = adjusted_orders * temp_multiplier
-        daily_orders.append((current_date, daily_weight, temperature))
-        total_weight += daily_weight
-    
-    # Determine order counts per day while keeping total close to requested count
-    day_counts = []
-    for _, daily_weight, _ in daily_orders:
-        if total_weight > 0:
-            dc = int((daily_weight / total_weight) * count)
-            if random.random() < 0.3:  # slight randomness
-                dc += random.randint(-2, 3)
-            dc = max(0, dc)
-        else:
-            dc = 0
-        day_counts.append(dc)
-
-    # Adjust to exactly match requested total count
-    diff = count - sum(day_counts)
-    i = 0
-    while diff != 0 and day_counts:
-        idx = i % len(day_counts)
-        if diff > 0:
-            day_counts[idx] += 1
-            diff -= 1
-        elif day_counts[idx] > 0:
-            day_counts[idx] -= 1
-            diff += 1
-        i += 1
-
-    # Generate orders based on final day counts
-    orders_generated = 0
-    for (current_date, _, temperature), dc in zip(daily_orders, day_counts):
-        if dc > 0:
-            stats = generate_detailed_orders(cursor, schema, dc, current_date, temperature)
-            orders_generated += stats["orders"]
 
-    return orders_generated
+class AliasTable:
+    """
+    Walker/Vose alias table for O(1) sampling from a fixed discrete distribution.
+    Built once, so hot loops don't rebuild cumulative weights the way
+    random.choices(..., weights=...) does on every call.
+    """
 
+    def __init__(self, values, weights):
+        n = len(weights)
+        total = float(sum(weights))
+        scaled = [w * n / total for w in weights]
+        self.values = tuple(values)
+        self.prob = [1.0] * n
+        self.alias = list(range(n))
 
-def generate_date_range_orders(cursor, schema, count, start_date, end_date, weather_data=None):
-    """Insert `count` random orders distributed across a date range for existing customers, influenced by weather."""
-    cursor.execute(f"SELECT CustomerID FROM {schema}.Customers")
-    custs = [r[0] for r in cursor.fetchall()]
-    if not custs:
-        raise RuntimeError("No customers found: generate customers first.")
-    
-    # Calculate date range
-    if isinstance(start_date, str):
-        start_date = datetime.strptime(start_date, '%Y-%m-%d')
-    if isinstance(end_date, str):
-        end_date = datetime.strptime(end_date, '%Y-%m-%d')
-    
-    if start_date > end_date:
-        raise ValueError("Start date must be before or equal to end date")
-    
-    # Calculate number of days in range
-    days_in_range = (end_date - start_date).days + 1
-    
-    # Get weather data for the specific date range if not provided
-    if weather_data is None:
-        weather_data = get_boston_weather_data_range(start_date, end_date)
-    
-    # Calculate daily order distribution based on weather and habits
-    daily_orders = []
-    total_weight = 0
-    
-    current_date = start_date
-    while current_date <= end_date:
-        date_str = current_date.strftime('%Y-%m-%d')
-        
-        # Get temperature for this date
-        temperature = weather_data.get(date_str)
-        
-        # Calculate base weight from temperature
-        temp_multiplier = calculate_order_multiplier(temperature)
-        
-        # Add buying habit variations
-        base_daily_orders = count / days_in_range  # Average orders per day
-        adjusted_orders = add_buying_habit_variations(base_daily_orders, current_date, temperature)
-        
-        # Apply temperature multiplier
-        daily_weight = adjusted_orders * temp_multiplier
-        daily_orders.append((current_date, daily_weight, temperature))
-        total_weight += daily_weight
-        
-        current_date += timedelta(days=1)
-    
-    # Generate orders for each day based on calculated weights
-    orders_generated = 0
-    for current_date, daily_weight, temperature in daily_orders:
-        if total_weight > 0:
-            # Calculate number of orders for this day
-            day_orders = int((daily_weight / total_weight) * count)
-            
-            # Add some randomness to avoid too predictable patterns
-            if random.random() < 0.3:  # 30% chance of slight variation
-                day_orders += random.randint(-1, 2)
-            
-            day_orders = max(0, day_orders)  # Ensure non-negative
-            
-            # Generate orders for this day
-            if day_orders > 0:
-                stats = generate_detailed_orders(cursor, schema, day_orders, current_date, temperature)
-                orders_generated += stats["orders"]
-    
-    return orders_generated
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] += scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+
+        if np is not None:
+            self._np_values = np.asarray(self.values)
+            self._np_prob = np.asarray(self.prob)
+            self._np_alias = np.asarray(self.alias)
+
+    def sample(self):
+        """Draw one value using a single uniform: integer part picks the column, fraction the side."""
+        u = random.random() * len(self.prob)
+        i = int(u)
+        return self.values[i] if u - i < self.prob[i] else self.values[self.alias[i]]
+
+    def sample_indices(self, rng, size):
+        """Draw `size` indices into `values` as a NumPy array."""
+        u = rng.random(size) * len(self.prob)
+        i = u.astype(np.int64)
+        return np.where(u - i < self._np_prob[i], i, self._np_alias[i])
+
+    def sample_array(self, rng, size):
+        """Draw `size` values as a NumPy array."""
+        return self._np_values[self.sample_indices(rng, size)]
+
+
+def size_band(temperature):
+    """Temperature band key into SIZE_DISTRIBUTIONS / SIZE_TABLES."""
+    if temperature and temperature >= 80:
+        return "hot"
+    elif temperature and temperature >= 65:
+        return "warm"
+    return "cool"
+
+
+ITEM_COUNT_TABLE = AliasTable(*ITEM_COUNT_DISTRIBUTION)
+SIZE_TABLES = {band: AliasTable(*dist) for band, dist in SIZE_DISTRIBUTIONS.items()}
+SCOOP_TABLES = {size: AliasTable(*dist) for size, dist in SCOOP_DISTRIBUTIONS.items()}
+TOPPING_COUNT_TABLE = AliasTable(*TOPPING_COUNT_DISTRIBUTION)
+
+# Pricing scenarios: each is a list of temperature bands checked top to bottom,
+# as (minimum temperature °F or None for the catch-all, base prices, per-scoop prices).
+# Register alternatives with register_pricing_scenario() to swap pricing without
+# touching the order loop.
+DEFAULT_PRICING_SCENARIO = "standard"
+PRICING_SCENARIOS = {
+    "standard": {
+        "price_bands": [
+            (85, {"Small": 4.50, "Medium": 7.00, "Large": 9.50},   # Very hot day pricing
+                 {"Small": 2.50, "Medium": 3.50, "Large": 4.50}),
+            (75, {"Small": 4.00, "Medium": 6.50, "Large": 9.00},   # Hot day pricing
+                 {"Small": 2.25, "Medium": 3.25, "Large": 4.25}),
+            (55, {"Small": 3.50, "Medium": 6.00, "Large": 8.50},   # Normal pricing
+                 {"Small": 2.00, "Medium": 3.00, "Large": 4.00}),
+            (None, {"Small": 3.00, "Medium": 5.50, "Large": 8.00},  # Cold day pricing
+                   {"Small": 1.75, "Medium": 2.75, "Large": 3.75}),
+        ],
+        "topping_chance": TOPPING_CHANCE,
+    },
+}
+
+
+class DayProfile:
+    """
+    Everything order generation needs for one temperature band: price tables,
+    the size sampling table and topping probabilities. Built once per band and
+    shared across all of a day's orders.
+    """
+
+    def __init__(self, base_prices, scoop_prices, size_table, topping_chance):
+        self.base_prices = base_prices
+        self.scoop_prices = scoop_prices
+        self.size_table = size_table
+        self.topping_chance = topping_chance
+
+        if np is not None:
+            # Same tables indexed by size code, for the vectorised engine
+            self.base_price_array = np.array([base_prices[size] for size in ORDER_SIZES])
+            self.scoop_price_array = np.array([scoop_prices[size] for size in ORDER_SIZES])
+            self.topping_chance_array = np.array([topping_chance[size] for size in ORDER_SIZES])
+
+
+_DAY_PROFILES = {}
+
+
+def register_pricing_scenario(name, price_bands, topping_chance=None):
+    """Add or replace a pricing scenario usable by get_day_profile()."""
+    PRICING_SCENARIOS[name] = {
+        "price_bands": list(price_bands),
+        "topping_chance": dict(topping_chance or TOPPING_CHANCE),
+    }
+    # Drop cached profiles built from the previous definition
+    for key in [k for k in _DAY_PROFILES if k[0] == name]:
+        del _DAY_PROFILES[key]
+
+
+def get_day_profile(temperature, scenario=DEFAULT_PRICING_SCENARIO):
+    """Return the (cached) DayProfile for a temperature under the given pricing scenario."""
+    if scenario not in PRICING_SCENARIOS:
+        raise ValueError(f"Unknown pricing scenario: {scenario}")
+    bands = PRICING_SCENARIOS[scenario]["price_bands"]
+    price_band = next(
+        (i for i, (min_temp, _, _) in enumerate(bands)
+         if min_temp is None or (temperature and temperature >= min_temp)),
+        len(bands) - 1
+    )
+    key = (scenario, price_band, size_band(temperature))
+
+    profile = _DAY_PROFILES.get(key)
+    if profile is None:
+        _, base_prices, scoop_prices = bands[price_band]
+        profile = DayProfile(base_prices, scoop_prices, SIZE_TABLES[key[2]],
+                             PRICING_SCENARIOS[scenario]["topping_chance"])
+        _DAY_PROFILES[key] = profile
+    return profile
+
+
+def synthesize_order_arrays(count, profile, customers, flavor_ids, topping_ids, topping_costs,
+                            dated=True, rng=None):
+    """
+    Draw a whole day's orders at once as NumPy arrays.
+
+    Uses the same DayProfile as the scalar loop in generate_detailed_orders,
+    but every choice (item count, size, scoops,
+    flavor, topping chance and topping picks) is drawn for all rows in one call.
+    Orders are indexed 0..count-1; items and toppings reference their parent by index.
+    """
+    if rng is None:
+        # Seed from the stdlib RNG so random.seed() also makes this path reproducible
+        rng = np.random.default_rng(random.getrandbits(64))
+
+    flavor_ids = np.asarray(flavor_ids)
+    topping_ids = np.asarray(topping_ids)
+    topping_costs = np.asarray(topping_costs, dtype=np.float64)
+
+    # Order-level draws
+    customers = customers.sample_array(rng, count)
+    hours = rng.integers(8, 23, size=count)
+    minutes = rng.integers(0, 60, size=count)
+    days_ago = None if dated else rng.integers(0, 91, size=count)
+    item_counts = ITEM_COUNT_TABLE.sample_array(rng, count)
+
+    # Item-level draws
+    n_items = int(item_counts.sum())
+    item_order = np.repeat(np.arange(count), item_counts)
+
+    # Sizes are drawn as indices into ORDER_SIZES
+    sizes = profile.size_table.sample_indices(rng, n_items)
+    scoops = np.empty(n_items, dtype=np.int64)
+    for code, size in enumerate(ORDER_SIZES):
+        mask = sizes == code
+        scoops[mask] = SCOOP_TABLES[size].sample_array(rng, int(mask.sum()))
+
+    # random.sample(flavors, k)[0] is a uniform pick, so only the primary flavor is drawn
+    flavors = flavor_ids[rng.integers(0, len(flavor_ids), size=n_items)]
+
+    item_prices = profile.base_price_array[sizes] + profile.scoop_price_array[sizes] * scoops
+
+    # Topping draws: chance by size, then 1-3 distinct toppings per topped item
+    n_toppings = len(topping_ids)
+    topped = np.zeros(n_items, dtype=bool)
+    if n_toppings:
+        topped = rng.random(n_items) < profile.topping_chance_array[sizes]
+    topped_items = np.flatnonzero(topped)
+    picks = np.minimum(TOPPING_COUNT_TABLE.sample_array(rng, len(topped_items)), min(3, n_toppings))
+
+    # Distinct picks without a per-row sample: draw from shrinking ranges and skip taken slots
+    first = rng.integers(0, max(n_toppings, 1), size=len(topped_items))
+    second = (rng.random(len(topped_items)) * max(n_toppings - 1, 0)).astype(np.int64)
+    second += second >= first
+    low, high = np.minimum(first, second), np.maximum(first, second)
+    third = (rng.random(len(topped_items)) * max(n_toppings - 2, 0)).astype(np.int64)
+    third += third >= low
+    third += third >= high
+
+    topping_item = np.concatenate([topped_items, topped_items[picks >= 2], topped_items[picks >= 3]])
+    topping_slot = np.concatenate([first, second[picks >= 2], third[picks >= 3]])
+    order_by_item = np.argsort(topping_item, kind='stable')
+    topping_item = topping_item[order_by_item]
+    topping_slot = topping_slot[order_by_item]
+
+    extra_costs = np.bincount(topping_item, weights=topping_costs[topping_slot] if n_toppings else None,
+                              minlength=n_items)
+    order_totals = np.bincount(item_order, weights=item_prices + extra_costs, minlength=count)
+
+    return {
+        "customer_id": customers,
+        "hour": hours,
+        "minute": minutes,
+        "days_ago": days_ago,
+        "item_count": item_counts,
+        "order_total": order_totals,
+        "item_order": item_order,
+        "size": sizes,
+        "scoops": scoops,
+        "flavor_id": flavors,
+        "item_price": item_prices,
+        "topping_item": topping_item,
+        "topping_id": topping_ids[topping_slot] if n_toppings else topping_slot,
+    }
+
+
+EPOCH = datetime(1970, 1, 1)  # OrderBatch dates are whole days since this epoch
+
+
+class _RowView:
+    """Lazy sequence of parameter tuples over an OrderBatch table; rows are built on access."""
+
+    def __init__(self, columns, convert):
+        self._columns = columns
+        self._convert = convert
+
+    def __len__(self):
+        return len(self._columns[0])
+
+    def __getitem__(self, i):
+        return self._convert(*(col[i] for col in self._columns))
+
+    def __iter__(self):
+        return (self._convert(*values) for values in zip(*self._columns))
+
+
+class _CopyStream:
+    """Read-only file-like object yielding a table as tab-separated COPY text, one row at a time."""
+
+    def __init__(self, rows):
+        self._rows = iter(rows)
+        self._pending = b""  # encoded text left over from the previous read
+
+    def read(self, size=-1):
+        # Encoded rows are collected in a list and joined once per read, not concatenated
+        parts = [self._pending]
+        length = len(self._pending)
+        while size < 0 or length < size:
+            row = next(self._rows, None)
+            if row is None:
+                break
+            line = ("\t".join(str(v) for v in row) + "\n").encode()
+            parts.append(line)
+            length += len(line)
+        data = b"".join(parts)
+        if size < 0:
+            size = len(data)
+        chunk, self._pending = data[:size], data[size:]
+        return chunk
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+
+class OrderBatch:
+    """
+    Column-oriented buffer of pending Orders, OrderDetails and OrderToppings rows.
+
+    Values are stored in typed array columns: dates as whole days since EPOCH
+    plus minute of day, money as integer cents and sizes as codes into
+    ORDER_SIZES. Keys are assigned client-side from `next_order_id` /
+    `next_detail_id`, so details and toppings can reference their parents
+    without a round trip per row. With `dated_details` set (the partitioned
+    schema layouts) OrderDetails rows also carry their order's OrderDate.
+    """
+
+    __slots__ = ("next_order_id", "next_detail_id", "dated_details",
+                 "order_id", "customer_id", "order_day", "order_minute", "total_cents",
+                 "detail_id", "detail_order_id", "flavor_id", "scoops", "size", "price_cents",
+                 "topping_detail_id", "topping_id")
+
+    TABLES = {
+        "Orders": ("OrderID", "CustomerID", "OrderDate", "TotalAmount"),
+        "OrderDetails": ("OrderDetailID", "OrderID", "FlavorID", "ScoopCount", "Size", "Price"),
+        "OrderToppings": ("OrderDetailID", "ToppingID"),
+    }
+    IDENTITY_TABLES = ("Orders", "OrderDetails")
+
+    def __init__(self, next_order_id=1, next_detail_id=1, dated_details=False):
+        self.next_order_id = next_order_id
+        self.next_detail_id = next_detail_id
+        self.dated_details = dated_details
+        self._reset()
+
+    def _reset(self):
+        self.order_id, self.customer_id = array('q'), array('i')
+        self.order_day, self.order_minute, self.total_cents = array('i'), array('h'), array('q')
+        self.detail_id, self.detail_order_id, self.flavor_id = array('q'), array('q'), array('i')
+        self.scoops, self.size, self.price_cents = array('b'), array('b'), array('i')
+        self.topping_detail_id, self.topping_id = array('q'), array('i')
+
+    @classmethod
+    def for_cursor(cls, cursor, schema):
+        """
+        Start a batch whose keys continue after the highest existing OrderID / OrderDetailID,
+        writing OrderDetails.OrderDate if the schema layout has it.
+        """
+        cursor.execute(
+            f"SELECT (SELECT COALESCE(MAX(OrderID), 0) FROM {schema}.Orders), "
+            f"(SELECT COALESCE(MAX(OrderDetailID), 0) FROM {schema}.OrderDetails)"
+        )
+        max_order, max_detail = cursor.fetchone()
+        return cls(max_order + 1, max_detail + 1, order_details_dated(cursor, schema))
+
+    def __len__(self):
+        return len(self.order_id)
+
+    def counts(self):
+        return {"orders": len(self.order_id), "details": len(self.detail_id), "toppings": len(self.topping_id)}
+
+    def clear(self):
+        """Drop buffered rows; key counters keep running."""
+        self._reset()
+
+    # Scalar appends
+    def add_order(self, customer_id, dt):
+        order_id = self.next_order_id
+        self.next_order_id += 1
+        self.order_id.append(order_id)
+        self.customer_id.append(customer_id)
+        self.order_day.append((dt - EPOCH).days)
+        self.order_minute.append(dt.hour * 60 + dt.minute)
+        self.total_cents.append(0)
+        return order_id
+
+    def set_last_order_total(self, amount):
+        self.total_cents[-1] = int(round(amount * 100))
+
+    def add_detail(self, order_id, flavor_id, scoops, size, price):
+        detail_id = self.next_detail_id
+        self.next_detail_id += 1
+        self.detail_id.append(detail_id)
+        self.detail_order_id.append(order_id)
+        self.flavor_id.append(flavor_id)
+        self.scoops.append(scoops)
+        self.size.append(ORDER_SIZES.index(size))
+        self.price_cents.append(int(round(price * 100)))
+        return detail_id
+
+    def add_topping(self, detail_id, topping_id):
+        self.topping_detail_id.append(detail_id)
+        self.topping_id.append(topping_id)
+
+    # Vectorised append
+    def extend_from_arrays(self, arrays, order_date=None, now=None):
+        """Append the output of synthesize_order_arrays, assigning keys in bulk."""
+        count = len(arrays["customer_id"])
+        n_items = len(arrays["size"])
+        order_ids = np.arange(self.next_order_id, self.next_order_id + count, dtype=np.int64)
+        detail_ids = np.arange(self.next_detail_id, self.next_detail_id + n_items, dtype=np.int64)
+        self.next_order_id += count
+        self.next_detail_id += n_items
+
+        minutes_of_day = arrays["hour"] * 60 + arrays["minute"]
+        if order_date:
+            days = np.full(count, (order_date - EPOCH).days)
+            minutes = minutes_of_day
+        else:
+            # "N days, H hours and M minutes ago", resolved to whole minutes
+            now = now or datetime.now()
+            now_minute = (now - EPOCH).days * 1440 + now.hour * 60 + now.minute
+            stamp = now_minute - arrays["days_ago"] * 1440 - minutes_of_day
+            days, minutes = stamp // 1440, stamp % 1440
+
+        _extend(self.order_id, order_ids)
+        _extend(self.customer_id, arrays["customer_id"])
+        _extend(self.order_day, days)
+        _extend(self.order_minute, minutes)
+        _extend(self.total_cents, np.rint(arrays["order_total"] * 100))
+        _extend(self.detail_id, detail_ids)
+        _extend(self.detail_order_id, order_ids[arrays["item_order"]])
+        _extend(self.flavor_id, arrays["flavor_id"])
+        _extend(self.scoops, arrays["scoops"])
+        _extend(self.size, arrays["size"])
+        _extend(self.price_cents, np.rint(arrays["item_price"] * 100))
+        _extend(self.topping_detail_id, detail_ids[arrays["topping_item"]])
+        _extend(self.topping_id, arrays["topping_id"])
+
+    # Zero-copy conversions
+    def columns(self, table):
+        """Raw typed columns of `table`, in TABLES column order."""
+        if table == "Orders":
+            return (self.order_id, self.customer_id, self.order_day, self.order_minute, self.total_cents)
+        if table == "OrderDetails":
+            return (self.detail_id, self.detail_order_id, self.flavor_id, self.scoops, self.size, self.price_cents)
+        return (self.topping_detail_id, self.topping_id)
+
+    def rows(self, table):
+        """Lazy parameter sequence for executemany / csv writers; no row tuples are stored."""
+        if table == "Orders":
+            def convert(order_id, customer_id, day, minute, cents):
+                return (order_id, customer_id, EPOCH + timedelta(days=day, minutes=minute), cents / 100)
+        elif table == "OrderDetails" and self.dated_details:
+            # Order keys are consecutive within a batch, so a detail's order is found by offset
+            first = self.order_id[0] if self.order_id else 0
+            order_day, order_minute = self.order_day, self.order_minute
+
+            def convert(detail_id, order_id, flavor_id, scoops, size, cents):
+                i = order_id - first
+                return (detail_id, order_id, flavor_id, scoops, ORDER_SIZES[size], cents / 100,
+                        EPOCH + timedelta(days=order_day[i], minutes=order_minute[i]))
+        elif table == "OrderDetails":
+            def convert(detail_id, order_id, flavor_id, scoops, size, cents):
+                return (detail_id, order_id, flavor_id, scoops, ORDER_SIZES[size], cents / 100)
+        else:
+            convert = lambda detail_id, topping_id: (detail_id, topping_id)
+        return _RowView(self.columns(table), convert)
+
+    def copy_buffer(self, table):
+        """File-like COPY FROM source for `table` (tab-separated text, e.g. for psycopg2 copy_from)."""
+        return _CopyStream(self.rows(table))
+
+    def write_csv(self, table, fh, header=True):
+        """Write `table` to an open text file as CSV."""
+        writer = csv.writer(fh)
+        if header:
+            writer.writerow(self.table_columns(table))
+        writer.writerows(self.rows(table))
+
+    def stamp_orders(self, start, dt):
+        """Give every order from index `start` onward the timestamp `dt` (whole minutes)."""
+        count = len(self.order_id) - start
+        self.order_day[start:] = array('i', [(dt - EPOCH).days]) * count
+        self.order_minute[start:] = array('h', [dt.hour * 60 + dt.minute]) * count
+
+    def order_trees(self):
+        """
+        Buffered orders as nested dicts (order, its items, each item's topping IDs), e.g. for
+        JSON streams. Details and toppings are appended in parent key order, so one merge
+        pass over the columns pairs them up.
+        """
+        d = t = 0
+        n_details, n_toppings = len(self.detail_id), len(self.topping_id)
+        for order_id, customer_id, day, minute, cents in zip(*self.columns("Orders")):
+            items = []
+            while d < n_details and self.detail_order_id[d] == order_id:
+                detail_id = self.detail_id[d]
+                toppings = []
+                while t < n_toppings and self.topping_detail_id[t] == detail_id:
+                    toppings.append(self.topping_id[t])
+                    t += 1
+                items.append({"OrderDetailID": detail_id, "FlavorID": self.flavor_id[d],
+                              "ScoopCount": self.scoops[d], "Size": ORDER_SIZES[self.size[d]],
+                              "Price": self.price_cents[d] / 100, "Toppings": toppings})
+                d += 1
+            yield {"OrderID": order_id, "CustomerID": customer_id,
+                   "OrderDate": EPOCH + timedelta(days=day, minutes=minute), "TotalAmount": cents / 100,
+                   "Items": items}
+
+    def table_columns(self, table):
+        """Column names of `table` as written by rows(), in order."""
+        if table == "OrderDetails" and self.dated_details:
+            return self.TABLES[table] + ("OrderDate",)
+        return self.TABLES[table]
+
+    def insert_sql(self, schema, table):
+        cols = self.table_columns(table)
+        return f"INSERT INTO {schema}.{table} ({', '.join(cols)}) VALUES ({','.join('?' * len(cols))})"
+
+
+def _extend(column, values):
+    """Append a NumPy array to a typed array column with a single buffer copy."""
+    column.frombytes(np.ascontiguousarray(values, dtype=np.dtype(column.typecode)).tobytes())
+
+
+ORDER_BATCH_SIZE = 20000  # orders buffered across days before a flush in multi-day runs
+
+
+def write_order_batch(cursor, schema, batch, summary=None):
+    """
+    Flush a batch with one executemany per table (keys supplied explicitly), then clear it.
+    A DailySummary given as `summary` is upserted in the same transaction.
+    """
+    if summary is not None:
+        write_daily_summary(cursor, schema, summary)
+    if not len(batch):
+        return
+    if hasattr(cursor, "fast_executemany"):
+        cursor.fast_executemany = True  # pyodbc: bind the whole parameter array at once
+    mssql = db_dialect(cursor) == "mssql"
+    for table in OrderBatch.TABLES:
+        if mssql and table in OrderBatch.IDENTITY_TABLES:
+            cursor.execute(f"SET IDENTITY_INSERT {schema}.{table} ON")
+            try:
+                cursor.executemany(batch.insert_sql(schema, table), batch.rows(table))
+            finally:
+                identity_insert_off(cursor, schema, table)
+        else:
+            cursor.executemany(batch.insert_sql(schema, table), batch.rows(table))
+    batch.clear()
+
+
+def identity_insert_off(cursor, schema, table):
+    """
+    SET IDENTITY_INSERT ... OFF, ignoring errors. The setting belongs to the session and
+    survives a rollback, so it is reset even after a failed insert; any error from the
+    insert itself is the one worth raising.
+    """
+    try:
+        cursor.execute(f"SET IDENTITY_INSERT {schema}.{table} OFF")
+    except Exception:
+        pass
+
+
+# Pre-aggregated daily tables, maintained while orders are generated so weather-vs-sales
+# analysis reads one row per day (or per day and flavor) instead of the detail tables.
+SUMMARY_TABLES = {  # table -> (key columns, additive value columns)
+    "DailySales": (("SaleDate",), ("Orders", "Items", "Scoops", "Toppings", "Revenue")),
+    "DailyFlavorSales": (("SaleDate", "FlavorID"), ("Items", "Scoops", "Revenue")),
+    "DailyWeather": (("WeatherDate",), ("Temperature",)),
+}
+
+
+def ensure_summary_tables(cursor, schema):
+    """Create the SUMMARY_TABLES if they do not exist yet (databases from before they were added)."""
+    dialect = db_dialect(cursor)
+    text, money = ("TEXT", "NUMERIC") if dialect == "sqlite" else ("DATE", "DECIMAL(14,2)")
+    ddl = {
+        "DailySales": f"(SaleDate {text} PRIMARY KEY, Orders INT, Items INT, Scoops INT, Toppings INT, Revenue {money})",
+        "DailyFlavorSales": f"(SaleDate {text}, FlavorID INT, Items INT, Scoops INT, Revenue {money}, "
+                            f"PRIMARY KEY (SaleDate, FlavorID))",
+        "DailyWeather": f"(WeatherDate {text} PRIMARY KEY, Temperature FLOAT)",
+    }
+    for table, columns in ddl.items():
+        if dialect == "mssql":
+            cursor.execute(f"IF OBJECT_ID('{schema}.{table}','U') IS NULL CREATE TABLE {schema}.{table} {columns}")
+        else:
+            cursor.execute(f"CREATE TABLE IF NOT EXISTS {schema}.{table} {columns}")
+
+
+def _summary_upsert_sql(schema, table, dialect, source=None):
+    """
+    Upsert into a SUMMARY_TABLES table that adds to existing totals (DailyWeather overwrites).
+    Rows come from parameters, or from the SELECT `source` with the same column order.
+    """
+    keys, values = SUMMARY_TABLES[table]
+    columns = keys + values
+    placeholder = "%s" if dialect == "postgres" else "?"
+    additive = table != "DailyWeather"
+    if dialect == "mssql":
+        if source is None:
+            source = f"SELECT {', '.join(f'{placeholder} AS {c}' for c in columns)}"
+        updates = ", ".join(f"t.{c} = t.{c} + s.{c}" if additive else f"t.{c} = s.{c}" for c in values)
+        return (
+            f"MERGE {schema}.{table} WITH (HOLDLOCK) AS t USING ({source}) AS s "
+            f"ON {' AND '.join(f't.{c} = s.{c}' for c in keys)} "
+            f"WHEN MATCHED THEN UPDATE SET {updates} "
+            f"WHEN NOT MATCHED THEN INSERT ({', '.join(columns)}) VALUES ({', '.join(f's.{c}' for c in columns)});"
+        )
+    if source is None:
+        source = f"VALUES ({', '.join([placeholder] * len(columns))})"
+    else:
+        source = f"SELECT * FROM ({source}) s WHERE 1 = 1"  # WHERE keeps SQLite from reading ON CONFLICT as a join
+    updates = ", ".join(f"{c} = {table}.{c} + excluded.{c}" if additive else f"{c} = excluded.{c}" for c in values)
+    return (
+        f"INSERT INTO {schema}.{table} ({', '.join(columns)}) {source} "
+        f"ON CONFLICT ({', '.join(keys)}) DO UPDATE SET {updates}"
+    )
+
+
+def merge_daily_summaries(cursor, schema, source_schema):
+    """
+    Add the DailySales and DailyFlavorSales totals of `source_schema` into `schema`'s, one
+    set-based upsert per table. DailyWeather is left alone: the sources may be stores with
+    different weather.
+    """
+    dialect = db_dialect(cursor)
+    for table in ("DailySales", "DailyFlavorSales"):
+        keys, values = SUMMARY_TABLES[table]
+        source = f"SELECT {', '.join(keys + values)} FROM {source_schema}.{table}"
+        cursor.execute(_summary_upsert_sql(schema, table, dialect, source))
+
+
+def _numpy_column(column, start=0):
+    """Zero-copy NumPy view of a typed array column from index `start`."""
+    if not len(column):
+        return np.zeros(0, dtype=np.dtype(column.typecode))
+    return np.frombuffer(column, dtype=np.dtype(column.typecode))[start:]
+
+
+class DailySummary:
+    """
+    DailySales, DailyFlavorSales and DailyWeather totals accumulated in memory from
+    OrderBatch rows as they are generated (see add), and upserted - one row per day,
+    or per day and flavor - by write_daily_summary. Money is kept in integer cents.
+    """
+
+    def __init__(self):
+        self.clear()
+
+    def clear(self):
+        self.sales = {}    # day (days since EPOCH) -> [orders, items, scoops, toppings, revenue cents]
+        self.flavors = {}  # (day, FlavorID) -> [items, scoops, revenue cents]
+        self.weather = {}  # day -> temperature
+
+    def __len__(self):
+        return len(self.sales) + len(self.weather)
+
+    def add_temperature(self, order_date, temperature):
+        if order_date is not None and temperature is not None:
+            self.weather[(order_date - EPOCH).days] = float(temperature)
+
+    def add(self, batch, start, order_date=None, temperature=None):
+        """Fold the rows appended to `batch` since `start` (a batch.counts() snapshot) into the totals."""
+        self.add_temperature(order_date, temperature)
+        o0, d0, t0 = start["orders"], start["details"], start["toppings"]
+        if len(batch.order_id) == o0:
+            return
+        # Keys are consecutive within a batch, so parents are found by offset from the first key
+        first_order, first_detail = batch.order_id[0], batch.detail_id[0] if len(batch.detail_id) else 0
+
+        if np is None:
+            def order_day_of_detail(j):
+                return batch.order_day[batch.detail_order_id[j] - first_order]
+            for i in range(o0, len(batch.order_id)):
+                totals = self.sales.setdefault(batch.order_day[i], [0, 0, 0, 0, 0])
+                totals[0] += 1
+                totals[4] += batch.total_cents[i]
+            for j in range(d0, len(batch.detail_id)):
+                day = order_day_of_detail(j)
+                self.sales[day][1] += 1
+                self.sales[day][2] += batch.scoops[j]
+                totals = self.flavors.setdefault((day, batch.flavor_id[j]), [0, 0, 0])
+                totals[0] += 1
+                totals[1] += batch.scoops[j]
+                totals[2] += batch.price_cents[j]
+            for k in range(t0, len(batch.topping_id)):
+                self.sales[order_day_of_detail(batch.topping_detail_id[k] - first_detail)][3] += 1
+            return
+
+        order_days = _numpy_column(batch.order_day)
+        detail_days = order_days[_numpy_column(batch.detail_order_id) - first_order]
+        self._fold(self.sales, order_days[o0:], [np.ones(len(order_days) - o0), _numpy_column(batch.total_cents, o0)],
+                   (0, 4))
+        new_details = detail_days[d0:]
+        scoops = _numpy_column(batch.scoops, d0).astype(np.int64)
+        self._fold(self.sales, new_details, [np.ones(len(new_details)), scoops], (1, 2))
+        topping_days = detail_days[_numpy_column(batch.topping_detail_id, t0) - first_detail]
+        self._fold(self.sales, topping_days, [np.ones(len(topping_days))], (3,))
+
+        flavor_keys = new_details.astype(np.int64) * (1 << 32) + _numpy_column(batch.flavor_id, d0)
+        unique, inverse = np.unique(flavor_keys, return_inverse=True)
+        sums = [np.bincount(inverse, weights=w, minlength=len(unique))
+                for w in (np.ones(len(flavor_keys)), scoops, _numpy_column(batch.price_cents, d0))]
+        for key, items, scoop_total, cents in zip(unique.tolist(), *(x.tolist() for x in sums)):
+            totals = self.flavors.setdefault((key >> 32, key & 0xFFFFFFFF), [0, 0, 0])
+            totals[0] += int(items)
+            totals[1] += int(scoop_total)
+            totals[2] += int(cents)
+
+    @staticmethod
+    def _fold(target, days, weights, slots):
+        """Add per-day sums of each `weights` array into target[day][slot]."""
+        if not len(days):
+            return
+        unique, inverse = np.unique(days, return_inverse=True)
+        sums = [np.bincount(inverse, weights=w, minlength=len(unique)).tolist() for w in weights]
+        for n, day in enumerate(unique.tolist()):
+            totals = target.setdefault(day, [0, 0, 0, 0, 0])
+            for slot, column in zip(slots, sums):
+                totals[slot] += int(column[n])
+
+
+def write_daily_summary(cursor, schema, summary):
+    """Upsert a DailySummary's accumulated rows (adding to existing totals), then clear it."""
+    if not len(summary):
+        return
+    dialect = db_dialect(cursor)
+    day = lambda n: (EPOCH + timedelta(days=n)).strftime('%Y-%m-%d')
+    rows = {
+        "DailySales": [(day(d), o, i, s, t, cents / 100) for d, (o, i, s, t, cents) in sorted(summary.sales.items())],
+        "DailyFlavorSales": [(day(d), f, i, s, cents / 100)
+                             for (d, f), (i, s, cents) in sorted(summary.flavors.items())],
+        "DailyWeather": [(day(d), t) for d, t in sorted(summary.weather.items())],
+    }
+    for table, table_rows in rows.items():
+        if table_rows:
+            cursor.executemany(_summary_upsert_sql(schema, table, dialect), table_rows)
+    summary.clear()
+
+
+def _start_daily_summary(cursor, schema, enabled):
+    """A fresh DailySummary for a generator run (creating the tables if needed), or None if disabled."""
+    if not enabled:
+        return None
+    ensure_summary_tables(cursor, schema)
+    return DailySummary()
+
+
+def order_details_dated(cursor, schema):
+    """True when OrderDetails carries a copy of OrderDate (the partitioned and columnstore layouts)."""
+    dialect = db_dialect(cursor)
+    if dialect == "sqlite":
+        cursor.execute(f"PRAGMA {schema}.table_info(OrderDetails)")
+        return any(row[1] == "OrderDate" for row in cursor.fetchall())
+    placeholder = "%s" if dialect == "postgres" else "?"
+    cursor.execute(
+        f"SELECT COUNT(*) FROM INFORMATION_SCHEMA.COLUMNS WHERE TABLE_SCHEMA = {placeholder} "
+        f"AND LOWER(TABLE_NAME) = 'orderdetails' AND LOWER(COLUMN_NAME) = 'orderdate'", (schema,)
+    )
+    return cursor.fetchone()[0] > 0
+
+
+def catalogue_version(cursor, schema):
+    """
+    Cheap fingerprint of the reference tables (row counts, max IDs, count and ID sum of the
+    available rows, total topping price). Changes whenever customers, flavors or toppings are
+    added or removed, a flavor or topping is toggled, or a topping's ExtraCost changes.
+    """
+    cursor.execute(
+        f"SELECT (SELECT COUNT(*) FROM {schema}.Customers), (SELECT MAX(CustomerID) FROM {schema}.Customers), "
+        f"(SELECT COUNT(*) FROM {schema}.Flavors), (SELECT MAX(FlavorID) FROM {schema}.Flavors), "
+        f"(SELECT SUM(CASE WHEN IsAvailable = 1 THEN 1 ELSE 0 END) FROM {schema}.Flavors), "
+        f"(SELECT SUM(CASE WHEN IsAvailable = 1 THEN FlavorID ELSE 0 END) FROM {schema}.Flavors), "
+        f"(SELECT COUNT(*) FROM {schema}.Toppings), (SELECT MAX(ToppingID) FROM {schema}.Toppings), "
+        f"(SELECT SUM(CASE WHEN IsAvailable = 1 THEN 1 ELSE 0 END) FROM {schema}.Toppings), "
+        f"(SELECT SUM(CASE WHEN IsAvailable = 1 THEN ToppingID ELSE 0 END) FROM {schema}.Toppings), "
+        f"(SELECT SUM(ExtraCost) FROM {schema}.Toppings)"
+    )
+    return tuple(cursor.fetchone())
+
+
+class ReferenceSnapshot:
+    """
+    Customers, available flavors and available toppings, loaded once per run
+    and passed through the whole generation pipeline instead of being
+    re-queried for every generated day.
+    """
+
+    def __init__(self, schema, customers, flavors, toppings, version=None):
+        self.schema = schema
+        self.customers = customers  # CustomerIndex
+        self.flavors = flavors      # [(FlavorID, Name)]
+        self.toppings = toppings    # [(ToppingID, Name, ExtraCost as float)]
+        self.version = version
+
+        if np is not None:
+            self.flavor_id_array = np.asarray([f[0] for f in flavors])
+            self.topping_id_array = np.asarray([t[0] for t in toppings], dtype=np.int64)
+            self.topping_cost_array = np.asarray([t[2] for t in toppings], dtype=np.float64)
+
+    @classmethod
+    def load(cls, cursor, schema, loyalty=None):
+        """Query the reference tables once, raising if orders cannot be generated from them."""
+        version = catalogue_version(cursor, schema)
+        customers = CustomerIndex.load(cursor, schema, loyalty)
+
+        cursor.execute(f"SELECT FlavorID, Name FROM {schema}.Flavors WHERE IsAvailable = 1")
+        flavors = [tuple(r) for r in cursor.fetchall()]
+        if not flavors:
+            raise RuntimeError("No available flavors found: generate flavors first.")
+
+        cursor.execute(f"SELECT ToppingID, Name, ExtraCost FROM {schema}.Toppings WHERE IsAvailable = 1")
+        toppings = [(r[0], r[1], float(r[2])) for r in cursor.fetchall()]  # Convert Decimal to float
+
+        return cls(schema, customers, flavors, toppings, version)
+
+    @classmethod
+    def synthetic(cls, customers, flavors, toppings, schema="main"):
+        """In-memory catalogue of the given sizes (IDs from 1), for generating without a database."""
+        flavor_rows = [(i, f"Flavor {i}") for i in range(1, flavors + 1)]
+        topping_rows = [(i, f"Topping {i}", 0.25 + (i % 10) * 0.25) for i in range(1, toppings + 1)]
+        return cls(schema, CustomerIndex(1, customers, customers), flavor_rows, topping_rows)
+
+    def refresh_if_stale(self, cursor):
+        """Return this snapshot if the catalogue is unchanged, otherwise a freshly loaded one."""
+        if self.version is not None and catalogue_version(cursor, self.schema) == self.version:
+            return self
+        return ReferenceSnapshot.load(cursor, self.schema, self.customers.loyalty)
+
+
+def generate_detailed_orders(cursor, schema, count, order_date=None, temperature=None, profile=None,
+                             reference=None, batch=None, report=None, summary=None):
+    """
+    Insert detailed orders with OrderDetails and OrderToppings.
+    `profile` is the DayProfile to price and size orders with; by default it is
+    looked up from `temperature` under the standard pricing scenario.
+    `reference` is a ReferenceSnapshot shared across calls; loaded here if omitted.
+    If `batch` (an OrderBatch) is given, rows are appended to it and the caller
+    flushes it with write_order_batch; otherwise they are written before returning.
+    `report` is an optional RunReport that receives phase timings.
+    `summary` is an optional DailySummary that the new rows are folded into; it is
+    written with the rows when they are written here.
+    """
+    if report is None:
+        report = RunReport()
+
+    # Get required data
+    if reference is None:
+        with report.phase("reference queries"):
+            reference = ReferenceSnapshot.load(cursor, schema)
+    customers = reference.customers
+    flavors = reference.flavors
+    toppings = reference.toppings
+
+    # Temperature is fixed for the whole call, so prices and weights are resolved once
+    if profile is None:
+        profile = get_day_profile(temperature)
+
+    own_batch = batch is None
+    if own_batch:
+        with report.phase("reference queries"):
+            batch = OrderBatch.for_cursor(cursor, schema)
+    before = batch.counts()
+
+    with report.phase("generation"):
+        # Vectorised path: draw the whole day in one go when NumPy is available
+        if np is not None:
+            arrays = synthesize_order_arrays(
+                count, profile, customers, reference.flavor_id_array,
+                reference.topping_id_array, reference.topping_cost_array,
+                dated=bool(order_date),
+            )
+            batch.extend_from_arrays(arrays, order_date)
+        else:
+            _generate_orders_scalar(batch, count, order_date, profile, customers, flavors, toppings)
+
+    if summary is not None:
+        with report.phase("summaries"):
+            summary.add(batch, before, order_date, temperature)
+    after = batch.counts()
+    if own_batch:
+        if summary is not None:
+            with report.phase("summaries"):
+                ensure_summary_tables(cursor, schema)
+        with report.phase("inserts"):
+            write_order_batch(cursor, schema, batch, summary)
+    return {key: after[key] - before[key] for key in after}
+
+
+def _generate_orders_scalar(batch, count, order_date, profile, customers, flavors, toppings):
+    """Pure-Python order loop used when NumPy is unavailable."""
+    base_prices = profile.base_prices
+    scoop_prices = profile.scoop_prices
+    
+    for _ in range(count):
+        # Use provided date or generate random date
+        if order_date:
+            # Random time during business hours for the specific date
+            hour = random.randint(8, 22)
+            minute = random.randint(0, 59)
+            dt = order_date.replace(hour=hour, minute=minute)
+        else:
+            # Random date in last 90 days
+            days_ago = random.randint(0, 90)
+            hours_ago = random.randint(8, 22)
+            minutes_ago = random.randint(0, 59)
+            dt = datetime.now() - timedelta(days=days_ago, hours=hours_ago, minutes=minutes_ago)
+        
+        # Create the order (total is filled in once its items are priced)
+        order_id = batch.add_order(customers.sample(), dt)
+        
+        # Determine number of items in this order (1-4 items per order)
+        num_items = ITEM_COUNT_TABLE.sample()
+        order_total = 0
+        
+        for item_num in range(num_items):
+            # Choose size based on temperature (hot days = larger sizes)
+            size = profile.size_table.sample()
+            
+            # Choose number of scoops (1-3 scoops, larger sizes more likely to have more scoops)
+            scoop_count = SCOOP_TABLES[size].sample()
+            
+            # Choose flavor(s)
+            selected_flavors = random.sample(flavors, min(scoop_count, len(flavors)))
+            primary_flavor = selected_flavors[0]
+            
+            # Calculate item price
+            base_price = base_prices[size]
+            scoop_price = scoop_prices[size] * scoop_count
+            item_price = base_price + scoop_price
+            
+            # Create OrderDetail
+            order_detail_id = batch.add_detail(order_id, primary_flavor[0], scoop_count, size, item_price)
+            
+            # Add toppings (30% chance per item, more likely on larger sizes)
+            if random.random() < profile.topping_chance[size] and toppings:
+                # Choose 1-3 toppings
+                num_toppings = TOPPING_COUNT_TABLE.sample()
+                selected_toppings = random.sample(toppings, min(num_toppings, len(toppings)))
+                
+                for topping_id, topping_name, extra_cost in selected_toppings:
+                    batch.add_topping(order_detail_id, topping_id)
+                    item_price += extra_cost
+            
+            order_total += item_price
+        
+        # Set order total
+        batch.set_last_order_total(order_total)
+
+
+def apportion_counts(weights, total):
+    """
+    Split `total` into integer counts proportional to `weights` using the largest-remainder
+    method, in one pass over the weights. The counts always sum to exactly `total`;
+    negative weights count as zero and all-zero weights split the total evenly.
+    """
+    if np is not None and isinstance(weights, np.ndarray):
+        return _apportion_counts_array(weights, total)
+    weights = [max(0.0, w) for w in weights]
+    if not weights or total <= 0:
+        return [0] * len(weights)
+    weight_sum = sum(weights)
+    if weight_sum <= 0:
+        weights = [1.0] * len(weights)
+        weight_sum = float(len(weights))
+
+    scale = total / weight_sum
+    counts = []
+    remainders = []
+    for weight in weights:
+        share = weight * scale
+        whole = int(share)
+        counts.append(whole)
+        remainders.append(share - whole)
+
+    # Floors leave fewer than len(weights) units over; hand them to the largest remainders
+    leftover = total - sum(counts)
+    if leftover > 0:
+        for i in heapq.nlargest(leftover, range(len(counts)), key=remainders.__getitem__):
+            counts[i] += 1
+    elif leftover < 0:
+        # Only reachable through float rounding: take back from the smallest remainders
+        for i in heapq.nsmallest(-leftover, (i for i in range(len(counts)) if counts[i] > 0),
+                                 key=remainders.__getitem__):
+            counts[i] -= 1
+    return counts
+
+
+def _apportion_counts_array(weights, total):
+    """apportion_counts for numpy weight arrays (e.g. from daily_demand_weights), returning a list."""
+    weights = np.clip(np.asarray(weights, dtype=np.float64), 0.0, None)
+    if len(weights) == 0 or total <= 0:
+        return [0] * len(weights)
+    weight_sum = weights.sum()
+    if weight_sum <= 0:
+        weights = np.ones(len(weights))
+        weight_sum = float(len(weights))
+
+    shares = weights * (total / weight_sum)
+    counts = np.floor(shares).astype(np.int64)
+    remainders = shares - counts
+    leftover = int(total - counts.sum())
+    if leftover > 0:
+        counts[np.argpartition(-remainders, leftover - 1)[:leftover]] += 1
+    elif leftover < 0:
+        remainders[counts == 0] = np.inf
+        counts[np.argpartition(remainders, -leftover - 1)[:-leftover]] -= 1
+    return counts.tolist()
+
+
+def daily_order_plan(count, start_date, days, weather_data):
+    """
+    The distribution step of yearly and range generation: (date, order_count, temperature)
+    for each of `days` consecutive days from `start_date`, counts summing exactly to `count`.
+    """
+    temperatures = span_temperatures(weather_data, start_date, days)
+    day_counts = apportion_counts(daily_demand_weights(start_date, temperatures), count)
+    return [(start_date + timedelta(days=offset), day_count, temperature)
+            for offset, (day_count, temperature) in enumerate(zip(day_counts, temperatures))]
+
+
+def generate_yearly_orders(cursor, schema, count, year=None, weather_data=None,
+                           pricing_scenario=DEFAULT_PRICING_SCENARIO, reference=None, report=None,
+                           progress_callback=None, cancel_event=None, server_side=False, summaries=True):
+    """
+    Insert `count` random orders distributed across a full year for existing customers, influenced by weather.
+    progress_callback(days_done, days_total, orders_done, orders_total) is called after every day; setting
+    cancel_event stops at the next day boundary, after flushing the days completed so far.
+    With server_side=True only the daily plan is sent and the database generates the rows
+    (see generate_orders_server_side); progress is then reported once at the end.
+    With `summaries` the DailySales, DailyFlavorSales and DailyWeather tables are kept up to date.
+    """
+    if report is None:
+        report = RunReport()
+
+    # Reference data is loaded once for the whole year, not once per day
+    if reference is None and not server_side:
+        with report.phase("reference queries"):
+            reference = ReferenceSnapshot.load(cursor, schema)
+    
+    # Use specified year or current year
+    if year is None:
+        year = datetime.now().year
+    
+    # Calculate date range for the specified year
+    start_date = datetime(year, 1, 1)
+    end_date = datetime(year, 12, 31)
+    days_in_year = (end_date - start_date).days + 1
+    
+    # If no weather data provided, try to fetch it
+    if weather_data is None:
+        with report.phase("weather"):
+            weather_data = get_boston_weather_data(year)
+    
+    # Calculate daily order distribution based on weather and habits
+    with report.phase("daily weighting"):
+        plan = daily_order_plan(count, start_date, days_in_year, weather_data)
+
+    if server_side:
+        stats = generate_orders_server_side(cursor, schema, plan, pricing_scenario, report=report,
+                                            summaries=summaries)
+        if progress_callback:
+            progress_callback(days_in_year, days_in_year, stats["orders"], count)
+        return stats["orders"]
+
+    with report.phase("summaries"):
+        summary = _start_daily_summary(cursor, schema, summaries)
+    # Generate orders based on final day counts, buffering several days per flush
+    orders_generated = 0
+    with report.phase("reference queries"):
+        batch = OrderBatch.for_cursor(cursor, schema)
+    if progress_callback:
+        progress_callback(0, days_in_year, 0, count)
+    for day_index, (current_date, dc, temperature) in enumerate(plan):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        if dc > 0:
+            profile = get_day_profile(temperature, pricing_scenario)
+            stats = generate_detailed_orders(cursor, schema, dc, current_date, temperature, profile, reference, batch,
+                                             report, summary)
+            orders_generated += stats["orders"]
+            if len(batch) >= ORDER_BATCH_SIZE:
+                with report.phase("inserts"):
+                    write_order_batch(cursor, schema, batch, summary)
+        if progress_callback:
+            progress_callback(day_index + 1, days_in_year, orders_generated, count)
+    with report.phase("inserts"):
+        write_order_batch(cursor, schema, batch, summary)
+
+    return orders_generated
+
+
+def generate_date_range_orders(cursor, schema, count, start_date, end_date, weather_data=None,
+                               pricing_scenario=DEFAULT_PRICING_SCENARIO, reference=None, report=None,
+                               progress_callback=None, cancel_event=None, summaries=True):
+    """
+    Insert `count` random orders distributed across a date range for existing customers, influenced by weather.
+    Progress, cancellation and summaries work as in generate_yearly_orders.
+    """
+    if report is None:
+        report = RunReport()
+
+    # Reference data is loaded once for the whole range, not once per day
+    if reference is None:
+        with report.phase("reference queries"):
+            reference = ReferenceSnapshot.load(cursor, schema)
+    
+    # Calculate date range
+    if isinstance(start_date, str):
+        start_date = datetime.strptime(start_date, '%Y-%m-%d')
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, '%Y-%m-%d')
+    
+    if start_date > end_date:
+        raise ValueError("Start date must be before or equal to end date")
+    
+    # Calculate number of days in range
+    days_in_range = (end_date - start_date).days + 1
+    
+    # Get weather data for the specific date range if not provided
+    if weather_data is None:
+        with report.phase("weather"):
+            weather_data = get_boston_weather_data_range(start_date, end_date)
+    
+    # Calculate daily order distribution based on weather and habits
+    with report.phase("daily weighting"):
+        plan = daily_order_plan(count, start_date, days_in_range, weather_data)
+    
+    with report.phase("summaries"):
+        summary = _start_daily_summary(cursor, schema, summaries)
+    # Generate orders for each day based on calculated weights, buffering several days per flush
+    orders_generated = 0
+    with report.phase("reference queries"):
+        batch = OrderBatch.for_cursor(cursor, schema)
+    if progress_callback:
+        progress_callback(0, days_in_range, 0, count)
+    for day_index, (current_date, day_orders, temperature) in enumerate(plan):
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        if day_orders > 0:
+            profile = get_day_profile(temperature, pricing_scenario)
+            stats = generate_detailed_orders(cursor, schema, day_orders, current_date, temperature, profile,
+                                             reference, batch, report, summary)
+            orders_generated += stats["orders"]
+            if len(batch) >= ORDER_BATCH_SIZE:
+                with report.phase("inserts"):
+                    write_order_batch(cursor, schema, batch, summary)
+        if progress_callback:
+            progress_callback(day_index + 1, days_in_range, orders_generated, count)
+    with report.phase("inserts"):
+        write_order_batch(cursor, schema, batch, summary)
+    
+    return orders_generated
+
+
+STREAM_WINDOW_DAYS = 31  # days generated, flushed and committed together by the streaming range engine
+STREAM_CHUNK_ORDERS = 2000  # most orders handed over per batch by iter_order_batches
+
+
+def range_windows(count, start_date, end_date, window_days=STREAM_WINDOW_DAYS):
+    """
+    Split `count` orders over [start_date, end_date] into (window_start, days, window_count)
+    windows of `window_days`. Counts come from a climatology prior per window: cheap,
+    deterministic in size and needing no weather lookups.
+    """
+    total_days = (end_date - start_date).days + 1
+    windows = []
+    for offset in range(0, total_days, window_days):
+        window_start = start_date + timedelta(days=offset)
+        windows.append((window_start, min(window_days, total_days - offset)))
+    prior = [float(sum(daily_demand_weights(window_start, climatology_temperatures(window_start, days))))
+             for window_start, days in windows]
+    return [(window_start, days, window_count)
+            for (window_start, days), window_count in zip(windows, apportion_counts(prior, count))]
+
+
+def generate_streaming_range_orders(cursor, schema, count, start_date, end_date, window_days=STREAM_WINDOW_DAYS,
+                                    weather_loader=None, commit=None, pricing_scenario=DEFAULT_PRICING_SCENARIO,
+                                    reference=None, report=None, progress_callback=None, cancel_event=None,
+                                    log_callback=None, summaries=True):
+    """
+    Insert `count` orders across a date range of any length (decades included), one window
+    of `window_days` at a time. The count is split across windows up front from a climatology
+    prior, so no weather is needed to start; each window then loads its own weather through
+    weather_loader(start, end), apportions its share to days, generates, flushes and, when
+    `commit` is given, calls it. Memory stays bounded by one window whatever the span.
+    Progress, cancellation and summaries work as in generate_yearly_orders.
+    """
+    def log_msg(msg):
+        if log_callback:
+            log_callback(msg)
+
+    if report is None:
+        report = RunReport()
+    if isinstance(start_date, str):
+        start_date = datetime.strptime(start_date, '%Y-%m-%d')
+    if isinstance(end_date, str):
+        end_date = datetime.strptime(end_date, '%Y-%m-%d')
+    if start_date > end_date:
+        raise ValueError("Start date must be before or equal to end date")
+    if weather_loader is None:
+        weather_loader = lambda first, last: get_boston_weather_data_range(first, last, log_callback)
+
+    if reference is None:
+        with report.phase("reference queries"):
+            reference = ReferenceSnapshot.load(cursor, schema)
+
+    total_days = (end_date - start_date).days + 1
+    with report.phase("daily weighting"):
+        windows = range_windows(count, start_date, end_date, window_days)
+
+    with report.phase("summaries"):
+        summary = _start_daily_summary(cursor, schema, summaries)
+    orders_generated = 0
+    days_done = 0
+    with report.phase("reference queries"):
+        batch = OrderBatch.for_cursor(cursor, schema)
+    if progress_callback:
+        progress_callback(0, total_days, 0, count)
+
+    for window_start, days, window_count in windows:
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        window_end = window_start + timedelta(days=days - 1)
+
+        with report.phase("weather"):
+            weather_data = weather_loader(window_start, window_end)
+        with report.phase("daily weighting"):
+            plan = daily_order_plan(window_count, window_start, days, weather_data)
+
+        for current_date, day_orders, temperature in plan:
+            if cancel_event is not None and cancel_event.is_set():
+                break
+            if day_orders > 0:
+                profile = get_day_profile(temperature, pricing_scenario)
+                stats = generate_detailed_orders(cursor, schema, day_orders, current_date, temperature, profile,
+                                                 reference, batch, report, summary)
+                orders_generated += stats["orders"]
+                if len(batch) >= ORDER_BATCH_SIZE:
+                    with report.phase("inserts"):
+                        write_order_batch(cursor, schema, batch, summary)
+            days_done += 1
+            if progress_callback:
+                progress_callback(days_done, total_days, orders_generated, count)
+
+        with report.phase("inserts"):
+            write_order_batch(cursor, schema, batch, summary)
+        if cancel_event is not None and cancel_event.is_set():
+            break
+        if commit is not None:
+            with report.phase("commit"):
+                commit()
+        known = [temperature for _, _, temperature in plan if temperature is not None]
+        avg = f", avg {sum(known) / len(known):.1f}°F" if known else ""
+        log_msg(f"📦 {window_start:%Y-%m-%d} to {window_end:%Y-%m-%d}: {window_count:,} orders{avg}")
+
+    return orders_generated
+
+
+def iter_order_batches(count, start_date, end_date, reference, weather_loader=None,
+                       pricing_scenario=DEFAULT_PRICING_SCENARIO, first_order_id=1, first_detail_id=1,
+                       window_days=STREAM_WINDOW_DAYS, chunk_orders=STREAM_CHUNK_ORDERS, dated_details=False,
+                       summary=None):
+    """
+    Generate `count` orders across a date range without a database, yielding an OrderBatch
+    each time it holds `chunk_orders` orders (the last one may hold fewer). The same batch
+    object is cleared and refilled after each yield, so consumers use its rows before asking
+    for more. Windows, weather and daily weights are as in generate_streaming_range_orders;
+    work only happens as batches are pulled, so memory stays bounded by one window's plan
+    and one chunk and a slow consumer slows generation down. A DailySummary given as
+    `summary` accumulates the rows, for the consumer to write with each batch.
+    """
+    if weather_loader is None:
+        weather_loader = get_boston_weather_data_range
+    report = RunReport()
+    batch = OrderBatch(first_order_id, first_detail_id, dated_details)
+    for window_start, days, window_count in range_windows(count, start_date, end_date, window_days):
+        weather_data = weather_loader(window_start, window_start + timedelta(days=days - 1))
+        for current_date, day_orders, temperature in daily_order_plan(window_count, window_start, days, weather_data):
+            profile = get_day_profile(temperature, pricing_scenario)
+            while day_orders > 0:
+                chunk = min(day_orders, chunk_orders - len(batch))
+                generate_detailed_orders(None, None, chunk, current_date, temperature, profile, reference, batch,
+                                         report, summary)
+                day_orders -= chunk
+                if len(batch) >= chunk_orders:
+                    yield batch
+                    batch.clear()
+    if len(batch):
+        yield batch
+        batch.clear()
+
+
+# Chains: a store dimension for multi-store datasets (see chain.py). Store attributes are hashes
+# of (seed, store, attribute), so the same plan comes out in every process that builds it.
+STORE_SIZE_RANGE = (0.4, 2.5)       # order volume relative to an average store, drawn log-uniformly
+STORE_CATALOGUE_SHARE = (0.6, 1.0)  # fraction of the chain's flavors and toppings a store carries
+
+
+def _store_uniform(seed, store_id, salt):
+    return _splitmix64(_splitmix64(seed ^ (store_id << 20)) ^ salt) / 2.0 ** 64
+
+
+class Store:
+    """
+    One shop of a chain: its location (and so its weather), order-volume size factor and
+    share of the chain catalogue, plus the orders, customer ID range and first keys
+    plan_stores assigns it. Key ranges of different stores never overlap.
+    """
+
+    def __init__(self, store_id, name, location, size_factor, catalogue_share, seed=0):
+        self.store_id = store_id
+        self.name = name
+        self.location = location
+        self.size_factor = size_factor
+        self.catalogue_share = catalogue_share
+        self.seed = seed
+        self.orders = self.customers = 0
+        self.first_customer_id = self.first_order_id = self.first_detail_id = 1
+
+    def to_row(self):
+        """(StoreID, Name, Location, SizeFactor, CatalogueShare) for the Stores table."""
+        return self.store_id, self.name, self.location, self.size_factor, self.catalogue_share
+
+    def reference(self, flavors, toppings):
+        """ReferenceSnapshot of this store's customers and its share of the chain's available catalogue."""
+        keep = lambda item_id, salt: _store_uniform(self.seed, self.store_id, salt + item_id) < self.catalogue_share
+        store_flavors = [f for f in flavors if keep(f[0], 1 << 32)] or flavors[:1]
+        store_toppings = [t for t in toppings if keep(t[0], 2 << 32)]
+        last_customer = self.first_customer_id + self.customers - 1
+        customers = CustomerIndex(self.first_customer_id, last_customer, self.customers)
+        return ReferenceSnapshot(f"store{self.store_id}", customers, store_flavors, store_toppings)
+
+
+def plan_stores(count, orders, customers, seed=0, first_store_id=1, first_customer_id=1, first_order_id=1,
+                first_detail_id=1):
+    """
+    Plan a chain of `count` stores: locations, size factors and catalogue shares from `seed`,
+    `orders` and `customers` split by size factor (every store gets at least one customer),
+    and disjoint customer and key ranges starting from the given first IDs.
+    """
+    if customers < count:
+        raise ValueError("Need at least one customer per store")
+    locations = list(STORE_LOCATIONS)
+    low, high = STORE_SIZE_RANGE
+    share_low, share_high = STORE_CATALOGUE_SHARE
+    stores = []
+    for store_id in range(first_store_id, first_store_id + count):
+        location = locations[int(_store_uniform(seed, store_id, 1) * len(locations))]
+        size_factor = round(low * (high / low) ** _store_uniform(seed, store_id, 2), 2)
+        share = round(share_low + (share_high - share_low) * _store_uniform(seed, store_id, 3), 2)
+        name = f"{location.replace('_', ' ').title()} #{store_id}"
+        stores.append(Store(store_id, name, location, size_factor, share, seed))
+
+    weights = [store.size_factor for store in stores]
+    max_items = max(ITEM_COUNT_DISTRIBUTION[0])
+    order_counts = apportion_counts(weights, orders)
+    customer_counts = apportion_counts(weights, customers - count)
+    for store, store_orders, store_customers in zip(stores, order_counts, customer_counts):
+        store.orders, store.customers = store_orders, store_customers + 1
+        store.first_customer_id, store.first_order_id, store.first_detail_id = (
+            first_customer_id, first_order_id, first_detail_id)
+        first_customer_id += store.customers
+        first_order_id += store_orders
+        first_detail_id += store_orders * max_items  # room for the largest possible orders
+    return stores
+
+
+def ensure_store_tables(cursor, schema):
+    """Create the Stores table and a nullable Orders.StoreID if missing (consolidated chain data)."""
+    dialect = db_dialect(cursor)
+    if dialect == "mssql":
+        cursor.execute(
+            f"IF OBJECT_ID('{schema}.Stores','U') IS NULL CREATE TABLE {schema}.Stores (StoreID INT PRIMARY KEY, "
+            f"Name NVARCHAR(50), Location NVARCHAR(30), SizeFactor DECIMAL(5,2), CatalogueShare DECIMAL(3,2))"
+        )
+        cursor.execute(f"IF COL_LENGTH('{schema}.Orders', 'StoreID') IS NULL ALTER TABLE {schema}.Orders ADD StoreID INT NULL")
+        return
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {schema}.Stores (StoreID INTEGER PRIMARY KEY, Name TEXT, Location TEXT, "
+        f"SizeFactor NUMERIC, CatalogueShare NUMERIC)"
+    )
+    if dialect == "sqlite":
+        cursor.execute(f"PRAGMA {schema}.table_info(Orders)")
+        if not any(row[1] == "StoreID" for row in cursor.fetchall()):
+            cursor.execute(f"ALTER TABLE {schema}.Orders ADD COLUMN StoreID INTEGER")
+    else:
+        cursor.execute(f"ALTER TABLE {schema}.Orders ADD COLUMN IF NOT EXISTS StoreID INTEGER")
+
+
+# Live mode: relative order rate through the day (shop hours 08:00-22:59, as in the back-fill),
+# interpolated between hours and normalised so the open-hours average is 1.0
+LIVE_HOURLY_CURVE = {8: 0.3, 9: 0.4, 10: 0.5, 11: 0.8, 12: 1.2, 13: 1.3, 14: 1.2, 15: 1.3,
+                     16: 1.5, 17: 1.4, 18: 1.3, 19: 1.5, 20: 1.4, 21: 1.0, 22: 0.6}
+_LIVE_CURVE_MEAN = sum(LIVE_HOURLY_CURVE.values()) / len(LIVE_HOURLY_CURVE)
+LIVE_TICK_SECONDS = 0.1        # how often due orders are generated
+LIVE_FLUSH_SECONDS = 1.0       # how often the micro-batch is written (and committed)
+LIVE_MAX_CATCHUP_SECONDS = 5.0 # longest stall (slow insert, suspended laptop) made up for afterwards
+
+
+def intraday_rate_factor(moment, open_all_day=False):
+    """
+    Relative order rate at `moment` from LIVE_HOURLY_CURVE. Outside shop hours it is 0,
+    or the quietest open hour's level when `open_all_day` is set.
+    """
+    closed = min(LIVE_HOURLY_CURVE.values()) if open_all_day else 0.0
+    hour = moment.hour + moment.minute / 60 + moment.second / 3600
+    whole = int(hour)
+    this = LIVE_HOURLY_CURVE.get(whole)
+    if this is None:
+        return closed / _LIVE_CURVE_MEAN
+    following = LIVE_HOURLY_CURVE.get(whole + 1, this)
+    return (this + (following - this) * (hour - whole)) / _LIVE_CURVE_MEAN
+
+
+def generate_live_orders(cursor, schema, rate, duration=None, open_all_day=False, flush_seconds=LIVE_FLUSH_SECONDS,
+                         commit=None, temperature_loader=None, pricing_scenario=DEFAULT_PRICING_SCENARIO,
+                         reference=None, report=None, progress_callback=None, cancel_event=None, log_callback=None,
+                         summaries=True):
+    """
+    Emit orders continuously with wall-clock timestamps until `duration` seconds have passed
+    or cancel_event is set. `rate` is the average orders per second during shop hours; the
+    current rate follows intraday_rate_factor and is scaled by calculate_order_multiplier for
+    today's temperature (from temperature_loader(now), re-read when the date changes).
+    Orders are micro-batched: written every `flush_seconds` and then passed to `commit` if
+    given, so memory holds at most one flush interval of orders however long the run.
+    progress_callback(orders_done, current_rate) is called after every flush.
+    Summaries work as in generate_yearly_orders, upserted with every flush.
+    """
+    def log_msg(msg):
+        if log_callback:
+            log_callback(msg)
+
+    if report is None:
+        report = RunReport()
+    if temperature_loader is None:
+        temperature_loader = lambda now: get_single_day_weather_data(now.year, now.month, now.day, log_callback)
+
+    if reference is None:
+        with report.phase("reference queries"):
+            reference = ReferenceSnapshot.load(cursor, schema)
+    with report.phase("reference queries"):
+        batch = OrderBatch.for_cursor(cursor, schema)
+
+    with report.phase("summaries"):
+        summary = _start_daily_summary(cursor, schema, summaries)
+    orders_generated = 0
+    due = 0.0  # fractional orders carried between ticks so the long-run rate is exact
+    today = temperature = profile = None
+    multiplier = current_rate = 0.0
+    started = last_tick = last_flush = time.monotonic()
+
+    while not (cancel_event is not None and cancel_event.is_set()):
+        tick = time.monotonic()
+        if duration is not None and tick - started >= duration:
+            break
+        now = datetime.now()
+
+        if now.date() != today:
+            # New day: today's temperature sets the demand multiplier and the pricing profile
+            today = now.date()
+            with report.phase("weather"):
+                temperature = temperature_loader(now)
+            multiplier = calculate_order_multiplier(temperature)
+            profile = get_day_profile(temperature, pricing_scenario)
+            with report.phase("reference queries"):
+                reference = reference.refresh_if_stale(cursor)
+            shown = f"{temperature:.1f}°F" if temperature is not None else "unknown temperature"
+            log_msg(f"🌡️ {today:%Y-%m-%d}: {shown}, demand x{multiplier:.2f}")
+
+        current_rate = rate * multiplier * intraday_rate_factor(now, open_all_day)
+        due += current_rate * min(tick - last_tick, LIVE_MAX_CATCHUP_SECONDS)
+        last_tick = tick
+        count = int(due)
+        if count:
+            due -= count
+            start = len(batch)
+            midnight = datetime(now.year, now.month, now.day)
+            stats = generate_detailed_orders(cursor, schema, count, midnight, temperature, profile, reference, batch,
+                                             report, summary)
+            batch.stamp_orders(start, now)
+            orders_generated += stats["orders"]
+
+        if tick - last_flush >= flush_seconds or len(batch) >= ORDER_BATCH_SIZE:
+            with report.phase("inserts"):
+                write_order_batch(cursor, schema, batch, summary)
+            if commit is not None:
+                with report.phase("commit"):
+                    commit()
+            last_flush = tick
+            if progress_callback:
+                progress_callback(orders_generated, current_rate)
+
+        if cancel_event is not None:
+            cancel_event.wait(LIVE_TICK_SECONDS)
+        else:
+            time.sleep(LIVE_TICK_SECONDS)
+
+    with report.phase("inserts"):
+        write_order_batch(cursor, schema, batch, summary)
+    if commit is not None and not (cancel_event is not None and cancel_event.is_set()):
+        with report.phase("commit"):
+            commit()
+    if progress_callback:
+        progress_callback(orders_generated, current_rate)
+    return orders_generated
+
+
+# Set-based, server-side order generation: the client sends only the per-day plan
+# (date, order count, temperature) and the database expands it into Orders,
+# OrderDetails and OrderToppings with INSERT ... SELECT over a tally table.
+# Random choices come from a seeded integer hash of each row's key, so the same
+# statements run on SQL Server, SQLite and Postgres without any RNG functions.
+SERVER_SIDE_WORK_TABLES = ("GenPlan", "GenTally", "GenCustomers", "GenFlavors", "GenToppings")
+_HASH_PRIME = 2147483647  # 2^31 - 1: squares of residues still fit in a BIGINT
+
+
+def _sql_hash(key, salt):
+    """SQL expression for a pseudo-random BIGINT in [0, 2^31 - 1) from an integer key and @Seed."""
+    u = f"((CAST({key} AS BIGINT) * 48271 + (@Seed + {salt}) * 7919) % {_HASH_PRIME})"
+    return f"((({u} * {u}) % {_HASH_PRIME} * 69621 + {u}) % {_HASH_PRIME})"
+
+
+def _sql_choice(bucket, values, weights):
+    """CASE picking from `values` by `weights`, given a column holding hash % sum(weights)."""
+    cases, cumulative = [], 0
+    for value, weight in zip(values[:-1], weights[:-1]):
+        cumulative += weight
+        cases.append(f"WHEN {bucket} < {cumulative} THEN {_sql_literal(value)}")
+    return f"CASE {' '.join(cases)} ELSE {_sql_literal(values[-1])} END"
+
+
+def _sql_literal(value):
+    return f"'{value}'" if isinstance(value, str) else repr(value)
+
+
+def _sql_price(scenario):
+    """CASE computing an item's price from Temperature, Size and Scoops under a pricing scenario."""
+    bands = PRICING_SCENARIOS[scenario]["price_bands"]
+    cases = []
+    for min_temp, base_prices, scoop_prices in bands:
+        price = "CASE x.Size " + " ".join(
+            f"WHEN '{size}' THEN {base_prices[size]} + {scoop_prices[size]} * x.Scoops" for size in ORDER_SIZES
+        ) + " END"
+        if min_temp is None:
+            cases.append(f"ELSE {price}")
+            break
+        cases.append(f"WHEN x.Temperature >= {min_temp} THEN {price}")
+    else:
+        cases.append(f"ELSE {price}")  # like get_day_profile, fall back to the last band
+    return f"CASE {' '.join(cases)} END"
+
+
+def _sql_order_date(dialect, day, minute):
+    """DATETIME expression for `minute` minutes past midnight of the DATE `day`."""
+    if dialect == "mssql":
+        return f"DATEADD(MINUTE, {minute}, CAST({day} AS DATETIME))"
+    if dialect == "postgres":
+        return f"{day} + {minute} * INTERVAL '1 minute'"
+    return f"datetime({day}, '+' || {minute} || ' minutes')"
+
+
+def server_side_statements(schema, dialect, pricing_scenario=DEFAULT_PRICING_SCENARIO, dated_details=False):
+    """
+    The set-based generation routine as a list of statements using the parameters
+    @Seed, @FirstOrderID, @FirstDetailID, @Customers, @Flavors and @Toppings.
+    Reads the plan from {schema}.GenPlan and the numbered reference rows from the
+    other SERVER_SIDE_WORK_TABLES. `dated_details` also fills OrderDetails.OrderDate.
+    """
+    minute_of_day = f"480 + {_sql_hash('OrderID', 2)} % 900"
+    order_date = _sql_order_date(dialect, "o.PlanDate", "o.MinuteOfDay")
+
+    size_case = "CASE " + " ".join(
+        f"WHEN i.Temperature >= {minimum} THEN {_sql_choice('i.HSize', *SIZE_DISTRIBUTIONS[band])}"
+        for minimum, band in ((80, "hot"), (65, "warm"))
+    ) + f" ELSE {_sql_choice('i.HSize', *SIZE_DISTRIBUTIONS['cool'])} END"
+    scoop_case = "CASE s.Size " + " ".join(
+        f"WHEN '{size}' THEN {_sql_choice('s.HScoops', *SCOOP_DISTRIBUTIONS[size])}" for size in ORDER_SIZES
+    ) + " END"
+    topping_chance = PRICING_SCENARIOS[pricing_scenario]["topping_chance"]
+    chance_case = "CASE d.Size " + " ".join(
+        f"WHEN '{size}' THEN {int(round(topping_chance[size] * 1000))}" for size in ORDER_SIZES
+    ) + " END"
+    picks_case = _sql_choice("d.HCount", *TOPPING_COUNT_DISTRIBUTION)
+
+    plan_orders = (
+        f"plan_orders AS (SELECT p.PlanDate, p.Temperature, @FirstOrderID + p.StartOffset + t.n AS OrderID "
+        f"FROM {schema}.GenPlan p JOIN {schema}.GenTally t ON t.n < p.OrderCount)"
+    )
+    identity = dialect == "mssql"
+    statements = []
+    if identity:
+        statements.append(f"SET IDENTITY_INSERT {schema}.Orders ON")
+    statements.append(
+        f"WITH {plan_orders}, "
+        f"o AS (SELECT PlanDate, OrderID, {minute_of_day} AS MinuteOfDay, "
+        f"{_sql_hash('OrderID', 1)} % @Customers AS CustomerSlot FROM plan_orders) "
+        f"INSERT INTO {schema}.Orders (OrderID, CustomerID, OrderDate, TotalAmount) "
+        f"SELECT o.OrderID, c.CustomerID, {order_date}, 0 "
+        f"FROM o JOIN {schema}.GenCustomers c ON c.rn = o.CustomerSlot"
+    )
+    if identity:
+        statements.append(f"SET IDENTITY_INSERT {schema}.Orders OFF")
+        statements.append(f"SET IDENTITY_INSERT {schema}.OrderDetails ON")
+    # Partitioned layouts: details carry the same OrderDate, recomputed from the same hash
+    detail_date_column = ", OrderDate" if dated_details else ""
+    detail_date = f", {_sql_order_date(dialect, 'x.PlanDate', 'x.MinuteOfDay')}" if dated_details else ""
+    statements.append(
+        f"WITH {plan_orders}, "
+        f"o AS (SELECT OrderID, PlanDate, {minute_of_day} AS MinuteOfDay, Temperature, "
+        f"{_sql_hash('OrderID', 3)} % 100 AS HItems FROM plan_orders), "
+        f"i AS (SELECT o.OrderID, o.PlanDate, o.MinuteOfDay, o.Temperature, k.n AS Item, "
+        f"{_sql_hash('o.OrderID * 4 + k.n', 4)} % 100 AS HSize, "
+        f"{_sql_hash('o.OrderID * 4 + k.n', 5)} % 100 AS HScoops, "
+        f"{_sql_hash('o.OrderID * 4 + k.n', 6)} % @Flavors AS FlavorSlot "
+        f"FROM o JOIN {schema}.GenTally k ON k.n < {_sql_choice('o.HItems', *ITEM_COUNT_DISTRIBUTION)}), "
+        f"s AS (SELECT i.*, {size_case} AS Size FROM i), "
+        f"x AS (SELECT s.*, {scoop_case} AS Scoops FROM s) "
+        f"INSERT INTO {schema}.OrderDetails (OrderDetailID, OrderID, FlavorID, ScoopCount, Size, Price"
+        f"{detail_date_column}) "
+        f"SELECT @FirstDetailID + ROW_NUMBER() OVER (ORDER BY x.OrderID, x.Item) - 1, x.OrderID, f.FlavorID, "
+        f"x.Scoops, x.Size, {_sql_price(pricing_scenario)}{detail_date} "
+        f"FROM x JOIN {schema}.GenFlavors f ON f.rn = x.FlavorSlot"
+    )
+    if identity:
+        statements.append(f"SET IDENTITY_INSERT {schema}.OrderDetails OFF")
+    # Picks are consecutive slots from a random start, so they are distinct while Picks <= @Toppings
+    statements.append(
+        f"WITH d AS (SELECT OrderDetailID, Size, {_sql_hash('OrderDetailID', 7)} % 1000 AS HTopped, "
+        f"{_sql_hash('OrderDetailID', 8)} % 100 AS HCount, "
+        f"{_sql_hash('OrderDetailID', 9)} % NULLIF(@Toppings, 0) AS FirstSlot "
+        f"FROM {schema}.OrderDetails WHERE OrderDetailID >= @FirstDetailID), "
+        f"topped AS (SELECT d.OrderDetailID, d.FirstSlot, {picks_case} AS Picks FROM d "
+        f"WHERE d.HTopped < {chance_case}) "
+        f"INSERT INTO {schema}.OrderToppings (OrderDetailID, ToppingID) "
+        f"SELECT t.OrderDetailID, g.ToppingID FROM topped t "
+        f"JOIN {schema}.GenTally j ON j.n < t.Picks AND j.n < @Toppings "
+        f"JOIN {schema}.GenToppings g ON g.rn = (t.FirstSlot + j.n) % NULLIF(@Toppings, 0)"
+    )
+    totals = (
+        f"(SELECT d.OrderID, SUM(d.Price + COALESCE(e.Extra, 0)) AS Total FROM {schema}.OrderDetails d "
+        f"LEFT JOIN (SELECT ot.OrderDetailID, SUM(tp.ExtraCost) AS Extra FROM {schema}.OrderToppings ot "
+        f"JOIN {schema}.Toppings tp ON tp.ToppingID = ot.ToppingID WHERE ot.OrderDetailID >= @FirstDetailID "
+        f"GROUP BY ot.OrderDetailID) e ON e.OrderDetailID = d.OrderDetailID "
+        f"WHERE d.OrderDetailID >= @FirstDetailID GROUP BY d.OrderID) totals"
+    )
+    if dialect == "mssql":
+        statements.append(f"UPDATE o SET TotalAmount = totals.Total FROM {schema}.Orders o "
+                          f"JOIN {totals} ON totals.OrderID = o.OrderID")
+    else:
+        statements.append(f"UPDATE {schema}.Orders SET TotalAmount = totals.Total FROM {totals} "
+                          f"WHERE totals.OrderID = Orders.OrderID")
+    return statements
+
+
+def install_server_side_routine(cursor, schema, pricing_scenario=DEFAULT_PRICING_SCENARIO, dated_details=False):
+    """Create (or replace) the SQL Server procedure {schema}.GenerateOrdersFromPlan."""
+    body = ";\n    ".join(server_side_statements(schema, "mssql", pricing_scenario, dated_details))
+    cursor.execute(
+        f"CREATE OR ALTER PROCEDURE {schema}.GenerateOrdersFromPlan @Seed BIGINT, @FirstOrderID BIGINT, "
+        f"@FirstDetailID BIGINT, @Customers BIGINT, @Flavors BIGINT, @Toppings BIGINT AS\n"
+        f"BEGIN\n    SET NOCOUNT ON;\n    {body};\nEND"
+    )
+
+
+def summary_sources(schema, dialect, first_order_id, first_detail_id):
+    """SELECTs aggregating the orders from first_order_id on into DailySales / DailyFlavorSales rows."""
+    day = _sql_day("o.OrderDate", dialect)
+    return {
+        "DailySales": (
+            f"SELECT {day} AS SaleDate, COUNT(*) AS Orders, SUM(x.Items) AS Items, SUM(x.Scoops) AS Scoops, "
+            f"SUM(x.Toppings) AS Toppings, SUM(o.TotalAmount) AS Revenue FROM {schema}.Orders o "
+            f"JOIN (SELECT d.OrderID, COUNT(*) AS Items, SUM(d.ScoopCount) AS Scoops, SUM(COALESCE(t.n, 0)) AS Toppings "
+            f"FROM {schema}.OrderDetails d LEFT JOIN (SELECT OrderDetailID, COUNT(*) AS n FROM {schema}.OrderToppings "
+            f"WHERE OrderDetailID >= {first_detail_id} GROUP BY OrderDetailID) t ON t.OrderDetailID = d.OrderDetailID "
+            f"WHERE d.OrderDetailID >= {first_detail_id} GROUP BY d.OrderID) x ON x.OrderID = o.OrderID "
+            f"WHERE o.OrderID >= {first_order_id} GROUP BY {day}"
+        ),
+        "DailyFlavorSales": (
+            f"SELECT {day} AS SaleDate, d.FlavorID, COUNT(*) AS Items, SUM(d.ScoopCount) AS Scoops, "
+            f"SUM(d.Price) AS Revenue FROM {schema}.OrderDetails d JOIN {schema}.Orders o ON o.OrderID = d.OrderID "
+            f"WHERE d.OrderDetailID >= {first_detail_id} AND o.OrderID >= {first_order_id} GROUP BY {day}, d.FlavorID"
+        ),
+    }
+
+
+def _drop_work_tables(cursor, schema, dialect):
+    for table in SERVER_SIDE_WORK_TABLES:
+        if dialect == "mssql":
+            cursor.execute(f"IF OBJECT_ID('{schema}.{table}','U') IS NOT NULL DROP TABLE {schema}.{table}")
+        else:
+            cursor.execute(f"DROP TABLE IF EXISTS {schema}.{table}")
+
+
+def _fill_tally(cursor, schema, dialect, size):
+    """Numbers 0..size-1 in {schema}.GenTally, generated in the database."""
+    if dialect == "mssql":
+        digits = len(str(max(size - 1, 1)))
+        joins = " CROSS JOIN ".join(f"d d{i}" for i in range(digits))
+        number = " + ".join(f"d{i}.n * {10 ** i}" for i in range(digits))
+        cursor.execute(
+            f"WITH d(n) AS (SELECT n FROM (VALUES (0),(1),(2),(3),(4),(5),(6),(7),(8),(9)) v(n)) "
+            f"INSERT INTO {schema}.GenTally (n) SELECT n FROM (SELECT {number} AS n FROM {joins}) x WHERE n < {size}"
+        )
+    else:
+        cursor.execute(
+            f"WITH RECURSIVE seq(n) AS (SELECT 0 UNION ALL SELECT n + 1 FROM seq WHERE n + 1 < {size}) "
+            f"INSERT INTO {schema}.GenTally (n) SELECT n FROM seq"
+        )
+
+
+def generate_orders_server_side(cursor, schema, plan, pricing_scenario=DEFAULT_PRICING_SCENARIO, seed=None,
+                                report=None, summaries=True):
+    """
+    Create a plan's orders inside the database. `plan` is a list of (date, order_count,
+    temperature) rows, e.g. from daily_order_plan(); only these rows cross the wire.
+    On SQL Server the work runs in the stored procedure {schema}.GenerateOrdersFromPlan;
+    SQLite and Postgres run the same set-based statements directly. With `summaries` the
+    daily summary tables are updated set-based from the new rows.
+    Returns the same stats dict as generate_detailed_orders.
+    """
+    if report is None:
+        report = RunReport()
+    if seed is None:
+        seed = random.getrandbits(30)
+    dialect = db_dialect(cursor)
+    placeholder = "%s" if dialect == "postgres" else "?"
+    plan = [(day, int(orders), temperature) for day, orders, temperature in plan if orders > 0]
+    if not plan:
+        return {"orders": 0, "details": 0, "toppings": 0}
+
+    with report.phase("reference queries"):
+        batch = OrderBatch.for_cursor(cursor, schema)
+        _drop_work_tables(cursor, schema, dialect)
+        cursor.execute(f"CREATE TABLE {schema}.GenPlan (PlanDate DATE, OrderCount INT, Temperature FLOAT, "
+                       f"StartOffset BIGINT)")
+        cursor.execute(f"CREATE TABLE {schema}.GenTally (n INT PRIMARY KEY)")
+        cursor.execute(f"CREATE TABLE {schema}.GenCustomers (rn INT PRIMARY KEY, CustomerID INT)")
+        cursor.execute(f"CREATE TABLE {schema}.GenFlavors (rn INT PRIMARY KEY, FlavorID INT)")
+        cursor.execute(f"CREATE TABLE {schema}.GenToppings (rn INT PRIMARY KEY, ToppingID INT)")
+        cursor.execute(f"INSERT INTO {schema}.GenCustomers (rn, CustomerID) "
+                       f"SELECT ROW_NUMBER() OVER (ORDER BY CustomerID) - 1, CustomerID FROM {schema}.Customers")
+        cursor.execute(f"INSERT INTO {schema}.GenFlavors (rn, FlavorID) "
+                       f"SELECT ROW_NUMBER() OVER (ORDER BY FlavorID) - 1, FlavorID FROM {schema}.Flavors "
+                       f"WHERE IsAvailable = 1")
+        cursor.execute(f"INSERT INTO {schema}.GenToppings (rn, ToppingID) "
+                       f"SELECT ROW_NUMBER() OVER (ORDER BY ToppingID) - 1, ToppingID FROM {schema}.Toppings "
+                       f"WHERE IsAvailable = 1")
+        cursor.execute(f"SELECT (SELECT COUNT(*) FROM {schema}.GenCustomers), "
+                       f"(SELECT COUNT(*) FROM {schema}.GenFlavors), (SELECT COUNT(*) FROM {schema}.GenToppings)")
+        customers, flavors, toppings = cursor.fetchone()
+    if not customers or not flavors:
+        _drop_work_tables(cursor, schema, dialect)
+        raise ValueError("Server-side generation needs customers and available flavors in the database")
+
+    with report.phase("inserts"):
+        rows, offset = [], 0
+        for day, orders, temperature in plan:
+            rows.append((day.strftime('%Y-%m-%d'), orders, temperature, offset))
+            offset += orders
+        cursor.executemany(f"INSERT INTO {schema}.GenPlan (PlanDate, OrderCount, Temperature, StartOffset) "
+                           f"VALUES ({placeholder}, {placeholder}, {placeholder}, {placeholder})", rows)
+        _fill_tally(cursor, schema, dialect, max(max(orders for _, orders, _ in plan), 4, toppings))
+
+    params = {"@Seed": seed, "@FirstOrderID": batch.next_order_id, "@FirstDetailID": batch.next_detail_id,
+              "@Customers": customers, "@Flavors": flavors, "@Toppings": toppings}
+    with report.phase("server-side generation"):
+        if dialect == "mssql":
+            install_server_side_routine(cursor, schema, pricing_scenario, batch.dated_details)
+            cursor.execute(f"EXEC {schema}.GenerateOrdersFromPlan ?, ?, ?, ?, ?, ?", tuple(params.values()))
+        else:
+            pattern = re.compile("|".join(sorted(params, key=len, reverse=True)))
+            for statement in server_side_statements(schema, dialect, pricing_scenario, batch.dated_details):
+                cursor.execute(pattern.sub(lambda m: str(params[m.group(0)]), statement))
+
+        cursor.execute(f"SELECT (SELECT COUNT(*) FROM {schema}.OrderDetails WHERE OrderDetailID >= ?), "
+                       f"(SELECT COUNT(*) FROM {schema}.OrderToppings WHERE OrderDetailID >= ?)"
+                       .replace("?", placeholder), (batch.next_detail_id, batch.next_detail_id))
+        details, topping_rows = cursor.fetchone()
+        _drop_work_tables(cursor, schema, dialect)
+
+    if summaries:
+        with report.phase("summaries"):
+            ensure_summary_tables(cursor, schema)
+            for table, source in summary_sources(schema, dialect, batch.next_order_id, batch.next_detail_id).items():
+                cursor.execute(_summary_upsert_sql(schema, table, dialect, source))
+            weather = [(day.strftime('%Y-%m-%d'), float(temperature)) for day, _, temperature in plan
+                       if temperature is not None]
+            if weather:
+                cursor.executemany(_summary_upsert_sql(schema, "DailyWeather", dialect), weather)
+
+    return {"orders": offset, "details": details, "toppings": topping_rows}
+
+
+# Physical layouts recreate_schema can emit. "partitioned" splits Orders and OrderDetails by
+# month of OrderDate (OrderDetails gets a copy of OrderDate to align on); "columnstore" adds
+# clustered columnstore indexes on the fact tables. Both are SQL Server layouts - SQLite,
+# which has no partitioning, gets the same columns with a plain OrderDate index.
+SCHEMA_LAYOUTS = ("rowstore", "partitioned", "columnstore")
+PARTITION_YEARS_BACK, PARTITION_YEARS_AHEAD = 10, 2  # monthly boundaries around the current year
+
+
+def recreate_schema(conn, schema='dbo', layout="rowstore", partition_years=None):
+    """
+    Drop and recreate all tables under given schema, using one of SCHEMA_LAYOUTS.
+    `partition_years` is the range of years given monthly partitions; rows outside it
+    land in the first or last partition.
+    SQLite connections get an equivalent local schema (use schema 'main').
+    """
+    if layout not in SCHEMA_LAYOUTS:
+        raise ValueError(f"Unknown schema layout '{layout}', expected one of {', '.join(SCHEMA_LAYOUTS)}")
+    cursor = conn.cursor()
+    dialect = db_dialect(conn)
+    for tbl in ["OrderToppings", "OrderDetails", "Orders", "Toppings", "Flavors", "Customers", "Inventory",
+                "Stores", *SUMMARY_TABLES]:
+        if dialect == "sqlite":
+            cursor.execute(f"DROP TABLE IF EXISTS {schema}.{tbl}")
+        else:
+            cursor.execute(
+                f"IF OBJECT_ID('{schema}.{tbl}','U') IS NOT NULL DROP TABLE {schema}.{tbl}"
+            )
+    if dialect == "sqlite":
+        stmts = _sqlite_schema_statements(schema, layout)
+    else:
+        stmts = [
+            f"CREATE TABLE {schema}.Customers (CustomerID INT IDENTITY(1,1) PRIMARY KEY, FirstName NVARCHAR(50), LastName NVARCHAR(50), Email NVARCHAR(100), Phone NVARCHAR(20), CreatedAt DATETIME DEFAULT GETDATE())",
+            f"CREATE TABLE {schema}.Flavors (FlavorID INT IDENTITY(1,1) PRIMARY KEY, Name NVARCHAR(50) NOT NULL, Description NVARCHAR(255), IsAvailable BIT DEFAULT 1)",
+            f"CREATE TABLE {schema}.Toppings (ToppingID INT IDENTITY(1,1) PRIMARY KEY, Name NVARCHAR(50) NOT NULL, ExtraCost DECIMAL(5,2) DEFAULT 0.00, IsAvailable BIT DEFAULT 1)",
+        ]
+        if layout == "rowstore":
+            stmts += [
+                f"CREATE TABLE {schema}.Orders (OrderID INT IDENTITY(1,1) PRIMARY KEY, CustomerID INT REFERENCES {schema}.Customers(CustomerID), OrderDate DATETIME DEFAULT GETDATE(), TotalAmount DECIMAL(10,2))",
+                f"CREATE TABLE {schema}.OrderDetails (OrderDetailID INT IDENTITY(1,1) PRIMARY KEY, OrderID INT REFERENCES {schema}.Orders(OrderID), FlavorID INT REFERENCES {schema}.Flavors(FlavorID), ScoopCount INT CHECK(ScoopCount>0), Size NVARCHAR(10) CHECK(Size IN ('Small','Medium','Large')), Price DECIMAL(6,2))",
+                f"CREATE TABLE {schema}.OrderToppings (OrderDetailID INT REFERENCES {schema}.OrderDetails(OrderDetailID), ToppingID INT REFERENCES {schema}.Toppings(ToppingID), PRIMARY KEY(OrderDetailID,ToppingID))",
+            ]
+        else:
+            stmts += _mssql_partitioned_statements(schema, layout, partition_years)
+        stmts.append(
+            f"CREATE TABLE {schema}.Inventory (ItemID INT IDENTITY(1,1) PRIMARY KEY, ItemType NVARCHAR(20) CHECK(ItemType IN ('Flavor','Topping')), ItemName NVARCHAR(50), QuantityInStock INT DEFAULT 0, CONSTRAINT UQ_Inventory_Item UNIQUE (ItemType, ItemName))"
+        )
+        # Partition functions and schemes are database-wide, so they are named after the schema
+        cursor.execute(f"IF EXISTS (SELECT 1 FROM sys.partition_schemes WHERE name = 'ps_{schema}_OrderMonth') "
+                       f"DROP PARTITION SCHEME ps_{schema}_OrderMonth")
+        cursor.execute(f"IF EXISTS (SELECT 1 FROM sys.partition_functions WHERE name = 'pf_{schema}_OrderMonth') "
+                       f"DROP PARTITION FUNCTION pf_{schema}_OrderMonth")
+    for s in stmts:
+        cursor.execute(s)
+    ensure_summary_tables(cursor, schema)
+    conn.commit()
+    if layout != "rowstore":
+        return f"Schema recreated successfully ({layout} layout)."
+    return "Schema recreated successfully."
+
+
+def _mssql_partitioned_statements(schema, layout, partition_years=None):
+    """
+    Orders, OrderDetails and OrderToppings for the partitioned / columnstore layouts.
+    Orders and OrderDetails are aligned on a monthly RANGE RIGHT partition scheme over
+    OrderDate, so every insert lands directly in its month's partition. Their keys lead
+    with OrderDate (unique keys must contain the partitioning column), which leaves
+    OrderID alone non-unique, so the fact-to-fact foreign keys are dropped.
+    """
+    if partition_years is None:
+        year = datetime.now().year
+        partition_years = range(year - PARTITION_YEARS_BACK, year + PARTITION_YEARS_AHEAD + 1)
+    boundaries = ", ".join(f"'{year}{month:02d}01'" for year in partition_years for month in range(1, 13))
+    scheme = f"ps_{schema}_OrderMonth"
+    columnstore = layout == "columnstore"
+    key = "NONCLUSTERED" if columnstore else "CLUSTERED"
+    stmts = [
+        f"CREATE PARTITION FUNCTION pf_{schema}_OrderMonth (DATETIME) AS RANGE RIGHT FOR VALUES ({boundaries})",
+        f"CREATE PARTITION SCHEME {scheme} AS PARTITION pf_{schema}_OrderMonth ALL TO ([PRIMARY])",
+        f"CREATE TABLE {schema}.Orders (OrderID INT IDENTITY(1,1) NOT NULL, CustomerID INT REFERENCES {schema}.Customers(CustomerID), OrderDate DATETIME NOT NULL DEFAULT GETDATE(), TotalAmount DECIMAL(10,2), CONSTRAINT PK_Orders PRIMARY KEY {key} (OrderDate, OrderID)) ON {scheme}(OrderDate)",
+        f"CREATE TABLE {schema}.OrderDetails (OrderDetailID INT IDENTITY(1,1) NOT NULL, OrderID INT NOT NULL, FlavorID INT REFERENCES {schema}.Flavors(FlavorID), ScoopCount INT CHECK(ScoopCount>0), Size NVARCHAR(10) CHECK(Size IN ('Small','Medium','Large')), Price DECIMAL(6,2), OrderDate DATETIME NOT NULL, CONSTRAINT PK_OrderDetails PRIMARY KEY {key} (OrderDate, OrderDetailID)) ON {scheme}(OrderDate)",
+        f"CREATE TABLE {schema}.OrderToppings (OrderDetailID INT NOT NULL, ToppingID INT REFERENCES {schema}.Toppings(ToppingID), CONSTRAINT PK_OrderToppings PRIMARY KEY {key} (OrderDetailID, ToppingID))",
+    ]
+    if columnstore:
+        stmts += [
+            f"CREATE CLUSTERED COLUMNSTORE INDEX CCI_Orders ON {schema}.Orders ON {scheme}(OrderDate)",
+            f"CREATE CLUSTERED COLUMNSTORE INDEX CCI_OrderDetails ON {schema}.OrderDetails ON {scheme}(OrderDate)",
+            f"CREATE CLUSTERED COLUMNSTORE INDEX CCI_OrderToppings ON {schema}.OrderToppings",
+        ]
+    return stmts
+
+
+def _sqlite_schema_statements(schema, layout="rowstore"):
+    """
+    SQLite version of the recreate_schema tables (INTEGER PRIMARY KEY stands in for IDENTITY).
+    The partitioned layouts fall back to OrderDetails.OrderDate with an index, as SQLite has
+    no table partitioning.
+    """
+    detail_date = ", OrderDate TIMESTAMP" if layout != "rowstore" else ""
+    stmts = [
+        f"CREATE TABLE {schema}.Customers (CustomerID INTEGER PRIMARY KEY, FirstName TEXT, LastName TEXT, Email TEXT, Phone TEXT, CreatedAt TIMESTAMP DEFAULT CURRENT_TIMESTAMP)",
+        f"CREATE TABLE {schema}.Flavors (FlavorID INTEGER PRIMARY KEY, Name TEXT NOT NULL, Description TEXT, IsAvailable INTEGER DEFAULT 1)",
+        f"CREATE TABLE {schema}.Toppings (ToppingID INTEGER PRIMARY KEY, Name TEXT NOT NULL, ExtraCost NUMERIC DEFAULT 0.00, IsAvailable INTEGER DEFAULT 1)",
+        f"CREATE TABLE {schema}.Orders (OrderID INTEGER PRIMARY KEY, CustomerID INTEGER REFERENCES Customers(CustomerID), OrderDate TIMESTAMP DEFAULT CURRENT_TIMESTAMP, TotalAmount NUMERIC)",
+        f"CREATE TABLE {schema}.OrderDetails (OrderDetailID INTEGER PRIMARY KEY, OrderID INTEGER REFERENCES Orders(OrderID), FlavorID INTEGER REFERENCES Flavors(FlavorID), ScoopCount INTEGER CHECK(ScoopCount>0), Size TEXT CHECK(Size IN ('Small','Medium','Large')), Price NUMERIC{detail_date})",
+        f"CREATE TABLE {schema}.OrderToppings (OrderDetailID INTEGER REFERENCES OrderDetails(OrderDetailID), ToppingID INTEGER REFERENCES Toppings(ToppingID), PRIMARY KEY(OrderDetailID,ToppingID))",
+        f"CREATE TABLE {schema}.Inventory (ItemID INTEGER PRIMARY KEY, ItemType TEXT CHECK(ItemType IN ('Flavor','Topping')), ItemName TEXT, QuantityInStock INTEGER DEFAULT 0)",
+        f"CREATE UNIQUE INDEX {schema}.UQ_Inventory_Item ON Inventory (ItemType, ItemName)"
+    ]
+    if layout != "rowstore":
+        stmts.append(f"CREATE INDEX {schema}.IX_OrderDetails_OrderDate ON OrderDetails (OrderDate)")
+    return stmts
+
+
+# Post-load analytics: supporting indexes for the typical reporting queries, which otherwise
+# scan Orders and OrderDetails. (name, table, key columns, covering columns); SQL Server and
+# Postgres INCLUDE the covering columns, SQLite appends them to the key.
+ANALYTIC_INDEXES = [
+    ("IX_Orders_OrderDate", "Orders", "OrderDate", "CustomerID, TotalAmount"),
+    ("IX_Orders_CustomerID", "Orders", "CustomerID", "OrderDate, TotalAmount"),
+    ("IX_OrderDetails_OrderID", "OrderDetails", "OrderID", "FlavorID, ScoopCount, Size, Price"),
+    ("IX_OrderDetails_FlavorID", "OrderDetails", "FlavorID", "ScoopCount, Price"),
+    ("IX_OrderToppings_ToppingID", "OrderToppings", "ToppingID", None),
+]
+ANALYTIC_TABLES = ("Customers", "Flavors", "Toppings", "Orders", "OrderDetails", "OrderToppings")
+
+
+def create_analytic_indexes(cursor, schema):
+    """Create any missing ANALYTIC_INDEXES; returns the number of indexes in place."""
+    dialect = db_dialect(cursor)
+    for name, table, columns, covering in ANALYTIC_INDEXES:
+        if dialect == "mssql":
+            include = f" INCLUDE ({covering})" if covering else ""
+            cursor.execute(
+                f"IF NOT EXISTS (SELECT 1 FROM sys.indexes WHERE name = '{name}' "
+                f"AND object_id = OBJECT_ID('{schema}.{table}')) "
+                f"CREATE INDEX {name} ON {schema}.{table} ({columns}){include}"
+            )
+        elif dialect == "postgres":
+            include = f" INCLUDE ({covering})" if covering else ""
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {schema}.{table} ({columns}){include}")
+        else:
+            key = f"{columns}, {covering}" if covering else columns
+            cursor.execute(f"CREATE INDEX IF NOT EXISTS {schema}.{name} ON {table} ({key})")
+    return len(ANALYTIC_INDEXES)
+
+
+def drop_analytic_indexes(cursor, schema):
+    """Drop the ANALYTIC_INDEXES again, e.g. to compare query timings without them."""
+    dialect = db_dialect(cursor)
+    for name, table, _, _ in ANALYTIC_INDEXES:
+        if dialect == "mssql":
+            cursor.execute(f"DROP INDEX IF EXISTS {name} ON {schema}.{table}")
+        else:
+            cursor.execute(f"DROP INDEX IF EXISTS {schema}.{name}")
+
+
+def refresh_statistics(cursor, schema):
+    """Refresh optimizer statistics for the order and reference tables."""
+    dialect = db_dialect(cursor)
+    if dialect == "sqlite":
+        cursor.execute(f"ANALYZE {schema}")
+        return
+    for table in ANALYTIC_TABLES:
+        if dialect == "mssql":
+            cursor.execute(f"UPDATE STATISTICS {schema}.{table}")
+        else:
+            cursor.execute(f"ANALYZE {schema}.{table}")
+
+
+def _sql_day(column, dialect):
+    """Expression truncating a DATETIME column to its date."""
+    return f"date({column})" if dialect == "sqlite" else f"CAST({column} AS DATE)"
+
+
+def _sql_top(select, limit, dialect):
+    """`select` (a SELECT ... ORDER BY statement) restricted to its first `limit` rows."""
+    if dialect == "mssql":
+        return select.replace("SELECT ", f"SELECT TOP {limit} ", 1)
+    return f"{select} LIMIT {limit}"
+
+
+def analytic_queries(schema, dialect):
+    """
+    The bundled analytic query suite as [(name, SQL, params)]. `params` names the bind
+    parameters a query takes: "window" for (window start, window end) in the date-window
+    reports, "customer" for (customer ID,) in lookups, None for none.
+    """
+    day = _sql_day("o.OrderDate", dialect)
+    p = "%s" if dialect == "postgres" else "?"
+    return [
+        ("daily_sales", (
+            f"SELECT {day} AS SaleDate, COUNT(*) AS Orders, SUM(o.TotalAmount) AS Revenue "
+            f"FROM {schema}.Orders o WHERE o.OrderDate >= {p} AND o.OrderDate < {p} "
+            f"GROUP BY {day} ORDER BY SaleDate"
+        ), "window"),
+        ("sales_vs_temperature", (
+            f"SELECT s.SaleDate, w.Temperature, s.Orders, s.Revenue FROM {schema}.DailySales s "
+            f"JOIN {schema}.DailyWeather w ON w.WeatherDate = s.SaleDate ORDER BY w.Temperature"
+        ), None),
+        ("flavor_popularity", _sql_top(
+            f"SELECT f.FlavorID, f.Name, SUM(d.ScoopCount) AS Scoops, SUM(d.Price) AS Revenue "
+            f"FROM {schema}.OrderDetails d JOIN {schema}.Flavors f ON f.FlavorID = d.FlavorID "
+            f"GROUP BY f.FlavorID, f.Name ORDER BY Scoops DESC", 10, dialect
+        ), None),
+        ("window_flavor_mix", (
+            f"SELECT d.FlavorID, COUNT(*) AS Items, SUM(d.ScoopCount) AS Scoops "
+            f"FROM {schema}.Orders o JOIN {schema}.OrderDetails d ON d.OrderID = o.OrderID "
+            f"WHERE o.OrderDate >= {p} AND o.OrderDate < {p} GROUP BY d.FlavorID ORDER BY Scoops DESC"
+        ), "window"),
+        ("topping_attach_rate", (
+            f"SELECT d.Size, COUNT(*) AS Items, COUNT(t.OrderDetailID) AS Topped "
+            f"FROM {schema}.OrderDetails d LEFT JOIN (SELECT DISTINCT OrderDetailID FROM {schema}.OrderToppings) t "
+            f"ON t.OrderDetailID = d.OrderDetailID GROUP BY d.Size"
+        ), None),
+        ("topping_popularity", (
+            f"SELECT tp.ToppingID, tp.Name, COUNT(*) AS Uses FROM {schema}.OrderToppings ot "
+            f"JOIN {schema}.Toppings tp ON tp.ToppingID = ot.ToppingID GROUP BY tp.ToppingID, tp.Name ORDER BY Uses DESC"
+        ), None),
+        ("customer_lifetime_value", _sql_top(
+            f"SELECT o.CustomerID, COUNT(*) AS Orders, SUM(o.TotalAmount) AS LifetimeValue, "
+            f"MIN(o.OrderDate) AS FirstOrder, MAX(o.OrderDate) AS LastOrder "
+            f"FROM {schema}.Orders o GROUP BY o.CustomerID ORDER BY LifetimeValue DESC", 20, dialect
+        ), None),
+        ("customer_history", (
+            f"SELECT o.OrderID, o.OrderDate, d.FlavorID, d.Size, d.Price FROM {schema}.Orders o "
+            f"JOIN {schema}.OrderDetails d ON d.OrderID = o.OrderID WHERE o.CustomerID = {p} ORDER BY o.OrderDate"
+        ), "customer"),
+    ]
+
+
+ANALYTIC_WINDOW_DAYS = 30  # date-window queries cover the last 30 days of order history
+
+
+def run_analytic_queries(cursor, schema, repeat=3, report=None):
+    """
+    Time each query of analytic_queries against the current data, best of `repeat`
+    runs with all rows fetched. Returns [{"query", "rows", "seconds"}] in suite order.
+    """
+    if report is None:
+        report = RunReport()
+    dialect = db_dialect(cursor)
+
+    # Parameters come from the data itself: the last window of history and its busiest customer
+    cursor.execute(f"SELECT MAX(OrderDate) FROM {schema}.Orders")
+    last = cursor.fetchone()[0]
+    if last is None:
+        raise RuntimeError("No orders found: generate orders before running the analytic queries.")
+    if isinstance(last, str):
+        last = datetime.fromisoformat(last)
+    window_end = datetime(last.year, last.month, last.day) + timedelta(days=1)
+    window = (window_end - timedelta(days=ANALYTIC_WINDOW_DAYS), window_end)
+    if dialect == "sqlite":
+        window = tuple(bound.strftime('%Y-%m-%d %H:%M:%S') for bound in window)
+    cursor.execute(_sql_top(f"SELECT CustomerID FROM {schema}.Orders ORDER BY OrderID DESC", 1, dialect))
+    customer = (cursor.fetchone()[0],)
+
+    bind = {"window": window, "customer": customer, None: ()}
+    results = []
+    for name, sql, params in analytic_queries(schema, dialect):
+        params = bind[params]
+        best = None
+        with report.phase(f"query {name}"):
+            for _ in range(max(1, repeat)):
+                started = time.perf_counter()
+                cursor.execute(sql, params)
+                rows = len(cursor.fetchall())
+                seconds = time.perf_counter() - started
+                best = seconds if best is None else min(best, seconds)
+        results.append({"query": name, "rows": rows, "seconds": round(best, 6)})
+    return results
+
+
+# Weather store: daily values as native float32 files, one per location and variable, indexed
+# by days since EPOCH from a fixed first day (the start of the Open-Meteo archive). NaN marks
+# days not stored. Files are memory-mapped for reading and written in place, so they only grow.
+WEATHER_STORE_DIR = "weather_store"
+WEATHER_STORE_FIRST_DAY = (datetime(1940, 1, 1) - EPOCH).days
+WEATHER_LOCATION = "boston"
+# Store locations for chain datasets: (latitude, longitude, timezone, annual mean high °F,
+# seasonal swing relative to Boston). Synthetic weather rescales the Boston model to them.
+STORE_LOCATIONS = {
+    "boston": (42.35, -71.05, "America/New_York", None, 1.0),
+    "new_york": (40.71, -74.01, "America/New_York", 62.5, 1.0),
+    "philadelphia": (39.95, -75.17, "America/New_York", 64.5, 1.0),
+    "washington": (38.91, -77.04, "America/New_York", 67.0, 1.0),
+    "chicago": (41.88, -87.63, "America/Chicago", 59.0, 1.13),
+    "minneapolis": (44.98, -93.27, "America/Chicago", 55.0, 1.33),
+    "denver": (39.74, -104.99, "America/Denver", 65.0, 0.96),
+    "atlanta": (33.75, -84.39, "America/New_York", 73.0, 0.8),
+    "dallas": (32.78, -96.80, "America/Chicago", 77.0, 0.85),
+    "phoenix": (33.45, -112.07, "America/Phoenix", 87.0, 0.85),
+    "los_angeles": (34.05, -118.24, "America/Los_Angeles", 75.0, 0.35),
+    "seattle": (47.61, -122.33, "America/Los_Angeles", 60.0, 0.63),
+    "miami": (25.76, -80.19, "America/New_York", 84.0, 0.33),
+}
+WEATHER_VARIABLE = "temperature_2m_max"
+_WEATHER_HEADER = struct.Struct("<4sii4x")  # magic, format version, first day
+_WEATHER_MAGIC = b"ICWX"
+_NAN = float("nan")
+
+
+def day_number(value):
+    """Days since EPOCH of a date, datetime or 'YYYY-MM-DD' string."""
+    if isinstance(value, str):
+        value = date.fromisoformat(value[:10])
+    elif isinstance(value, datetime):
+        value = value.date()
+    return (value - EPOCH.date()).days
+
+
+class WeatherSeries:
+    """
+    Daily values of one weather variable in a float32 buffer indexed by day number, NaN where
+    a day is missing. Reads like the {'YYYY-MM-DD': value} dicts the generators take, while
+    span() and day() are plain array indexing with no date parsing or formatting.
+    """
+
+    def __init__(self, first_day, data):
+        self.first_day = first_day
+        self.data = data  # float32 buffer: memoryview over a mapped file, or array('f')
+
+    @classmethod
+    def from_dict(cls, weather_data):
+        days = sorted((day_number(key), value) for key, value in weather_data.items() if value is not None)
+        if not days:
+            return cls(0, array('f'))
+        first = days[0][0]
+        values = array('f', [_NAN]) * (days[-1][0] - first + 1)
+        for day, value in days:
+            values[day - first] = value
+        return cls(first, values)
+
+    def day(self, day, default=None):
+        """Value for a day number, or `default`."""
+        i = day - self.first_day
+        if 0 <= i < len(self.data):
+            value = self.data[i]
+            if value == value:  # not NaN
+                return round(value, 2)  # float32 back to the source's hundredths
+        return default
 
+    def span(self, start_date, days):
+        """Values for `days` consecutive days from `start_date` (None where missing)."""
+        offset = day_number(start_date) - self.first_day
+        data = self.data
+        lo, hi = max(0, -offset), min(days, len(data) - offset)
+        out = [None] * days
+        if np is not None and hi > lo:
+            chunk = np.round(np.asarray(data[offset + lo:offset + hi], dtype=np.float64), 2).tolist()
+            out[lo:hi] = [None if value != value else value for value in chunk]
+            return out
+        for i in range(lo, hi):
+            value = data[offset + i]
+            if value == value:
+                out[i] = round(value, 2)
+        return out
 
-def recreate_schema(conn, schema='dbo'):
-    """Drop and recreate all tables under given schema."""
-    cursor = conn.cursor()
-    for tbl in ["OrderToppings", "OrderDetails", "Orders", "Toppings", "Flavors", "Customers", "Inventory"]:
-        cursor.execute(
-            f"IF OBJECT_ID('{schema}.{tbl}','U') IS NOT NULL DROP TABLE {schema}.{tbl}"
-        )
-    stmts = [
-        f"CREATE TABLE {schema}.Customers (CustomerID INT IDENTITY(1,1) PRIMARY KEY, FirstName NVARCHAR(50), LastName NVARCHAR(50), Email NVARCHAR(100), Phone NVARCHAR(20), CreatedAt DATETIME DEFAULT GETDATE())",
-        f"CREATE TABLE {schema}.Flavors (FlavorID INT IDENTITY(1,1) PRIMARY KEY, Name NVARCHAR(50) NOT NULL, Description NVARCHAR(255), IsAvailable BIT DEFAULT 1)",
-        f"CREATE TABLE {schema}.Toppings (ToppingID INT IDENTITY(1,1) PRIMARY KEY, Name NVARCHAR(50) NOT NULL, ExtraCost DECIMAL(5,2) DEFAULT 0.00, IsAvailable BIT DEFAULT 1)",
-        f"CREATE TABLE {schema}.Orders (OrderID INT IDENTITY(1,1) PRIMARY KEY, CustomerID INT REFERENCES {schema}.Customers(CustomerID), OrderDate DATETIME DEFAULT GETDATE(), TotalAmount DECIMAL(10,2))",
-        f"CREATE TABLE {schema}.OrderDetails (OrderDetailID INT IDENTITY(1,1) PRIMARY KEY, OrderID INT REFERENCES {schema}.Orders(OrderID), FlavorID INT REFERENCES {schema}.Flavors(FlavorID), ScoopCount INT CHECK(ScoopCount>0), Size NVARCHAR(10) CHECK(Size IN ('Small','Medium','Large')), Price DECIMAL(6,2))",
-        f"CREATE TABLE {schema}.OrderToppings (OrderDetailID INT REFERENCES {schema}.OrderDetails(OrderDetailID), ToppingID INT REFERENCES {schema}.Toppings(ToppingID), PRIMARY KEY(OrderDetailID,ToppingID))",
-        f"CREATE TABLE {schema}.Inventory (ItemID INT IDENTITY(1,1) PRIMARY KEY, ItemType NVARCHAR(20) CHECK(ItemType IN ('Flavor','Topping')), ItemName NVARCHAR(50), QuantityInStock INT DEFAULT 0)"
-    ]
-    for s in stmts:
-        cursor.execute(s)
-    conn.commit()
-    return "Schema recreated successfully."
+    def window(self, start_date, end_date):
+        """Zero-copy view of the days from `start_date` to `end_date` inclusive."""
+        lo = max(day_number(start_date) - self.first_day, 0)
+        hi = min(day_number(end_date) - self.first_day + 1, len(self.data))
+        return WeatherSeries(self.first_day + lo, self.data[lo:max(lo, hi)])
+
+    def complete(self, start_date, end_date):
+        """True if every day from `start_date` to `end_date` has a value."""
+        days = day_number(end_date) - day_number(start_date) + 1
+        return None not in self.span(start_date, days)
+
+    # dict-style access for callers that still work with date strings
+    def get(self, key, default=None):
+        return self.day(day_number(key), default)
+
+    def __getitem__(self, key):
+        value = self.get(key)
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def items(self):
+        for i, value in enumerate(self.data):
+            if value == value:
+                yield (EPOCH + timedelta(days=self.first_day + i)).strftime('%Y-%m-%d'), round(value, 2)
+
+    def keys(self):
+        return (key for key, _ in self.items())
+
+    __iter__ = keys
+
+    def values(self):
+        return [round(value, 2) for value in self.data if value == value]
+
+    def __len__(self):
+        return sum(1 for value in self.data if value == value)
+
+
+class WeatherStore:
+    """
+    Directory of weather files, {directory}/{location}/{variable}.f32. series() maps a file
+    read-only in O(1) whatever its length; write() stores values in place at their day
+    offsets, leaving other days untouched.
+    """
+
+    def __init__(self, directory=WEATHER_STORE_DIR):
+        self.directory = directory
+
+    def path(self, location=WEATHER_LOCATION, variable=WEATHER_VARIABLE):
+        return os.path.join(self.directory, location, f"{variable}.f32")
+
+    def series(self, location=WEATHER_LOCATION, variable=WEATHER_VARIABLE):
+        """Memory-mapped WeatherSeries of a stored variable, or None if nothing is stored."""
+        path = self.path(location, variable)
+        if not os.path.exists(path) or os.path.getsize(path) <= _WEATHER_HEADER.size:
+            return None
+        with open(path, "rb") as fh:
+            mapped = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, first_day = _WEATHER_HEADER.unpack_from(mapped)
+        if magic != _WEATHER_MAGIC or version != 1:
+            raise ValueError(f"{path} is not a weather store file")
+        body = (len(mapped) - _WEATHER_HEADER.size) // 4 * 4
+        return WeatherSeries(first_day, memoryview(mapped)[_WEATHER_HEADER.size:_WEATHER_HEADER.size + body].cast('f'))
+
+    def lookup(self, start_date, end_date, location=WEATHER_LOCATION, variable=WEATHER_VARIABLE):
+        """Stored values for the whole range as a WeatherSeries window, or None if any day is missing."""
+        series = self.series(location, variable)
+        if series is None or not series.complete(start_date, end_date):
+            return None
+        return series.window(start_date, end_date)
+
+    def write(self, weather_data, location=WEATHER_LOCATION, variable=WEATHER_VARIABLE):
+        """Store a {date: value} mapping (or WeatherSeries); returns the number of days written."""
+        days = sorted(item for item in ((day_number(key), value) for key, value in weather_data.items())
+                      if item[1] is not None and item[0] >= WEATHER_STORE_FIRST_DAY)
+        if not days:
+            return 0
+        path = self.path(location, variable)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        if not os.path.exists(path):
+            with open(path, "wb") as fh:
+                fh.write(_WEATHER_HEADER.pack(_WEATHER_MAGIC, 1, WEATHER_STORE_FIRST_DAY))
+
+        with open(path, "r+b") as fh:
+            fh.seek(0, os.SEEK_END)
+            stored = (fh.tell() - _WEATHER_HEADER.size) // 4
+            last = days[-1][0] - WEATHER_STORE_FIRST_DAY
+            if last >= stored:
+                fh.write((array('f', [_NAN]) * (last + 1 - stored)).tobytes())  # grow, new days missing
+            # One write per run of consecutive days
+            run_start, run = days[0][0], array('f')
+            for day, value in days:
+                if day != run_start + len(run):
+                    fh.seek(_WEATHER_HEADER.size + (run_start - WEATHER_STORE_FIRST_DAY) * 4)
+                    fh.write(run.tobytes())
+                    run_start, run = day, array('f')
+                run.append(value)
+            fh.seek(_WEATHER_HEADER.size + (run_start - WEATHER_STORE_FIRST_DAY) * 4)
+            fh.write(run.tobytes())
+        return len(days)
+
+
+WEATHER_STORE = WeatherStore()  # set to None to always fetch weather from the API
+
+
+def stored_weather(start_date, end_date, location=WEATHER_LOCATION):
+    """The weather store's series for the range if every day is stored, else None."""
+    if WEATHER_STORE is None:
+        return None
+    try:
+        return WEATHER_STORE.lookup(start_date, end_date, location)
+    except (OSError, ValueError):
+        return None
+
+
+def store_weather(weather_data, log_msg, location=WEATHER_LOCATION):
+    """Keep fetched history in the weather store; the store is a cache, so failures only log."""
+    if WEATHER_STORE is None:
+        return
+    try:
+        WEATHER_STORE.write(weather_data, location)
+    except OSError as e:
+        log_msg(f"⚠️ Could not update the weather store: {e}")
 
 
 def get_boston_weather_data(year, log_callback=None):
@@ -535,6 +2956,11 @@ def get_boston_weather_data(year, log_callback=None):
     if year > current_year:
         log_msg(f"⚠️ Year {year} is in the future, using realistic weather patterns for Boston")
         return generate_boston_weather_pattern(year)
+
+    stored = stored_weather(datetime(year, 1, 1), datetime(year, 12, 31))
+    if stored is not None:
+        log_msg(f"📦 Loaded {len(stored.data)} days of stored weather data for {year}")
+        return stored
     
     try:
         # Boston coordinates: latitude=42.35, longitude=-71.05
@@ -588,6 +3014,7 @@ def get_boston_weather_data(year, log_callback=None):
         # If we got good data, return it
         if weather_dict:
             log_msg(f"✅ Retrieved {len(weather_dict)} days of historical weather data for {year}")
+            store_weather(weather_dict, log_msg)
             return weather_dict
         else:
             log_msg(f"⚠️ No temperature data in API response for {year}")
@@ -608,98 +3035,257 @@ def get_boston_weather_data(year, log_callback=None):
         return generate_boston_weather_pattern(year)
 
 
-def generate_boston_weather_pattern(year):
+# Boston monthly average temperatures (high temperatures in °F)
+BOSTON_MONTHLY_AVG_TEMPS = {
+    1: 36,   # January
+    2: 39,   # February  
+    3: 46,   # March
+    4: 56,   # April
+    5: 67,   # May
+    6: 76,   # June
+    7: 82,   # July - peak summer
+    8: 80,   # August
+    9: 72,   # September
+    10: 62,  # October
+    11: 52,  # November
+    12: 42   # December
+}
+
+# Temperature variation ranges for each month
+BOSTON_MONTHLY_RANGES = {
+    1: 25,   # January: can vary ±25°F from average
+    2: 22,   # February
+    3: 20,   # March
+    4: 18,   # April
+    5: 15,   # May
+    6: 12,   # June
+    7: 10,   # July - most stable
+    8: 12,   # August
+    9: 15,   # September
+    10: 18,  # October
+    11: 20,  # November
+    12: 23   # December
+}
+
+
+def climatology_temperatures(start_date, days):
+    """Boston monthly average highs for `days` consecutive days from `start_date`; no API call or randomness."""
+    first = start_date.date() if isinstance(start_date, datetime) else start_date
+    return [BOSTON_MONTHLY_AVG_TEMPS[(first + timedelta(days=i)).month] for i in range(days)]
+
+
+# Synthetic weather is a pure function of (location, day, seed): every random draw is a
+# counter-based hash of those values, so any day or sub-range can be computed on its own and
+# always comes out the same, alone, in a range, in another process or in any order.
+WEATHER_SEED = 0
+WEATHER_EPISODE_DAYS = 5  # heat waves and cold snaps last one block of this many days
+_MASK64 = (1 << 64) - 1
+
+
+def _splitmix64(x):
+    x = (x + 0x9E3779B97F4A7C15) & _MASK64
+    x = ((x ^ (x >> 30)) * 0xBF58476D1CE4E5B9) & _MASK64
+    x = ((x ^ (x >> 27)) * 0x94D049BB133111EB) & _MASK64
+    return x ^ (x >> 31)
+
+
+def _weather_uniform(location_key, day, stream, seed):
+    """Uniform [0, 1) draw number `stream` for one location and day number."""
+    return _splitmix64(_splitmix64(_splitmix64(seed ^ location_key) ^ (day & _MASK64)) ^ stream) / 2.0 ** 64
+
+
+def _location_key(location):
+    return zlib.crc32(location.encode()) << 32
+
+
+def _location_climate(location):
+    """(annual mean high, seasonal swing) to rescale the Boston model to, or None for Boston itself."""
+    climate = STORE_LOCATIONS.get(location)
+    if climate is None or climate[3] is None:
+        return None
+    return climate[3], climate[4]
+
+
+_DAYS_IN_MONTH = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+_BOSTON_ANNUAL_MEAN = sum(BOSTON_MONTHLY_AVG_TEMPS.values()) / 12
+
+
+def synthetic_temperature(day, location=WEATHER_LOCATION, seed=WEATHER_SEED):
+    """
+    Realistic Boston high (°F) for one day (date, datetime, 'YYYY-MM-DD' or day number), from
+    the monthly averages and ranges plus hashed daily noise and multi-day episodes.
+    """
+    n = day if isinstance(day, int) else day_number(day)
+    return _synthetic_temperature(n, _location_key(location), seed, _location_climate(location))
+
+
+def _synthetic_temperature(n, key, seed, climate=None):
+    current = EPOCH.date() + timedelta(days=n)
+    month = current.month
+    temp_range = BOSTON_MONTHLY_RANGES[month]
+
+    # Drift a little toward next month's average through the month
+    base_temp = BOSTON_MONTHLY_AVG_TEMPS[month]
+    next_month_temp = BOSTON_MONTHLY_AVG_TEMPS[month % 12 + 1]
+    days_in_month = _DAYS_IN_MONTH[month - 1] + (month == 2 and current.year % 4 == 0
+                                                 and (current.year % 100 != 0 or current.year % 400 == 0))
+    temperature = base_temp + (next_month_temp - base_temp) * (current.day - 1) / days_in_month * 0.3
+
+    # Daily variation, plus heat waves (20% of episodes) and cold snaps (20%) spanning several days
+    temperature += (_weather_uniform(key, n, 0, seed) - 0.5) * temp_range
+    episode = _weather_uniform(key, n // WEATHER_EPISODE_DAYS, 1, seed)
+    if episode < 0.2:
+        temperature += 5 + 10 * _weather_uniform(key, n, 2, seed)
+    elif episode >= 0.8:
+        temperature -= 5 + 7 * _weather_uniform(key, n, 2, seed)
+
+    temperature = max(-10, min(105, temperature))  # extreme bounds for Boston
+    if climate is not None:
+        mean, swing = climate
+        temperature = mean + (temperature - _BOSTON_ANNUAL_MEAN) * swing
+    return round(temperature, 1)
+
+
+def synthetic_weather(start_date, end_date, location=WEATHER_LOCATION, seed=WEATHER_SEED):
+    """Synthetic temperatures from `start_date` to `end_date` inclusive as a WeatherSeries."""
+    first, last = day_number(start_date), day_number(end_date)
+    key, climate = _location_key(location), _location_climate(location)
+    return WeatherSeries(first, array('f', (_synthetic_temperature(n, key, seed, climate)
+                                             for n in range(first, last + 1))))
+
+
+def generate_boston_weather_pattern(year, location=WEATHER_LOCATION, seed=WEATHER_SEED):
     """
-    Generate realistic weather patterns for Boston based on historical climate data.
+    Realistic weather for a whole year as {'YYYY-MM-DD': temperature}.
     Used as fallback when API is unavailable or for future years.
     """
-    weather_dict = {}
-    start_date = datetime(year, 1, 1)
-    end_date = datetime(year, 12, 31)
-    
-    # Boston monthly average temperatures (high temperatures in °F)
-    monthly_avg_temps = {
-        1: 36,   # January
-        2: 39,   # February  
-        3: 46,   # March
-        4: 56,   # April
-        5: 67,   # May
-        6: 76,   # June
-        7: 82,   # July - peak summer
-        8: 80,   # August
-        9: 72,   # September
-        10: 62,  # October
-        11: 52,  # November
-        12: 42   # December
-    }
-    
-    # Temperature variation ranges for each month
-    monthly_ranges = {
-        1: 25,   # January: can vary ±25°F from average
-        2: 22,   # February
-        3: 20,   # March
-        4: 18,   # April
-        5: 15,   # May
-        6: 12,   # June
-        7: 10,   # July - most stable
-        8: 12,   # August
-        9: 15,   # September
-        10: 18,  # October
-        11: 20,  # November
-        12: 23   # December
-    }
-    
-    current_date = start_date
-    while current_date <= end_date:
-        month = current_date.month
-        day_of_year = current_date.timetuple().tm_yday
-        
-        # Base temperature for this month
-        base_temp = monthly_avg_temps[month]
-        temp_range = monthly_ranges[month]
-        
-        # Add seasonal progression within the month
-        # Create smooth transitions between months
-        if month < 12:
-            next_month_temp = monthly_avg_temps[month + 1]
-        else:
-            next_month_temp = monthly_avg_temps[1]
-        
-        # Progress through the month (0.0 to 1.0)
-        days_in_month = (datetime(year, month + 1, 1) - datetime(year, month, 1)).days if month < 12 else 31
-        if month == 12:
-            days_in_month = 31
-        month_progress = (current_date.day - 1) / days_in_month
-        
-        # Interpolate between current and next month
-        interpolated_temp = base_temp + (next_month_temp - base_temp) * month_progress * 0.3
-        
-        # Add daily variation
-        daily_variation = random.uniform(-temp_range/2, temp_range/2)
-        
-        # Add weather patterns (simulate multi-day trends)
-        # Use day of year to create consistent but varied patterns
-        pattern_seed = (day_of_year * 17 + year) % 100  # Pseudo-random but consistent
-        if pattern_seed < 20:  # 20% chance of heat wave
-            daily_variation += random.uniform(5, 15)
-        elif pattern_seed > 80:  # 20% chance of cold snap
-            daily_variation -= random.uniform(5, 12)
-        
-        # Calculate final temperature
-        final_temp = interpolated_temp + daily_variation
-        
-        # Apply realistic bounds for Boston
-        final_temp = max(-10, min(105, final_temp))  # Extreme bounds for Boston
-        
-        # Round to reasonable precision
-        final_temp = round(final_temp, 1)
-        
-        date_str = current_date.strftime('%Y-%m-%d')
-        weather_dict[date_str] = final_temp
-        
-        current_date += timedelta(days=1)
-    
-    return weather_dict
+    start, key, climate = day_number(date(year, 1, 1)), _location_key(location), _location_climate(location)
+    return {(EPOCH + timedelta(days=n)).strftime('%Y-%m-%d'): _synthetic_temperature(n, key, seed, climate)
+            for n in range(start, day_number(date(year, 12, 31)) + 1)}
+
+
+# Temperature bands for calculate_order_multiplier, hottest first: (minimum °F, low, span).
+# A day's multiplier is low + uniform(0, span); the last band catches everything colder.
+TEMPERATURE_BANDS = [
+    (85, 2.5, 0.5),    # Very hot days: 2.5-3.0x orders
+    (75, 1.8, 0.4),    # Hot days: 1.8-2.2x orders
+    (65, 1.2, 0.3),    # Warm days: 1.2-1.5x orders
+    (55, 0.8, 0.2),    # Cool days: 0.8-1.0x orders
+    (45, 0.5, 0.2),    # Cold days: 0.5-0.7x orders
+    (None, 0.3, 0.2),  # Very cold days: 0.3-0.5x orders
+]
+
+# Buying-habit effects as (low, span), applied the same way as the temperature bands
+DEMAND_EFFECTS = {
+    "weekend": (1.3, 0.2),        # more people out and about
+    "summer": (1.1, 0.15),        # June-August vacation season
+    "christmas": (0.7, 0.2),      # reduced hours Dec 20-31
+    "july_4th": (1.5, 0.3),
+    "memorial_day": (1.4, 0.2),
+    "storm": (0.9, 0.1),          # very hot days (>90°F) often bring afternoon storms
+    "school_break": (1.2, 0.1),   # summer weekdays, kids out of school
+}
+
+# Holiday codes in the calendar table
+HOLIDAY_NONE, HOLIDAY_CHRISTMAS, HOLIDAY_JULY_4TH, HOLIDAY_MEMORIAL_DAY = range(4)
+_HOLIDAY_EFFECTS = {HOLIDAY_CHRISTMAS: "christmas", HOLIDAY_JULY_4TH: "july_4th",
+                    HOLIDAY_MEMORIAL_DAY: "memorial_day"}
+
+_CALENDAR_TABLES = {}
+
+
+def calendar_table(year):
+    """
+    Per-day calendar columns for `year` as numpy arrays (month, weekday, holiday code),
+    built once and cached. daily_demand_weights slices these instead of calling
+    weekday()/strftime per day.
+    """
+    table = _CALENDAR_TABLES.get(year)
+    if table is None:
+        days = np.arange(np.datetime64(f"{year}-01-01"), np.datetime64(f"{year + 1}-01-01"))
+        month = (days.astype("datetime64[M]").astype(np.int64) % 12 + 1).astype(np.int8)
+        day = ((days - days.astype("datetime64[M]")).astype(np.int64) + 1).astype(np.int8)
+        weekday = ((days.astype(np.int64) + 3) % 7).astype(np.int8)  # 1970-01-01 was a Thursday
+
+        holiday = np.full(len(days), HOLIDAY_NONE, dtype=np.int8)
+        holiday[(month == 12) & (day >= 20)] = HOLIDAY_CHRISTMAS
+        holiday[(month == 7) & (day == 4)] = HOLIDAY_JULY_4TH
+        holiday[(month == 5) & (weekday == 0) & (day >= 25)] = HOLIDAY_MEMORIAL_DAY
+
+        table = {"month": month, "weekday": weekday, "holiday": holiday}
+        _CALENDAR_TABLES[year] = table
+    return table
+
+
+def _calendar_span(start_date, days):
+    """calendar_table columns for `days` consecutive days from `start_date`, across year boundaries."""
+    pieces = {"month": [], "weekday": [], "holiday": []}
+    current = start_date.date() if isinstance(start_date, datetime) else start_date
+    remaining = days
+    while remaining > 0:
+        table = calendar_table(current.year)
+        offset = current.timetuple().tm_yday - 1
+        take = min(remaining, len(table["month"]) - offset)
+        for column, values in pieces.items():
+            values.append(table[column][offset:offset + take])
+        remaining -= take
+        current = current.replace(year=current.year + 1, month=1, day=1)
+    return {column: np.concatenate(values) if values else np.empty(0, dtype=np.int8)
+            for column, values in pieces.items()}
+
+
+def span_temperatures(weather_data, start_date, days):
+    """Temperatures for `days` consecutive days from `start_date` (None where the weather data has no entry)."""
+    if isinstance(weather_data, WeatherSeries):
+        return weather_data.span(start_date, days)
+    weather_data = weather_data or {}
+    first = start_date.date() if isinstance(start_date, datetime) else start_date
+    return [weather_data.get((first + timedelta(days=i)).isoformat()) for i in range(days)]
+
+
+def daily_demand_weights(start_date, temperatures, rng=None):
+    """
+    Relative order demand for consecutive days from `start_date`: the temperature
+    multiplier times the buying-habit multiplier, as in calculate_order_multiplier and
+    buying_habit_multiplier, but computed for the whole span in one pass over the
+    calendar table and temperature array. `temperatures` may contain None for unknown
+    days. Returns a numpy array, or a list when numpy is not installed.
+    """
+    days = len(temperatures)
+    if np is None:
+        weights = []
+        for offset, temperature in enumerate(temperatures):
+            current_date = start_date + timedelta(days=offset)
+            weights.append(calculate_order_multiplier(temperature) *
+                           buying_habit_multiplier(current_date, temperature))
+        return weights
+
+    if rng is None:
+        rng = np.random.default_rng(random.getrandbits(64))
+    calendar = _calendar_span(start_date, days)
+    temps = np.array([np.nan if t is None else t for t in temperatures], dtype=np.float64)
+    known = ~np.isnan(temps)
+
+    def factor(mask, low, span):
+        return np.where(mask, low + rng.random(days) * span, 1.0)
+
+    # Temperature multiplier: pick each day's band by comparing against the band minimums
+    band = np.full(days, len(TEMPERATURE_BANDS) - 1)
+    for index in range(len(TEMPERATURE_BANDS) - 2, -1, -1):
+        band[temps >= TEMPERATURE_BANDS[index][0]] = index
+    lows = np.array([low for _, low, _ in TEMPERATURE_BANDS])
+    spans = np.array([span for _, _, span in TEMPERATURE_BANDS])
+    weights = np.where(known, lows[band] + rng.random(days) * spans[band], 1.0)
+
+    month, weekday, holiday = calendar["month"], calendar["weekday"], calendar["holiday"]
+    summer = (month >= 6) & (month <= 8)
+    weights *= factor(weekday >= 5, *DEMAND_EFFECTS["weekend"])
+    weights *= factor(summer, *DEMAND_EFFECTS["summer"])
+    for code, effect in _HOLIDAY_EFFECTS.items():
+        weights *= factor(holiday == code, *DEMAND_EFFECTS[effect])
+    weights *= factor(known & (np.nan_to_num(temps) > 90), *DEMAND_EFFECTS["storm"])
+    weights *= factor(summer & (weekday < 5), *DEMAND_EFFECTS["school_break"])
+    return weights
 
 
 def calculate_order_multiplier(temperature, base_temp=65):
@@ -712,53 +3298,53 @@ def calculate_order_multiplier(temperature, base_temp=65):
         return 1.0  # Default multiplier if no temperature data
     
     # Temperature effect curve - more orders when hotter
-    if temperature >= 85:  # Very hot days
-        return 2.5 + random.uniform(0, 0.5)  # 2.5-3.0x orders
-    elif temperature >= 75:  # Hot days
-        return 1.8 + random.uniform(0, 0.4)  # 1.8-2.2x orders
-    elif temperature >= 65:  # Warm days
-        return 1.2 + random.uniform(0, 0.3)  # 1.2-1.5x orders
-    elif temperature >= 55:  # Cool days
-        return 0.8 + random.uniform(0, 0.2)  # 0.8-1.0x orders
-    elif temperature >= 45:  # Cold days
-        return 0.5 + random.uniform(0, 0.2)  # 0.5-0.7x orders
-    else:  # Very cold days
-        return 0.3 + random.uniform(0, 0.2)  # 0.3-0.5x orders
+    for minimum, low, span in TEMPERATURE_BANDS:
+        if minimum is None or temperature >= minimum:
+            return low + random.uniform(0, span)
 
 
-def add_buying_habit_variations(base_orders, date_obj, temperature):
+def buying_habit_multiplier(date_obj, temperature):
     """
-    Add random buying habit variations based on day of week, holidays, and weather patterns.
+    Demand multiplier from day of week, holidays, and weather patterns for one day.
     """
+    def effect(name):
+        low, span = DEMAND_EFFECTS[name]
+        return low + random.uniform(0, span)
+
     multiplier = 1.0
     
     # Weekend effect - more people out and about
     if date_obj.weekday() in [5, 6]:  # Saturday = 5, Sunday = 6
-        multiplier *= 1.3 + random.uniform(0, 0.2)  # 1.3-1.5x on weekends
+        multiplier *= effect("weekend")
     
     # Summer vacation effect (June-August)
     if date_obj.month in [6, 7, 8]:
-        multiplier *= 1.1 + random.uniform(0, 0.15)  # 1.1-1.25x in summer
+        multiplier *= effect("summer")
     
     # Holiday periods - reduced business hours but higher intensity when open
     if date_obj.month == 12 and date_obj.day in range(20, 32):  # Christmas week
-        multiplier *= 0.7 + random.uniform(0, 0.2)  # 0.7-0.9x during holidays
+        multiplier *= effect("christmas")
     elif date_obj.month == 7 and date_obj.day == 4:  # July 4th
-        multiplier *= 1.5 + random.uniform(0, 0.3)  # 1.5-1.8x on July 4th
+        multiplier *= effect("july_4th")
     elif date_obj.month == 5 and date_obj.weekday() == 0 and date_obj.day >= 25:  # Memorial Day
-        multiplier *= 1.4 + random.uniform(0, 0.2)  # 1.4-1.6x on Memorial Day
+        multiplier *= effect("memorial_day")
     
     # Rainy day effect - assume fewer orders on very hot days that might have storms
     if temperature and temperature > 90:
-        # Very hot days might have afternoon storms, slight reduction
-        multiplier *= 0.9 + random.uniform(0, 0.1)  # 0.9-1.0x
+        multiplier *= effect("storm")
     
     # School schedule effect - more kids during school holidays
     if date_obj.month in [6, 7, 8] and date_obj.weekday() < 5:  # Summer weekdays
-        multiplier *= 1.2 + random.uniform(0, 0.1)  # 1.2-1.3x (kids out of school)
-    
-    # Apply all multipliers
-    adjusted_orders = int(base_orders * multiplier)
+        multiplier *= effect("school_break")
+
+    return multiplier
+
+
+def add_buying_habit_variations(base_orders, date_obj, temperature):
+    """
+    Add random buying habit variations based on day of week, holidays, and weather patterns.
+    """
+    adjusted_orders = int(base_orders * buying_habit_multiplier(date_obj, temperature))
     
     # Ensure minimum of 0 orders
     return max(0, adjusted_orders)
@@ -782,8 +3368,12 @@ def get_single_day_weather_data(year, month, day, log_callback=None):
     # For future years, generate realistic weather patterns
     if year > current_year:
         log_msg(f"⚠️ Date {test_date} is in the future, using realistic weather pattern")
-        weather_pattern = generate_boston_weather_pattern(year)
-        return weather_pattern.get(test_date)
+        return synthetic_temperature(test_date)
+
+    stored = stored_weather(test_date, test_date)
+    if stored is not None:
+        log_msg(f"📦 Stored weather data for {test_date}")
+        return stored.get(test_date)
     
     try:
         # Boston coordinates: latitude=42.35, longitude=-71.05
@@ -814,20 +3404,17 @@ def get_single_day_weather_data(year, month, day, log_callback=None):
                     log_msg(f"❌ Weather API Error (400): {error_msg}")
                     log_msg(f"📊 Request URL: {full_url}")
                     log_msg(f"📊 Switching to realistic weather pattern for {test_date}")
-                    weather_pattern = generate_boston_weather_pattern(year)
-                    return weather_pattern.get(test_date)
+                    return synthetic_temperature(test_date)
                 else:
                     log_msg(f"❌ Weather API returned 400 error for date {test_date}")
                     log_msg(f"📊 Request URL: {full_url}")
                     log_msg(f"📊 Switching to realistic weather pattern for {test_date}")
-                    weather_pattern = generate_boston_weather_pattern(year)
-                    return weather_pattern.get(test_date)
+                    return synthetic_temperature(test_date)
             except:
                 log_msg(f"❌ Weather API returned 400 error for date {test_date}")
                 log_msg(f"📊 Request URL: {full_url}")
                 log_msg(f"📊 Switching to realistic weather pattern for {test_date}")
-                weather_pattern = generate_boston_weather_pattern(year)
-                return weather_pattern.get(test_date)
+                return synthetic_temperature(test_date)
         
         response.raise_for_status()
         
@@ -842,36 +3429,34 @@ def get_single_day_weather_data(year, month, day, log_callback=None):
                 temp = temps[0]  # Should only be one day
                 if temp is not None:
                     log_msg(f"📊 Historical weather data retrieved from API")
+                    store_weather({test_date: temp}, log_msg)
                     return temp
         
         # If we got here, no valid data
         log_msg(f"⚠️ No temperature data in API response for {test_date}")
         log_msg(f"📊 Switching to realistic weather pattern for {test_date}")
-        weather_pattern = generate_boston_weather_pattern(year)
-        return weather_pattern.get(test_date)
+        return synthetic_temperature(test_date)
         
     except requests.exceptions.Timeout:
         log_msg(f"⏰ Weather API timeout for date {test_date}")
         log_msg(f"📊 Switching to realistic weather pattern for {test_date}")
-        weather_pattern = generate_boston_weather_pattern(year)
-        return weather_pattern.get(test_date)
+        return synthetic_temperature(test_date)
     except requests.exceptions.RequestException as e:
         log_msg(f"🌐 Weather API connection error for date {test_date}: {e}")
         log_msg(f"📊 Switching to realistic weather pattern for {test_date}")
-        weather_pattern = generate_boston_weather_pattern(year)
-        return weather_pattern.get(test_date)
+        return synthetic_temperature(test_date)
     except Exception as e:
         log_msg(f"❌ Weather API error for date {test_date}: {e}")
         log_msg(f"📊 Switching to realistic weather pattern for {test_date}")
-        weather_pattern = generate_boston_weather_pattern(year)
-        return weather_pattern.get(test_date)
+        return synthetic_temperature(test_date)
 
 
-def get_boston_weather_data_range(start_date, end_date, log_callback=None):
+def get_boston_weather_data_range(start_date, end_date, log_callback=None, location=WEATHER_LOCATION):
     """
     Fetch daily temperature data for Boston from Open-Meteo API for a specific date range.
     Returns a dictionary mapping date strings to temperature values.
     For future dates or API failures, generates realistic weather patterns.
+    `location` picks another of the STORE_LOCATIONS (chain datasets).
     """
     def log_msg(msg):
         if log_callback:
@@ -894,41 +3479,24 @@ def get_boston_weather_data_range(start_date, end_date, log_callback=None):
     if start_date.date() > current_date or end_date.date() > current_date:
         # For future dates, generate realistic weather patterns
         log_msg(f"⚠️ Date range {start_date_str} to {end_date_str} includes future dates, using realistic weather patterns")
-        
-        # Generate patterns for all years in the range
-        weather_data = {}
-        years_needed = set()
-        current_check = start_date
-        while current_check <= end_date:
-            years_needed.add(current_check.year)
-            current_check += timedelta(days=1)
-        
-        for year in years_needed:
-            year_weather = generate_boston_weather_pattern(year)
-            weather_data.update(year_weather)
-        
-        # Filter to only the requested date range
-        filtered_weather = {}
-        current_check = start_date
-        while current_check <= end_date:
-            date_str = current_check.strftime('%Y-%m-%d')
-            if date_str in weather_data:
-                filtered_weather[date_str] = weather_data[date_str]
-            current_check += timedelta(days=1)
-        
-        return filtered_weather
+        return synthetic_weather(start_date, end_date, location)
+
+    stored = stored_weather(start_date, end_date, location)
+    if stored is not None:
+        log_msg(f"📦 Loaded {len(stored.data)} days of stored weather data for {start_date_str} to {end_date_str}")
+        return stored
     
     try:
-        # Boston coordinates: latitude=42.35, longitude=-71.05
+        latitude, longitude, timezone = STORE_LOCATIONS[location][:3]
         url = "https://archive-api.open-meteo.com/v1/archive"
         params = {
-            "latitude": 42.35,
-            "longitude": -71.05,
+            "latitude": latitude,
+            "longitude": longitude,
             "start_date": start_date_str,
             "end_date": end_date_str,
             "daily": "temperature_2m_max",
             "temperature_unit": "fahrenheit",
-            "timezone": "America/New_York"
+            "timezone": timezone
         }
         
         # Log the actual API request being made
@@ -947,83 +3515,17 @@ def get_boston_weather_data_range(start_date, end_date, log_callback=None):
                     log_msg(f"❌ Weather API Error (400): {error_msg}")
                     log_msg(f"📊 Request URL: {full_url}")
                     log_msg(f"📊 Switching to realistic weather patterns for date range {start_date_str} to {end_date_str}")
-                    
-                    # Generate patterns for all years in the range
-                    weather_data = {}
-                    years_needed = set()
-                    current_check = start_date
-                    while current_check <= end_date:
-                        years_needed.add(current_check.year)
-                        current_check += timedelta(days=1)
-                    
-                    for year in years_needed:
-                        year_weather = generate_boston_weather_pattern(year)
-                        weather_data.update(year_weather)
-                    
-                    # Filter to only the requested date range
-                    filtered_weather = {}
-                    current_check = start_date
-                    while current_check <= end_date:
-                        date_str = current_check.strftime('%Y-%m-%d')
-                        if date_str in weather_data:
-                            filtered_weather[date_str] = weather_data[date_str]
-                        current_check += timedelta(days=1)
-                    
-                    return filtered_weather
+                    return synthetic_weather(start_date, end_date, location)
                 else:
                     log_msg(f"❌ Weather API returned 400 error for date range {start_date_str} to {end_date_str}")
                     log_msg(f"📊 Request URL: {full_url}")
                     log_msg(f"📊 Switching to realistic weather patterns")
-                    
-                    # Generate fallback patterns
-                    weather_data = {}
-                    years_needed = set()
-                    current_check = start_date
-                    while current_check <= end_date:
-                        years_needed.add(current_check.year)
-                        current_check += timedelta(days=1)
-                    
-                    for year in years_needed:
-                        year_weather = generate_boston_weather_pattern(year)
-                        weather_data.update(year_weather)
-                    
-                    # Filter to only the requested date range
-                    filtered_weather = {}
-                    current_check = start_date
-                    while current_check <= end_date:
-                        date_str = current_check.strftime('%Y-%m-%d')
-                        if date_str in weather_data:
-                            filtered_weather[date_str] = weather_data[date_str]
-                        current_check += timedelta(days=1)
-                    
-                    return filtered_weather
+                    return synthetic_weather(start_date, end_date, location)
             except:
                 log_msg(f"❌ Weather API returned 400 error for date range {start_date_str} to {end_date_str}")
                 log_msg(f"📊 Request URL: {full_url}")
                 log_msg(f"📊 Switching to realistic weather patterns")
-                
-                # Generate fallback patterns
-                weather_data = {}
-                years_needed = set()
-                current_check = start_date
-                while current_check <= end_date:
-                    years_needed.add(current_check.year)
-                    current_check += timedelta(days=1)
-                
-                for year in years_needed:
-                    year_weather = generate_boston_weather_pattern(year)
-                    weather_data.update(year_weather)
-                
-                # Filter to only the requested date range
-                filtered_weather = {}
-                current_check = start_date
-                while current_check <= end_date:
-                    date_str = current_check.strftime('%Y-%m-%d')
-                    if date_str in weather_data:
-                        filtered_weather[date_str] = weather_data[date_str]
-                    current_check += timedelta(days=1)
-                
-                return filtered_weather
+                return synthetic_weather(start_date, end_date, location)
         
         response.raise_for_status()
         
@@ -1042,112 +3544,25 @@ def get_boston_weather_data_range(start_date, end_date, log_callback=None):
         # If we got good data, return it
         if weather_dict:
             log_msg(f"📊 Retrieved {len(weather_dict)} days of historical weather data from API")
+            store_weather(weather_dict, log_msg, location)
             return weather_dict
         else:
             log_msg(f"⚠️ No temperature data in API response for date range {start_date_str} to {end_date_str}")
             log_msg(f"📊 Switching to realistic weather patterns")
-            
-            # Generate fallback patterns
-            weather_data = {}
-            years_needed = set()
-            current_check = start_date
-            while current_check <= end_date:
-                years_needed.add(current_check.year)
-                current_check += timedelta(days=1)
-            
-            for year in years_needed:
-                year_weather = generate_boston_weather_pattern(year)
-                weather_data.update(year_weather)
-            
-            # Filter to only the requested date range
-            filtered_weather = {}
-            current_check = start_date
-            while current_check <= end_date:
-                date_str = current_check.strftime('%Y-%m-%d')
-                if date_str in weather_data:
-                    filtered_weather[date_str] = weather_data[date_str]
-                current_check += timedelta(days=1)
-            
-            return filtered_weather
+            return synthetic_weather(start_date, end_date, location)
         
     except requests.exceptions.Timeout:
         log_msg(f"⏰ Weather API timeout for date range {start_date_str} to {end_date_str}")
         log_msg(f"📊 Switching to realistic weather patterns")
-        
-        # Generate fallback patterns
-        weather_data = {}
-        years_needed = set()
-        current_check = start_date
-        while current_check <= end_date:
-            years_needed.add(current_check.year)
-            current_check += timedelta(days=1)
-        
-        for year in years_needed:
-            year_weather = generate_boston_weather_pattern(year)
-            weather_data.update(year_weather)
-        
-        # Filter to only the requested date range
-        filtered_weather = {}
-        current_check = start_date
-        while current_check <= end_date:
-            date_str = current_check.strftime('%Y-%m-%d')
-            if date_str in weather_data:
-                filtered_weather[date_str] = weather_data[date_str]
-            current_check += timedelta(days=1)
-        
-        return filtered_weather
+        return synthetic_weather(start_date, end_date, location)
     except requests.exceptions.RequestException as e:
         log_msg(f"🌐 Weather API connection error for date range {start_date_str} to {end_date_str}: {e}")
         log_msg(f"📊 Switching to realistic weather patterns")
-        
-        # Generate fallback patterns
-        weather_data = {}
-        years_needed = set()
-        current_check = start_date
-        while current_check <= end_date:
-            years_needed.add(current_check.year)
-            current_check += timedelta(days=1)
-        
-        for year in years_needed:
-            year_weather = generate_boston_weather_pattern(year)
-            weather_data.update(year_weather)
-        
-        # Filter to only the requested date range
-        filtered_weather = {}
-        current_check = start_date
-        while current_check <= end_date:
-            date_str = current_check.strftime('%Y-%m-%d')
-            if date_str in weather_data:
-                filtered_weather[date_str] = weather_data[date_str]
-            current_check += timedelta(days=1)
-        
-        return filtered_weather
+        return synthetic_weather(start_date, end_date, location)
     except Exception as e:
         log_msg(f"❌ Weather API error for date range {start_date_str} to {end_date_str}: {e}")
         log_msg(f"📊 Switching to realistic weather patterns")
-        
-        # Generate fallback patterns
-        weather_data = {}
-        years_needed = set()
-        current_check = start_date
-        while current_check <= end_date:
-            years_needed.add(current_check.year)
-            current_check += timedelta(days=1)
-        
-        for year in years_needed:
-            year_weather = generate_boston_weather_pattern(year)
-            weather_data.update(year_weather)
-        
-        # Filter to only the requested date range
-        filtered_weather = {}
-        current_check = start_date
-        while current_check <= end_date:
-            date_str = current_check.strftime('%Y-%m-%d')
-            if date_str in weather_data:
-                filtered_weather[date_str] = weather_data[date_str]
-            current_check += timedelta(days=1)
-        
-        return filtered_weather
+        return synthetic_weather(start_date, end_date, location)
 
 
 class IceCreamApp(ttk.Frame):
@@ -1286,6 +3701,16 @@ class IceCreamApp(ttk.Frame):
         trust_cb = ttk.Checkbutton(options_frame, text="🛡️ Trust Cert", variable=self.trust_var)
         trust_cb.grid(row=0, column=1, sticky="w")
 
+        self.profile_var = tk.BooleanVar(value=False)
+        profile_cb = ttk.Checkbutton(options_frame, text="🔬 Profile runs", variable=self.profile_var)
+        profile_cb.grid(row=1, column=0, columnspan=2, sticky="w", padx=(10, 0), pady=(5, 0))
+
+        ttk.Label(options_frame, text="🧱 Layout:").grid(row=2, column=0, sticky="w", padx=(10, 0), pady=(5, 0))
+        self.layout_var = tk.StringVar(value=SCHEMA_LAYOUTS[0])
+        layout_cb = ttk.Combobox(options_frame, textvariable=self.layout_var, values=SCHEMA_LAYOUTS,
+                                 state="readonly", font=('Arial', 10), width=12)
+        layout_cb.grid(row=2, column=1, sticky="w", pady=(5, 0))
+
         # Connection action buttons
         conn_buttons = ttk.Frame(cf)
         conn_buttons.grid(row=7, column=0, columnspan=2, pady=(15, 10))
@@ -1298,6 +3723,10 @@ class IceCreamApp(ttk.Frame):
                                  command=self.on_recreate, style='Schema.TButton')
         recreate_btn.grid(row=0, column=1)
 
+        analytics_btn = ttk.Button(conn_buttons, text="📈 Index & Benchmark Queries",
+                                   command=self.on_analytics, style='Connect.TButton')
+        analytics_btn.grid(row=1, column=0, columnspan=2, pady=(10, 0))
+
         # MIDDLE COLUMN - Data Generation & Date Range
         middle_frame = ttk.Frame(main_container)
         middle_frame.grid(row=1, column=1, sticky="nsew", padx=10)
@@ -1492,8 +3921,13 @@ class IceCreamApp(ttk.Frame):
                                              variable=self.yearly_inventory_var)
         yearly_inventory_cb.grid(row=2, column=1, sticky="w", pady=5)
 
+        self.yearly_server_var = tk.IntVar(value=0)
+        yearly_server_cb = ttk.Checkbutton(yearly_frame_section, text="Generate on the server (set-based)",
+                                          variable=self.yearly_server_var)
+        yearly_server_cb.grid(row=3, column=1, sticky="w", pady=5)
+
         # Update yearly button grid position
-        yearly_gen_buttons.grid(row=3, column=0, columnspan=2, pady=(15, 10))
+        yearly_gen_buttons.grid(row=4, column=0, columnspan=2, pady=(15, 10))
 
         # Add inventory checkbox to range section  
         range_inventory_label = ttk.Label(range_frame, text="📦 Inventory:")
@@ -1504,14 +3938,46 @@ class IceCreamApp(ttk.Frame):
                                             variable=self.range_inventory_var)
         range_inventory_cb.grid(row=4, column=1, sticky="w", pady=5)
 
+        self.range_commit_var = tk.IntVar(value=1)
+        range_commit_cb = ttk.Checkbutton(range_frame, text=f"Commit every {STREAM_WINDOW_DAYS} days as generated",
+                                         variable=self.range_commit_var)
+        range_commit_cb.grid(row=5, column=1, sticky="w", pady=5)
+
         # Date range action button
         range_buttons = ttk.Frame(range_frame)
-        range_buttons.grid(row=5, column=0, columnspan=2, pady=(15, 10))
+        range_buttons.grid(row=6, column=0, columnspan=2, pady=(15, 10))
         
         range_btn = ttk.Button(range_buttons, text="📆 Generate Date Range Orders", 
                               command=self.on_generate_date_range, style='Range.TButton')
         range_btn.grid(row=0, column=0)
 
+        # Live Order Stream Section
+        live_frame = ttk.LabelFrame(middle_frame, text="🟢 Live Order Stream",
+                                    style='Header.TLabelframe')
+        live_frame.grid(row=3, column=0, sticky="ew", pady=(10, 0))
+        live_frame.columnconfigure(1, weight=1)
+
+        live_rate_label = ttk.Label(live_frame, text="⚡ Orders/sec:")
+        live_rate_label.grid(row=0, column=0, sticky="e", pady=5, padx=(10, 5))
+
+        self.live_rate_var = tk.DoubleVar(value=5.0)
+        live_rate_entry = ttk.Entry(live_frame, textvariable=self.live_rate_var, font=('Arial', 10), width=8)
+        live_rate_entry.grid(row=0, column=1, sticky="w", pady=5)
+
+        self.live_all_day_var = tk.IntVar(value=0)
+        live_all_day_cb = ttk.Checkbutton(live_frame, text="Keep streaming outside shop hours",
+                                          variable=self.live_all_day_var)
+        live_all_day_cb.grid(row=1, column=1, sticky="w", pady=5)
+
+        live_buttons = ttk.Frame(live_frame)
+        live_buttons.grid(row=2, column=0, columnspan=2, pady=(15, 10))
+
+        live_start_btn = ttk.Button(live_buttons, text="▶️ Open Shop", command=self.on_start_live,
+                                    style='Generate.TButton')
+        live_start_btn.grid(row=0, column=0, padx=(0, 10))
+        live_stop_btn = ttk.Button(live_buttons, text="⏹️ Close Shop", command=self.on_stop_live)
+        live_stop_btn.grid(row=0, column=1)
+
         # RIGHT COLUMN - Weather API Test
         test_frame = ttk.LabelFrame(main_container, text="🌡️ Test Weather API", 
                                    style='Header.TLabelframe')
@@ -1562,12 +4028,164 @@ class IceCreamApp(ttk.Frame):
                                wrap=tk.WORD, bg='#FFFACD', fg='#8B4513')  # Cream background, brown text
         self.log.grid(sticky="nsew", padx=5, pady=5)
 
+        # Progress of the running yearly/date-range generation, with Cancel
+        pf = ttk.Frame(main_container)
+        pf.grid(row=3, column=0, columnspan=3, sticky="ew", pady=(10, 0))
+        pf.columnconfigure(0, weight=1)
+
+        self.progress_bar = ttk.Progressbar(pf, mode='determinate', maximum=100)
+        self.progress_bar.grid(row=0, column=0, sticky="ew", padx=(5, 10))
+        self.progress_text = tk.StringVar(value="Idle")
+        ttk.Label(pf, textvariable=self.progress_text, width=60).grid(row=0, column=1, sticky="w")
+        self.cancel_btn = ttk.Button(pf, text="🛑 Cancel", command=self.on_cancel, state='disabled')
+        self.cancel_btn.grid(row=0, column=2, padx=(10, 5))
+
+        # Reference data snapshots reused across runs, keyed by (server, database, schema)
+        self._reference_snapshots = {}
+
+        # Worker thread state; the worker hands Tk work back through _ui_queue
+        self._worker = None
+        self._cancel_event = None
+        self._keep_on_cancel = True
+        self._progress = None
+        self._ui_queue = queue.Queue()
+        self._poll_ui_queue()
+
         # Add some initial welcome message
         self.log_msg("🍦 Welcome to Ice Cream Database Generator!")
         self.log_msg("Configure your connection settings and generate sample data.")
         self.log_msg(f"📊 Available drivers: {len(drivers)} found")
 
+    def get_reference_snapshot(self, cursor, conn_args, schema):
+        """Reuse the reference snapshot from earlier runs unless the catalogue has changed since."""
+        key = (conn_args[0], conn_args[1], schema)
+        snapshot = self._reference_snapshots.get(key)
+        if snapshot is None:
+            snapshot = ReferenceSnapshot.load(cursor, schema)
+        else:
+            snapshot = snapshot.refresh_if_stale(cursor)
+        self._reference_snapshots[key] = snapshot
+        return snapshot
+
+    def _connection_args(self):
+        """connect_to_db arguments, read on the Tk thread so worker threads never touch Tk variables."""
+        return (self.server_var.get(), self.db_var.get(), self.user_var.get(), self.pwd_var.get(),
+                self.driver_cb.get(), self.encrypt_var.get(), self.trust_var.get())
+
+    def _worker_busy(self):
+        if self._worker is not None and self._worker.is_alive():
+            messagebox.showwarning("Run in Progress", "A generation run is already in progress. Cancel it or wait for it to finish.")
+            return True
+        return False
+
+    def _start_worker(self, name, target, *args, progress=None):
+        """Run target(report, *args) on a worker thread, with progress shown and Cancel enabled."""
+        profile = self.profile_var.get()  # Tk variables are read on the UI thread only
+        self._cancel_event = threading.Event()
+        self._keep_on_cancel = True
+        self._progress = progress or RunProgress()
+        self.progress_bar['value'] = 0
+        self.progress_text.set("Preparing…")
+        self.cancel_btn.config(state='normal')
+
+        def run():
+            try:
+                # Profilers hook the thread they are started on, so the report is begun on the worker
+                target(self._start_report(name, profile), *args)
+            finally:
+                self._call_in_ui(self._worker_finished)
+
+        self._worker = threading.Thread(target=run, name=f"generate-{name}", daemon=True)
+        self._worker.start()
+
+    def _worker_finished(self):
+        self._refresh_progress()
+        self._worker = None
+        self._progress = None
+        self.cancel_btn.config(state='disabled')
+
+    def _finish_cancelled(self, cn, report, orders_generated, committed=0):
+        """
+        Commit or roll back the days completed before Cancel, as chosen in on_cancel.
+        `committed` orders were already committed window by window and stay either way.
+        """
+        if self._keep_on_cancel:
+            with report.phase("commit"):
+                cn.commit()
+            self.log_msg(f"🛑 Run cancelled – kept {orders_generated} orders from the completed days")
+        else:
+            cn.rollback()
+            if committed:
+                self.log_msg(f"🛑 Run cancelled – kept {committed} committed orders, "
+                             f"rolled back {orders_generated - committed}")
+            else:
+                self.log_msg(f"🛑 Run cancelled – rolled back {orders_generated} orders")
+        cn.close()
+        self._finish_report(report)
+
+    def on_cancel(self):
+        if self._worker is None or self._cancel_event.is_set():
+            return
+        keep = messagebox.askyesnocancel(
+            "Cancel Run",
+            "Stop the run at the next batch boundary?\n\n"
+            "Yes – keep (commit) the days completed so far\n"
+            "No – roll back the days not yet committed\n"
+            "Cancel – keep running"
+        )
+        if keep is None:
+            return
+        self._keep_on_cancel = keep
+        self._cancel_event.set()
+        self.cancel_btn.config(state='disabled')
+        self.log_msg("🛑 Cancelling at the next batch boundary…")
+
+    def _call_in_ui(self, fn, *args):
+        """Queue fn(*args) to run on the Tk thread; Tk must not be touched from worker threads."""
+        self._ui_queue.put((fn, args))
+
+    def _poll_ui_queue(self):
+        """Run callbacks queued by the worker thread and refresh the progress display."""
+        while True:
+            try:
+                fn, args = self._ui_queue.get_nowait()
+            except queue.Empty:
+                break
+            fn(*args)
+        self._refresh_progress()
+        self.after(200, self._poll_ui_queue)
+
+    def _refresh_progress(self):
+        if self._progress is not None:
+            self.progress_bar['value'] = self._progress.fraction * 100
+            self.progress_text.set(self._progress.describe())
+
+    def _start_report(self, name, profile=None):
+        """
+        Begin a RunReport for a generation run, with profiling if `profile` is set (by
+        default, if the option is ticked).
+        """
+        report = RunReport(name)
+        if self.profile_var.get() if profile is None else profile:
+            report.start_profiling()
+        return report
+
+    def _finish_report(self, report):
+        """Log the run's phase breakdown and save it (and any profile) under run_reports/."""
+        profile_path = report.stop_profiling()
+        for line in report.summary_lines():
+            self.log_msg(line)
+        try:
+            self.log_msg(f"📄 Run report saved to {report.save()}")
+        except OSError as e:
+            self.log_msg(f"⚠️ Could not save run report: {e}")
+        if profile_path:
+            self.log_msg(f"🔬 Profile saved to {profile_path}")
+
     def log_msg(self, msg):
+        if threading.current_thread() is not threading.main_thread():
+            self._call_in_ui(self.log_msg, msg)
+            return
         self.log.config(state='normal')
         timestamp = datetime.now().strftime("%H:%M:%S")
         self.log.insert('end', f"[{timestamp}] {msg}\n")
@@ -1577,13 +4195,15 @@ class IceCreamApp(ttk.Frame):
         self.update_idletasks()
 
     def on_recreate(self):
+        if self._worker_busy():
+            return
         self.log_msg("Recreating schema…")
         try:
             cn = connect_to_db(
                 self.server_var.get(), self.db_var.get(), self.user_var.get(), self.pwd_var.get(),
                 self.driver_cb.get(), self.encrypt_var.get(), self.trust_var.get()
             )
-            msg = recreate_schema(cn, self.schema_var.get())
+            msg = recreate_schema(cn, self.schema_var.get(), self.layout_var.get())
             cn.close()
             self.log_msg(msg)
             messagebox.showinfo("Success", msg)
@@ -1592,13 +4212,17 @@ class IceCreamApp(ttk.Frame):
             messagebox.showerror("Schema Error", str(e))
 
     def on_generate(self):
+        if self._worker_busy():
+            return
         self.log_msg("Generating data…")
+        report = self._start_report("basic")
         try:
-            cn = connect_to_db(
-                self.server_var.get(), self.db_var.get(), self.user_var.get(), self.pwd_var.get(),
-                self.driver_cb.get(), self.encrypt_var.get(), self.trust_var.get()
-            )
-            cur = cn.cursor()
+            with report.phase("connect"):
+                cn = connect_to_db(
+                    self.server_var.get(), self.db_var.get(), self.user_var.get(), self.pwd_var.get(),
+                    self.driver_cb.get(), self.encrypt_var.get(), self.trust_var.get()
+                )
+            cur = CountingCursor(cn.cursor(), report)
             schema = self.schema_var.get()
             cur.execute(
                 "SELECT COUNT(*) FROM INFORMATION_SCHEMA.TABLES WHERE TABLE_SCHEMA=? AND TABLE_NAME='Customers'", schema
@@ -1609,39 +4233,54 @@ class IceCreamApp(ttk.Frame):
                 self.log_msg("Schema recreated on-the-fly.")
 
             if self.row_counts['Customers'].get():
-                generate_customers(cur, schema, self.row_counts['Customers'].get())
+                with report.phase("customers"):
+                    generate_customers(cur, schema, self.row_counts['Customers'].get())
                 self.log_msg(f"Inserted {self.row_counts['Customers'].get()} customers")
             if self.row_counts['Flavors'].get():
-                generate_flavors(cur, schema, self.row_counts['Flavors'].get())
+                with report.phase("flavors"):
+                    generate_flavors(cur, schema, self.row_counts['Flavors'].get())
                 self.log_msg(f"Inserted {self.row_counts['Flavors'].get()} flavors")
             if self.row_counts['Toppings'].get():
-                generate_toppings(cur, schema, self.row_counts['Toppings'].get())
+                with report.phase("toppings"):
+                    generate_toppings(cur, schema, self.row_counts['Toppings'].get())
                 self.log_msg(f"Inserted {self.row_counts['Toppings'].get()} toppings")
             if self.row_counts['Orders'].get():
-                stats = generate_detailed_orders(cur, schema, self.row_counts['Orders'].get())
+                with report.phase("reference queries"):
+                    reference = self.get_reference_snapshot(cur, self._connection_args(), schema)
+                stats = generate_detailed_orders(cur, schema, self.row_counts['Orders'].get(), reference=reference,
+                                                 report=report, summary=DailySummary())
                 self.log_msg(f"Generated {stats['orders']} orders with {stats['details']} order details and {stats['toppings']} toppings")
 
             # Generate inventory if requested
             if self.inventory_var.get():
-                inventory_count = generate_inventory(cur, schema)
+                with report.phase("inventory"):
+                    inventory_count = generate_inventory(cur, schema)
                 self.log_msg(f"Generated {inventory_count} inventory records")
 
-            cn.commit()
+            with report.phase("commit"):
+                cn.commit()
             cn.close()
+            self._finish_report(report)
             messagebox.showinfo("Success", "Data generated successfully.")
         except Exception as e:
+            self._finish_report(report)
             self.log_msg(f"Error: {e}")
             messagebox.showerror("Error", str(e))
 
     def on_generate_yearly(self):
+        if self._worker_busy():
+            return
         self.log_msg("Generating yearly orders…")
+        self._start_worker("yearly", self._run_yearly, self._connection_args(), self.schema_var.get(),
+                           self.year_var.get(), self.yearly_orders_var.get(), self.yearly_inventory_var.get(),
+                           self.yearly_server_var.get())
+
+    def _run_yearly(self, report, conn_args, schema, year, count, update_inventory, server_side):
+        """Worker-thread body of on_generate_yearly."""
         try:
-            cn = connect_to_db(
-                self.server_var.get(), self.db_var.get(), self.user_var.get(), self.pwd_var.get(),
-                self.driver_cb.get(), self.encrypt_var.get(), self.trust_var.get()
-            )
-            cur = cn.cursor()
-            schema = self.schema_var.get()
+            with report.phase("connect"):
+                cn = connect_to_db(*conn_args)
+            cur = CountingCursor(cn.cursor(), report)
             
             # Check if schema exists
             cur.execute(
@@ -1652,8 +4291,9 @@ class IceCreamApp(ttk.Frame):
                 recreate_schema(cn, schema)
                 self.log_msg("Schema recreated on-the-fly.")
 
-            self.log_msg(f"Fetching Boston weather data for {self.year_var.get()}…")
-            weather_data = get_boston_weather_data(self.year_var.get(), self.log_msg)
+            self.log_msg(f"Fetching Boston weather data for {year}…")
+            with report.phase("weather"):
+                weather_data = get_boston_weather_data(year, self.log_msg)
             
             if weather_data:
                 # Show sample temperature info
@@ -1664,7 +4304,6 @@ class IceCreamApp(ttk.Frame):
                     min_temp = min(temps)
                     
                     # Get first and last day temperatures
-                    year = self.year_var.get()
                     first_day = f"{year}-01-01"
                     last_day = f"{year}-12-31"
                     
@@ -1685,23 +4324,40 @@ class IceCreamApp(ttk.Frame):
                 self.log_msg("Warning: No weather data available, using default patterns")
             
             self.log_msg("Generating orders based on weather patterns and buying habits…")
-            orders_generated = generate_yearly_orders(cur, schema, self.yearly_orders_var.get(), self.year_var.get(), weather_data)
+            reference = None
+            if server_side:
+                self.log_msg("🗄️ Sending the daily plan; the server generates the rows set-based")
+            else:
+                with report.phase("reference queries"):
+                    reference = self.get_reference_snapshot(cur, conn_args, schema)
+            orders_generated = generate_yearly_orders(cur, schema, count, year, weather_data,
+                                                      reference=reference, report=report,
+                                                      progress_callback=self._progress.update,
+                                                      cancel_event=self._cancel_event,
+                                                      server_side=bool(server_side))
+            if self._cancel_event.is_set():
+                self._finish_cancelled(cn, report, orders_generated)
+                return
             
-            self.log_msg(f"Inserted {orders_generated} orders for year {self.year_var.get()}")
+            self.log_msg(f"Inserted {orders_generated} orders for year {year}")
             if weather_data:
                 self.log_msg("Orders distributed based on Boston temperature data and seasonal patterns")
 
             # Generate inventory if requested
-            if self.yearly_inventory_var.get():
-                inventory_count = generate_inventory(cur, schema)
+            if update_inventory:
+                with report.phase("inventory"):
+                    inventory_count = generate_inventory(cur, schema)
                 self.log_msg(f"Updated {inventory_count} inventory records")
 
-            cn.commit()
+            with report.phase("commit"):
+                cn.commit()
             cn.close()
-            messagebox.showinfo("Success", f"Generated {orders_generated} weather-influenced orders for {self.year_var.get()}.")
+            self._finish_report(report)
+            self._call_in_ui(messagebox.showinfo, "Success", f"Generated {orders_generated} weather-influenced orders for {year}.")
         except Exception as e:
+            self._finish_report(report)
             self.log_msg(f"Error: {e}")
-            messagebox.showerror("Error", str(e))
+            self._call_in_ui(messagebox.showerror, "Error", str(e))
 
     def on_test_weather_api(self):
         self.log_msg("🔍 Testing weather API for single date…")
@@ -1832,14 +4488,61 @@ class IceCreamApp(ttk.Frame):
         self.end_day_var.set(today.strftime('%d'))
 
     def on_generate_date_range(self):
+        if self._worker_busy():
+            return
         self.log_msg("Generating date range orders…")
+
+        # Parse start date
+        start_year = self.start_year_var.get()
+        start_month = self.start_month_var.get().split('(')[1].split(')')[0]  # Extract "01" from "Jan (01)"
+        start_day = self.start_day_var.get()
+        start_date_str = f"{start_year}-{start_month}-{start_day}"
+        
+        # Parse end date
+        end_year = self.end_year_var.get()
+        end_month = self.end_month_var.get().split('(')[1].split(')')[0]  # Extract "12" from "Dec (12)"
+        end_day = self.end_day_var.get()
+        end_date_str = f"{end_year}-{end_month}-{end_day}"
+        
+        # Validate dates
         try:
-            cn = connect_to_db(
-                self.server_var.get(), self.db_var.get(), self.user_var.get(), self.pwd_var.get(),
-                self.driver_cb.get(), self.encrypt_var.get(), self.trust_var.get()
-            )
-            cur = cn.cursor()
-            schema = self.schema_var.get()
+            start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
+            end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
+        except ValueError as ve:
+            self.log_msg(f"❌ Invalid date format: {ve}")
+            messagebox.showerror("Invalid Date", f"Invalid date format: {ve}")
+            return
+        
+        # Check for future dates
+        today = datetime.now().date()
+        if start_date.date() > today:
+            self.log_msg("❌ Start date cannot be in the future")
+            messagebox.showerror("Invalid Date Range", "Start date cannot be in the future. Please select a past or current date.")
+            return
+        
+        if end_date.date() > today:
+            self.log_msg("❌ End date cannot be in the future")
+            messagebox.showerror("Invalid Date Range", "End date cannot be in the future. Please select a past or current date.")
+            return
+        
+        if start_date > end_date:
+            self.log_msg("❌ Start date must be before or equal to end date")
+            messagebox.showerror("Invalid Date Range", "Start date must be before or equal to end date")
+            return
+
+        self._start_worker("date_range", self._run_date_range, self._connection_args(), self.schema_var.get(),
+                           start_date, end_date, self.range_orders_var.get(), self.range_inventory_var.get(),
+                           self.range_commit_var.get())
+
+    def _run_date_range(self, report, conn_args, schema, start_date, end_date, count, update_inventory,
+                        commit_windows):
+        """Worker-thread body of on_generate_date_range."""
+        start_date_str = start_date.strftime('%Y-%m-%d')
+        end_date_str = end_date.strftime('%Y-%m-%d')
+        try:
+            with report.phase("connect"):
+                cn = connect_to_db(*conn_args)
+            cur = CountingCursor(cn.cursor(), report)
             
             # Check if schema exists
             cur.execute(
@@ -1850,101 +4553,126 @@ class IceCreamApp(ttk.Frame):
                 recreate_schema(cn, schema)
                 self.log_msg("Schema recreated on-the-fly.")
 
-            # Parse start date
-            start_year = self.start_year_var.get()
-            start_month = self.start_month_var.get().split('(')[1].split(')')[0]  # Extract "01" from "Jan (01)"
-            start_day = self.start_day_var.get()
-            start_date_str = f"{start_year}-{start_month}-{start_day}"
-            
-            # Parse end date
-            end_year = self.end_year_var.get()
-            end_month = self.end_month_var.get().split('(')[1].split(')')[0]  # Extract "12" from "Dec (12)"
-            end_day = self.end_day_var.get()
-            end_date_str = f"{end_year}-{end_month}-{end_day}"
-            
-            # Validate dates
-            try:
-                start_date = datetime.strptime(start_date_str, '%Y-%m-%d')
-                end_date = datetime.strptime(end_date_str, '%Y-%m-%d')
-            except ValueError as ve:
-                self.log_msg(f"❌ Invalid date format: {ve}")
-                messagebox.showerror("Invalid Date", f"Invalid date format: {ve}")
-                return
-            
-            # Check for future dates
-            today = datetime.now().date()
-            if start_date.date() > today:
-                self.log_msg("❌ Start date cannot be in the future")
-                messagebox.showerror("Invalid Date Range", "Start date cannot be in the future. Please select a past or current date.")
-                return
-            
-            if end_date.date() > today:
-                self.log_msg("❌ End date cannot be in the future")
-                messagebox.showerror("Invalid Date Range", "End date cannot be in the future. Please select a past or current date.")
-                return
-            
-            if start_date > end_date:
-                self.log_msg("❌ Start date must be before or equal to end date")
-                messagebox.showerror("Invalid Date Range", "Start date must be before or equal to end date")
-                return
-            
             days_in_range = (end_date - start_date).days + 1
             self.log_msg(f"📅 Date range: {start_date_str} to {end_date_str} ({days_in_range} days)")
 
-            # Get weather data for the specific date range
-            self.log_msg(f"🌡️ Fetching weather data for date range: {start_date_str} to {end_date_str}")
-            weather_data = get_boston_weather_data_range(start_date, end_date, self.log_msg)
-            
-            if weather_data:
-                # Show temperature range for the selected date range
-                range_temps = []
-                current_date = start_date
-                while current_date <= end_date:
-                    date_str = current_date.strftime('%Y-%m-%d')
-                    if date_str in weather_data:
-                        range_temps.append(weather_data[date_str])
-                    current_date += timedelta(days=1)
-                
-                if range_temps:
-                    avg_temp = sum(range_temps) / len(range_temps)
-                    max_temp = max(range_temps)
-                    min_temp = min(range_temps)
-                    
-                    # Show first and last day temperatures
-                    first_temp = weather_data.get(start_date_str)
-                    last_temp = weather_data.get(end_date_str)
-                    
-                    if first_temp is not None:
-                        first_temp_c = round((first_temp - 32) * 5/9, 1)
-                        self.log_msg(f"🌡️ Start date temp: {first_temp_c}°C ({first_temp:.1f}°F)")
-                    
-                    if last_temp is not None:
-                        last_temp_c = round((last_temp - 32) * 5/9, 1)
-                        self.log_msg(f"🌡️ End date temp: {last_temp_c}°C ({last_temp:.1f}°F)")
-                    
-                    self.log_msg(f"🌡️ Temperature range: {min_temp:.1f}°F to {max_temp:.1f}°F (avg: {avg_temp:.1f}°F)")
-            else:
-                self.log_msg("⚠️ No weather data available, using default patterns")
-            
+            # Weather is fetched window by window as the range is generated
             self.log_msg("🍦 Generating orders based on weather patterns and buying habits…")
-            orders_generated = generate_date_range_orders(cur, schema, self.range_orders_var.get(), 
-                                                         start_date_str, end_date_str, weather_data)
+            with report.phase("reference queries"):
+                reference = self.get_reference_snapshot(cur, conn_args, schema)
+            committed = [0]  # orders covered by the last per-window commit
+
+            def commit_window():
+                cn.commit()
+                committed[0] = self._progress.orders_done  # progress is reported up to the window's last day
+
+            orders_generated = generate_streaming_range_orders(cur, schema, count, start_date, end_date,
+                                                               commit=commit_window if commit_windows else None,
+                                                               reference=reference, report=report,
+                                                               progress_callback=self._progress.update,
+                                                               cancel_event=self._cancel_event,
+                                                               log_callback=self.log_msg)
+            if self._cancel_event.is_set():
+                self._finish_cancelled(cn, report, orders_generated, committed[0])
+                return
             
             self.log_msg(f"✅ Generated {orders_generated} orders for date range {start_date_str} to {end_date_str}")
-            if weather_data:
-                self.log_msg("📊 Orders distributed based on Boston temperature data and seasonal patterns")
+            self.log_msg("📊 Orders distributed based on Boston temperature data and seasonal patterns")
 
             # Generate inventory if requested
-            if self.range_inventory_var.get():
-                inventory_count = generate_inventory(cur, schema)
+            if update_inventory:
+                with report.phase("inventory"):
+                    inventory_count = generate_inventory(cur, schema)
                 self.log_msg(f"Updated {inventory_count} inventory records")
 
-            cn.commit()
+            with report.phase("commit"):
+                cn.commit()
             cn.close()
-            messagebox.showinfo("Success", f"Generated {orders_generated} weather-influenced orders for date range {start_date_str} to {end_date_str}.")
+            self._finish_report(report)
+            self._call_in_ui(messagebox.showinfo, "Success", f"Generated {orders_generated} weather-influenced orders for date range {start_date_str} to {end_date_str}.")
         except Exception as e:
+            self._finish_report(report)
             self.log_msg(f"❌ Error: {e}")
-            messagebox.showerror("Error", str(e))
+            self._call_in_ui(messagebox.showerror, "Error", str(e))
+
+    def on_analytics(self):
+        if self._worker_busy():
+            return
+        self.log_msg("📈 Building analytic indexes and timing the query suite…")
+        self._start_worker("analytics", self._run_analytics, self._connection_args(), self.schema_var.get())
+
+    def _run_analytics(self, report, conn_args, schema):
+        """Worker-thread body of on_analytics: indexes, statistics, then the timed query suite."""
+        try:
+            with report.phase("connect"):
+                cn = connect_to_db(*conn_args)
+            cur = CountingCursor(cn.cursor(), report)
+            with report.phase("indexes"):
+                index_count = create_analytic_indexes(cur, schema)
+            with report.phase("statistics"):
+                refresh_statistics(cur, schema)
+            with report.phase("commit"):
+                cn.commit()
+            self.log_msg(f"🗂️ {index_count} analytic indexes in place, statistics refreshed")
+
+            results = run_analytic_queries(cur, schema, report=report)
+            for result in results:
+                self.log_msg(f"   {result['query']:<24} {result['seconds'] * 1000:9.1f} ms  ({result['rows']} rows)")
+            cn.close()
+            self._finish_report(report)
+        except Exception as e:
+            self._finish_report(report)
+            self.log_msg(f"❌ Error: {e}")
+            self._call_in_ui(messagebox.showerror, "Error", str(e))
+
+    def on_start_live(self):
+        if self._worker_busy():
+            return
+        try:
+            rate = float(self.live_rate_var.get())
+        except (tk.TclError, ValueError):
+            rate = 0.0
+        if rate <= 0:
+            messagebox.showerror("Invalid Rate", "Orders per second must be a positive number.")
+            return
+        self.log_msg(f"🟢 Opening shop: about {rate:g} orders/s, following the intraday curve…")
+        self._start_worker("live", self._run_live, self._connection_args(), self.schema_var.get(), rate,
+                           bool(self.live_all_day_var.get()), progress=LiveProgress())
+
+    def on_stop_live(self):
+        """Stop the live stream after its current micro-batch; everything written is kept."""
+        if self._worker is None or self._worker.name != "generate-live" or self._cancel_event.is_set():
+            return
+        self._keep_on_cancel = True
+        self._cancel_event.set()
+        self.cancel_btn.config(state='disabled')
+        self.log_msg("⏹️ Closing shop after the current batch…")
+
+    def _run_live(self, report, conn_args, schema, rate, open_all_day):
+        """Worker-thread body of on_start_live: runs until Close Shop or Cancel."""
+        try:
+            with report.phase("connect"):
+                cn = connect_to_db(*conn_args)
+            cur = CountingCursor(cn.cursor(), report)
+            with report.phase("reference queries"):
+                reference = self.get_reference_snapshot(cur, conn_args, schema)
+            orders_generated = generate_live_orders(cur, schema, rate, open_all_day=open_all_day,
+                                                    commit=cn.commit, reference=reference, report=report,
+                                                    progress_callback=self._progress.update,
+                                                    cancel_event=self._cancel_event, log_callback=self.log_msg)
+            if self._keep_on_cancel:
+                with report.phase("commit"):
+                    cn.commit()
+                self.log_msg(f"⏹️ Shop closed – streamed {orders_generated} orders")
+            else:
+                cn.rollback()
+                self.log_msg(f"⏹️ Shop closed – {orders_generated} orders streamed, last batch rolled back")
+            cn.close()
+            self._finish_report(report)
+        except Exception as e:
+            self._finish_report(report)
+            self.log_msg(f"❌ Error: {e}")
+            self._call_in_ui(messagebox.showerror, "Error", str(e))
 
 if __name__ == '__main__':
     root = tk.Tk()
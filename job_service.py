@@ -0,0 +1,441 @@
+#!/usr/bin/env python3
+"""
+HTTP job service for Ice Cream Database Generator
+Accepts generation jobs (basic data, yearly, date range, live stream) as JSON and runs
+them on a bounded pool of worker threads fed from a bounded job queue, so several teams
+can share one generator host without running the Tk app.
+
+Endpoints:
+  POST   /jobs              submit a job, returns 202 with its id (429 when the queue is full)
+  GET    /jobs              all known jobs, newest first
+  GET    /jobs/<id>         status, progress, throughput and run report of one job
+  POST   /jobs/<id>/cancel  stop a job at its next batch boundary (work done so far is kept)
+  GET    /stream            generate orders on the fly as chunked NDJSON or CSV, no database
+  GET    /health            worker and queue occupancy
+
+A job body names its type, the target database and the type's parameters, e.g.
+  {"type": "yearly", "connection": {"server": "...", "database": "IceCreamShop", "user": "...",
+   "password": "...", "driver": "ODBC Driver 17 for SQL Server"}, "schema": "dbo",
+   "count": 100000, "year": 2024}
+Use {"sqlite": "path/to.db"} instead of "connection" for the local SQLite stand-in.
+
+/stream takes its parameters from the query string, e.g.
+  /stream?count=1000000&start_date=2024-01-01&end_date=2024-12-31&format=ndjson
+  /stream?count=50000&format=csv&table=OrderDetails&weather=climatology
+"""
+
+import argparse
+import io
+import json
+import queue
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from collections import OrderedDict, deque
+from datetime import datetime, timedelta
+
+from flask import Flask, Response, jsonify, request, stream_with_context
+from flask_cors import CORS
+
+import ice_cream_data as icd
+
+DEFAULT_WORKERS = 4
+DEFAULT_QUEUE_SIZE = 32
+DEFAULT_MAX_STREAMS = 8
+STREAM_DEFAULT_DAYS = 90  # range streamed when no dates are given, ending today
+STREAM_CATALOGUE = {"customers": 10000, "flavors": 36, "toppings": 33}  # synthetic reference sizes
+MAX_FINISHED_JOBS = 500  # finished jobs kept for status queries; the oldest are forgotten first
+
+
+class Job:
+    """One submitted generation job and everything its status endpoint reports."""
+
+    def __init__(self, job_type, params):
+        self.id = uuid.uuid4().hex
+        self.type = job_type
+        self.params = params
+        self.state = "queued"
+        self.created = datetime.now()
+        self.started = self.finished = None
+        self.progress = icd.LiveProgress() if job_type == "live" else icd.RunProgress()
+        self.report = icd.RunReport(job_type)
+        self.cancel_event = threading.Event()
+        self.result = None
+        self.error = None
+        self.log = []
+
+    def log_msg(self, msg):
+        self.log.append(f"[{datetime.now():%H:%M:%S}] {msg}")
+        del self.log[:-50]  # keep the latest lines only
+
+    def to_dict(self, detail=False):
+        progress = self.progress
+        data = {
+            "id": self.id,
+            "type": self.type,
+            "state": self.state,
+            "created": self.created.isoformat(timespec="seconds"),
+            "started": self.started.isoformat(timespec="seconds") if self.started else None,
+            "finished": self.finished.isoformat(timespec="seconds") if self.finished else None,
+            "progress": {
+                "fraction": round(progress.fraction, 4),
+                "days_done": progress.days_done,
+                "days_total": progress.days_total,
+                "orders_done": progress.orders_done,
+                "orders_total": progress.orders_total,
+                "orders_per_sec": round(progress.rate, 1) if progress.rate else None,
+                "eta_seconds": round(progress.eta, 1) if progress.eta is not None else None,
+                "description": progress.describe(),
+            },
+            "result": self.result,
+            "error": self.error,
+        }
+        if detail:
+            data["params"] = {k: v for k, v in self.params.items() if k not in ("connection", "password")}
+            data["report"] = self.report.to_dict()
+            data["log"] = list(self.log)
+        return data
+
+
+class JobManager:
+    """
+    Bounded job queue drained by a fixed number of worker threads. Jobs are kept in
+    submission order; finished ones beyond MAX_FINISHED_JOBS are dropped. Generators assign
+    order keys client-side from MAX(OrderID), so jobs on the same database and schema run
+    one at a time: only a job whose target is idle is handed to the workers, the others wait
+    in a per-target line and are dispatched as the target's current job finishes. Jobs on
+    different targets run in parallel.
+    """
+
+    def __init__(self, workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE):
+        self.jobs = OrderedDict()
+        self.capacity = queue_size
+        self._lock = threading.Lock()
+        self._ready = queue.Queue()  # jobs whose target is idle, in dispatch order
+        self._waiting = {}  # target -> deque of jobs behind the target's current job
+        self._busy = set()  # targets with a job ready or running
+        self._workers = [threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True)
+                         for i in range(workers)]
+        self.queued = 0
+        self.running = 0
+        for worker in self._workers:
+            worker.start()
+
+    def submit(self, job):
+        """Queue a job; raises queue.Full when `capacity` jobs are already queued."""
+        with self._lock:
+            if self.queued >= self.capacity:
+                raise queue.Full
+            self.jobs[job.id] = job
+            self.queued += 1
+            key = job_target(job.params)
+            if key in self._busy:
+                self._waiting.setdefault(key, deque()).append(job)
+            else:
+                self._busy.add(key)
+                self._ready.put(job)
+            self._forget_finished()
+        return job
+
+    def get(self, job_id):
+        with self._lock:
+            return self.jobs.get(job_id)
+
+    def list(self):
+        with self._lock:
+            return list(reversed(self.jobs.values()))
+
+    def cancel(self, job):
+        job.cancel_event.set()
+        with self._lock:
+            if job.state == "queued":
+                job.state = "cancelled"
+                job.finished = datetime.now()
+                self.queued -= 1
+                waiting = self._waiting.get(job_target(job.params))
+                if waiting and job in waiting:
+                    waiting.remove(job)
+
+    def health(self):
+        with self._lock:
+            return {"workers": len(self._workers), "running": self.running, "queued": self.queued,
+                    "queue_capacity": self.capacity,
+                    "waiting_on_target": sum(len(waiting) for waiting in self._waiting.values())}
+
+    def _forget_finished(self):
+        finished = [job_id for job_id, job in self.jobs.items() if job.state not in ("queued", "running")]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self.jobs[job_id]
+
+    def _release(self, key):
+        """Hand the target's next waiting job to the workers, or mark the target idle (lock held)."""
+        waiting = self._waiting.get(key)
+        if waiting:
+            self._ready.put(waiting.popleft())
+            if not waiting:
+                del self._waiting[key]
+        else:
+            self._busy.discard(key)
+
+    def _work(self):
+        while True:
+            job = self._ready.get()
+            key = job_target(job.params)
+            with self._lock:
+                if job.state != "queued":  # cancelled before a worker reached it
+                    self._release(key)
+                    continue
+                job.state, job.started = "running", datetime.now()
+                self.queued -= 1
+                self.running += 1
+            try:
+                job.result = run_job(job)
+                job.state = "cancelled" if job.cancel_event.is_set() else "succeeded"
+            except Exception as e:
+                job.state, job.error = "failed", str(e)
+                job.log_msg(traceback.format_exc(limit=3))
+            finally:
+                job.finished = datetime.now()
+                with self._lock:
+                    self.running -= 1
+                    self._release(key)
+
+
+def open_connection(params):
+    """DB-API connection for a job's "connection" (SQL Server) or "sqlite" target."""
+    if params.get("sqlite"):
+        conn = sqlite3.connect(params["sqlite"], timeout=30, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+    c = params.get("connection") or {}
+    return icd.connect_to_db(c.get("server", ""), c.get("database", ""), c.get("user", ""), c.get("password", ""),
+                             c.get("driver", "ODBC Driver 17 for SQL Server"), c.get("encrypt", True),
+                             c.get("trust_cert", True))
+
+
+def job_target(params):
+    """Identity of the database and schema a job writes to."""
+    if params.get("sqlite"):
+        return ("sqlite", params["sqlite"], params.get("schema") or "main")
+    c = params.get("connection") or {}
+    return ("mssql", c.get("server", "").lower(), c.get("database", "").lower(), params.get("schema") or "dbo")
+
+
+def _date(value):
+    return datetime.strptime(value, "%Y-%m-%d") if value else None
+
+
+def run_job(job):
+    """Run one job to completion on the calling worker thread; returns its result dict."""
+    params, report, progress = job.params, job.report, job.progress
+    schema = params.get("schema") or ("main" if params.get("sqlite") else "dbo")
+    with report.phase("connect"):
+        conn = open_connection(params)
+    cursor = icd.CountingCursor(conn.cursor(), report)
+    started = time.perf_counter()
+    try:
+        if job.type == "basic":
+            result = {}
+            for table, generate in (("customers", icd.generate_customers), ("flavors", icd.generate_flavors),
+                                    ("toppings", icd.generate_toppings)):
+                if params.get(table):
+                    with report.phase(table):
+                        generate(cursor, schema, int(params[table]))
+                    result[table] = int(params[table])
+            if params.get("orders"):
+                progress.update(0, 1, 0, int(params["orders"]))
+                stats = icd.generate_detailed_orders(cursor, schema, int(params["orders"]), report=report,
+                                                     summary=icd.DailySummary())
+                progress.update(1, 1, stats["orders"], int(params["orders"]))
+                result.update(orders=stats["orders"], order_details=stats["details"],
+                              order_toppings=stats["toppings"])
+        elif job.type == "yearly":
+            year = int(params.get("year") or datetime.now().year)
+            with report.phase("weather"):
+                weather = icd.get_boston_weather_data(year, job.log_msg)
+            orders = icd.generate_yearly_orders(cursor, schema, int(params["count"]), year, weather,
+                                                params.get("pricing_scenario", icd.DEFAULT_PRICING_SCENARIO),
+                                                report=report, progress_callback=progress.update,
+                                                cancel_event=job.cancel_event,
+                                                server_side=bool(params.get("server_side")))
+            result = {"orders": orders, "year": year}
+        elif job.type == "range":
+            orders = icd.generate_streaming_range_orders(
+                cursor, schema, int(params["count"]), _date(params["start_date"]), _date(params["end_date"]),
+                commit=conn.commit, pricing_scenario=params.get("pricing_scenario", icd.DEFAULT_PRICING_SCENARIO),
+                report=report, progress_callback=progress.update, cancel_event=job.cancel_event,
+                log_callback=job.log_msg)
+            result = {"orders": orders}
+        elif job.type == "live":
+            orders = icd.generate_live_orders(
+                cursor, schema, float(params["rate"]), duration=float(params["duration"]),
+                open_all_day=bool(params.get("open_all_day")), commit=conn.commit,
+                pricing_scenario=params.get("pricing_scenario", icd.DEFAULT_PRICING_SCENARIO), report=report,
+                progress_callback=progress.update, cancel_event=job.cancel_event, log_callback=job.log_msg)
+            result = {"orders": orders}
+        else:
+            raise ValueError(f"Unknown job type '{job.type}'")
+
+        if params.get("inventory"):
+            with report.phase("inventory"):
+                result["inventory"] = icd.generate_inventory(cursor, schema)
+        with report.phase("commit"):
+            conn.commit()
+    except Exception:
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+    seconds = time.perf_counter() - started
+    if result.get("orders"):
+        result["orders_per_sec"] = round(result["orders"] / seconds, 1)
+    result["seconds"] = round(seconds, 3)
+    return result
+
+
+def climatology_weather(first, last):
+    """Weather loader using Boston monthly averages only: no API calls, so streams start at once."""
+    days = (last - first).days + 1
+    temperatures = icd.climatology_temperatures(first, days)
+    return {(first + timedelta(days=i)).strftime('%Y-%m-%d'): t for i, t in enumerate(temperatures)}
+
+
+def stream_chunks(batches, fmt, table="Orders"):
+    """
+    Encode generated batches as NDJSON order trees or CSV rows of one table, one text chunk
+    per batch. Chunks are produced only as the server sends them, so a slow client holds
+    generation back instead of letting output pile up in memory.
+    """
+    header = True
+    for batch in batches:
+        buffer = io.StringIO()
+        if fmt == "csv":
+            batch.write_csv(table, buffer, header=header)
+            header = False
+        else:
+            for tree in batch.order_trees():
+                buffer.write(json.dumps(tree, default=str))
+                buffer.write("\n")
+        yield buffer.getvalue()
+
+
+REQUIRED_PARAMS = {"basic": (), "yearly": ("count",), "range": ("count", "start_date", "end_date"),
+                   "live": ("rate", "duration")}  # a live job without an end would hold its target forever
+
+
+def create_app(workers=DEFAULT_WORKERS, queue_size=DEFAULT_QUEUE_SIZE, max_streams=DEFAULT_MAX_STREAMS):
+    app = Flask(__name__)
+    CORS(app)
+    manager = JobManager(workers, queue_size)
+    app.config["JOB_MANAGER"] = manager
+    streams = threading.BoundedSemaphore(max_streams)
+
+    @app.post("/jobs")
+    def submit_job():
+        params = request.get_json(silent=True) or {}
+        job_type = params.get("type")
+        if job_type not in REQUIRED_PARAMS:
+            return jsonify(error=f"type must be one of {', '.join(REQUIRED_PARAMS)}"), 400
+        missing = [name for name in REQUIRED_PARAMS[job_type] if params.get(name) in (None, "")]
+        if missing:
+            return jsonify(error=f"missing parameters: {', '.join(missing)}"), 400
+        if not params.get("sqlite") and not params.get("connection"):
+            return jsonify(error="give either 'connection' or 'sqlite'"), 400
+        if job_type == "live":
+            try:
+                if float(params["rate"]) <= 0 or float(params["duration"]) <= 0:
+                    raise ValueError
+            except (TypeError, ValueError):
+                return jsonify(error="rate and duration must be positive numbers"), 400
+        try:
+            job = manager.submit(Job(job_type, params))
+        except queue.Full:
+            return jsonify(error="job queue is full, try again later", **manager.health()), 429
+        return jsonify(job.to_dict()), 202, {"Location": f"/jobs/{job.id}"}
+
+    @app.get("/jobs")
+    def list_jobs():
+        return jsonify(jobs=[job.to_dict() for job in manager.list()])
+
+    @app.get("/jobs/<job_id>")
+    def job_status(job_id):
+        job = manager.get(job_id)
+        if job is None:
+            return jsonify(error="no such job"), 404
+        return jsonify(job.to_dict(detail=True))
+
+    @app.post("/jobs/<job_id>/cancel")
+    def cancel_job(job_id):
+        job = manager.get(job_id)
+        if job is None:
+            return jsonify(error="no such job"), 404
+        manager.cancel(job)
+        return jsonify(job.to_dict())
+
+    @app.get("/stream")
+    def stream_orders():
+        args = request.args
+        fmt = args.get("format", "ndjson")
+        table = args.get("table", "Orders")
+        try:
+            count = int(args["count"])
+            end_date = _date(args.get("end_date")) or datetime.now().replace(hour=0, minute=0, second=0,
+                                                                             microsecond=0)
+            start_date = _date(args.get("start_date")) or end_date - timedelta(days=STREAM_DEFAULT_DAYS - 1)
+            sizes = {name: int(args.get(name, default)) for name, default in STREAM_CATALOGUE.items()}
+            first_order_id = int(args.get("first_order_id", 1))
+        except (KeyError, ValueError) as e:
+            return jsonify(error=f"bad or missing parameter: {e}"), 400
+        if fmt not in ("ndjson", "csv") or table not in icd.OrderBatch.TABLES:
+            return jsonify(error=f"format must be ndjson or csv, table one of {', '.join(icd.OrderBatch.TABLES)}"), 400
+        if count < 0 or start_date > end_date or min(sizes["customers"], sizes["flavors"]) < 1:
+            return jsonify(error="count, date range or catalogue sizes out of range"), 400
+        if not streams.acquire(blocking=False):
+            return jsonify(error="too many streams open, try again later"), 429
+
+        reference = icd.ReferenceSnapshot.synthetic(sizes["customers"], sizes["flavors"], sizes["toppings"])
+        if args.get("weather") == "climatology":
+            weather_loader = climatology_weather
+        else:
+            # Loaded (from the weather store, the API or the synthetic fallback) once, before the
+            # first byte, so no window stalls the response on a fetch
+            try:
+                weather = icd.get_boston_weather_data_range(start_date, end_date, app.logger.info)
+            except Exception:
+                streams.release()
+                raise
+            weather_loader = lambda first, last: weather
+        batches = icd.iter_order_batches(count, start_date, end_date, reference, weather_loader,
+                                         args.get("pricing_scenario", icd.DEFAULT_PRICING_SCENARIO),
+                                         first_order_id=first_order_id)
+        mimetype = "text/csv" if fmt == "csv" else "application/x-ndjson"
+        response = Response(stream_with_context(stream_chunks(batches, fmt, table)), mimetype=mimetype)
+        response.call_on_close(streams.release)  # also runs when the client disconnects mid-stream
+        return response
+
+    @app.get("/health")
+    def health():
+        return jsonify(status="ok", **manager.health())
+
+    return app
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve generation jobs over HTTP")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=5000)
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="jobs run in parallel")
+    parser.add_argument("--queue-size", type=int, default=DEFAULT_QUEUE_SIZE, help="jobs waiting before 429s")
+    parser.add_argument("--max-streams", type=int, default=DEFAULT_MAX_STREAMS, help="concurrent /stream responses")
+    args = parser.parse_args(argv)
+
+    print("🍦 Ice Cream Database Generator - Job Service")
+    print(f"🚀 {args.workers} workers, queue of {args.queue_size}, listening on http://{args.host}:{args.port}")
+    create_app(args.workers, args.queue_size, args.max_streams).run(host=args.host, port=args.port, threaded=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Concurrent write-load harness for Ice Cream Database Generator
+Runs N writer connections, each inserting complete order trees (Orders, OrderDetails,
+OrderToppings) in transactions, either flat out or at a fixed total TPS.
+
+Reports commit latency as HDR-style log-linear histograms (p50/p95/p99/p99.9/max),
+throughput per second and error / deadlock counts. At a fixed TPS latency is measured
+from each transaction's scheduled start, so stalls are not hidden by the writers
+falling behind (coordinated omission).
+
+Results are written as JSON; pass --hgrm to also write percentile distributions.
+"""
+
+import argparse
+import json
+import math
+import re
+import sqlite3
+import sys
+import threading
+import time
+from datetime import datetime
+
+import ice_cream_data as icd
+
+MAX_ITEMS_PER_ORDER = max(icd.ITEM_COUNT_DISTRIBUTION[0])
+PERCENTILES = (50, 90, 95, 99, 99.9)
+NATIVE_ERROR = re.compile(r"\((\d+)\) \(SQL\w+\)\s*$")  # "(1205) (SQLExecDirectW)" at the end of a pyodbc message
+
+
+class LatencyHistogram:
+    """
+    Log-linear latency histogram in microseconds, in the style of HdrHistogram: every
+    value is recorded into a bucket no wider than 10**-(significant_figures - 1) of
+    itself, so percentiles keep that relative precision at any magnitude while the
+    bucket count stays bounded (about 90 per decade for 2 significant figures).
+    """
+
+    def __init__(self, significant_figures=2):
+        self.significant_figures = significant_figures
+        self.counts = {}  # bucket lower bound (µs) -> count
+        self.total = 0
+        self.min = None
+        self.max = 0
+        self._sum = 0
+
+    def record(self, seconds):
+        value = max(1, int(seconds * 1_000_000))
+        width = 10 ** max(0, int(math.log10(value)) - (self.significant_figures - 1))
+        bucket = value - value % width
+        self.counts[bucket] = self.counts.get(bucket, 0) + 1
+        self.total += 1
+        self._sum += value
+        self.max = max(self.max, value)
+        self.min = value if self.min is None else min(self.min, value)
+
+    def merge(self, other):
+        for bucket, count in other.counts.items():
+            self.counts[bucket] = self.counts.get(bucket, 0) + count
+        self.total += other.total
+        self._sum += other._sum
+        self.max = max(self.max, other.max)
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+
+    def percentile(self, p):
+        """Lowest bucket bound at or below which `p` percent of the values fall, in µs."""
+        if not self.total:
+            return None
+        target = max(1, math.ceil(self.total * p / 100))
+        seen = 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            if seen >= target:
+                return bucket
+        return self.max
+
+    def distribution(self):
+        """(value µs, percentile, cumulative count) rows, as in an HdrHistogram .hgrm file."""
+        rows, seen = [], 0
+        for bucket in sorted(self.counts):
+            seen += self.counts[bucket]
+            rows.append((bucket, seen / self.total, seen))
+        return rows
+
+    def to_dict(self):
+        ms = lambda us: round(us / 1000, 3) if us is not None else None
+        return {
+            "count": self.total,
+            "min_ms": ms(self.min),
+            "mean_ms": ms(self._sum / self.total) if self.total else None,
+            **{f"p{p:g}_ms": ms(self.percentile(p)) for p in PERCENTILES},
+            "max_ms": ms(self.max if self.total else None),
+        }
+
+
+class KeyAllocator:
+    """
+    Hands out disjoint OrderID / OrderDetailID blocks to concurrent writers, so the
+    client-assigned keys of write_order_batch never collide. Detail blocks are sized
+    for the largest possible order; unused IDs simply leave gaps.
+    """
+
+    def __init__(self, next_order_id, next_detail_id):
+        self._lock = threading.Lock()
+        self.next_order_id = next_order_id
+        self.next_detail_id = next_detail_id
+
+    def reserve(self, batch, orders):
+        with self._lock:
+            batch.next_order_id = self.next_order_id
+            batch.next_detail_id = self.next_detail_id
+            self.next_order_id += orders
+            self.next_detail_id += orders * MAX_ITEMS_PER_ORDER
+
+
+def classify_error(exc):
+    """
+    'deadlock', 'lock timeout' or 'other'. pyodbc errors are classified by SQLSTATE
+    (args[0]) or the SQL Server native error number that ends the message, e.g.
+    "... (1205) (SQLExecDirectW)"; SQLite errors by their result code. The rest of the
+    message is not searched, since it can quote key values.
+    """
+    if isinstance(exc, sqlite3.Error):
+        name = getattr(exc, "sqlite_errorname", "")
+        if name.startswith(("SQLITE_BUSY", "SQLITE_LOCKED")) or str(exc).startswith(("database is locked",
+                                                                                     "database table is locked")):
+            return "lock timeout"
+        return "other"
+    args = getattr(exc, "args", ())
+    sqlstate = args[0] if len(args) > 1 and isinstance(args[0], str) else ""
+    native = NATIVE_ERROR.search(str(args[1])) if len(args) > 1 else None
+    native = native.group(1) if native else ""
+    if sqlstate == "40001" or native == "1205":
+        return "deadlock"
+    if sqlstate == "HYT00" or native == "1222":
+        return "lock timeout"
+    return "other"
+
+
+class Writer(threading.Thread):
+    """One writer connection; keeps its own histograms and counters, merged after the run."""
+
+    def __init__(self, index, connect, schema, reference, keys, dated_details, orders_per_tx, interval, start_at,
+                 warmup_until, stop_at):
+        super().__init__(name=f"writer-{index}", daemon=True)
+        self.connect = connect
+        self.schema = schema
+        self.reference = reference
+        self.keys = keys
+        self.dated_details = dated_details
+        self.orders_per_tx = orders_per_tx
+        self.interval = interval  # seconds between scheduled transactions, None for flat out
+        self.start_at, self.warmup_until, self.stop_at = start_at, warmup_until, stop_at
+        self.transaction = LatencyHistogram()
+        self.commit = LatencyHistogram()
+        self.timeline = {}  # whole second since start -> committed transactions
+        self.errors = {}
+        self.committed = self.orders = 0
+
+    def run(self):
+        conn = self.connect()
+        cursor = conn.cursor()
+        profile = icd.get_day_profile(None)
+        batch = icd.OrderBatch(dated_details=self.dated_details)
+        scheduled = self.start_at
+        try:
+            while True:
+                if self.interval is not None:
+                    pause = scheduled - time.perf_counter()
+                    if pause > 0:
+                        time.sleep(pause)
+                started = time.perf_counter()
+                if started >= self.stop_at:
+                    break
+                # At a fixed rate, latency counts from the scheduled start (no coordinated omission)
+                measured_from = scheduled if self.interval is not None else started
+
+                now = datetime.now()
+                self.keys.reserve(batch, self.orders_per_tx)
+                icd.generate_detailed_orders(None, self.schema, self.orders_per_tx,
+                                             datetime(now.year, now.month, now.day), None, profile,
+                                             self.reference, batch)
+                batch.stamp_orders(0, now)
+                try:
+                    icd.write_order_batch(cursor, self.schema, batch)
+                    commit_started = time.perf_counter()
+                    conn.commit()
+                    finished = time.perf_counter()
+                except Exception as e:
+                    batch.clear()
+                    kind = classify_error(e)
+                    self.errors[kind] = self.errors.get(kind, 0) + 1
+                    try:
+                        conn.rollback()
+                    except Exception:
+                        pass
+                else:
+                    if finished >= self.warmup_until:
+                        self.transaction.record(finished - measured_from)
+                        self.commit.record(finished - commit_started)
+                        second = int(finished - self.warmup_until)
+                        self.timeline[second] = self.timeline.get(second, 0) + 1
+                        self.committed += 1
+                        self.orders += self.orders_per_tx
+
+                if self.interval is not None:
+                    scheduled += self.interval
+        finally:
+            conn.close()
+
+
+def run_load(connect, schema, writers=4, duration=30.0, tps=None, orders_per_tx=1, warmup=2.0, log=print):
+    """
+    Apply write load with `writers` concurrent connections for `duration` seconds (after
+    `warmup` seconds that are not measured). `tps` is the total target transactions per
+    second across all writers; None runs flat out. Returns the merged results dict.
+    """
+    conn = connect()
+    cursor = conn.cursor()
+    reference = icd.ReferenceSnapshot.load(cursor, schema)
+    first_batch = icd.OrderBatch.for_cursor(cursor, schema)
+    conn.close()
+    keys = KeyAllocator(first_batch.next_order_id, first_batch.next_detail_id)
+
+    interval = writers / tps if tps else None
+    start_at = time.perf_counter() + 0.5  # let every connection open before the clock starts
+    warmup_until = start_at + warmup
+    stop_at = warmup_until + duration
+    pool = [Writer(i, connect, schema, reference, keys, first_batch.dated_details, orders_per_tx, interval,
+                   start_at + (interval * i / writers if interval else 0), warmup_until, stop_at)
+            for i in range(writers)]
+    for writer in pool:
+        writer.start()
+
+    mode = f"{tps:g} TPS target" if tps else "flat out"
+    log(f"🏋️ {writers} writers, {mode}, {orders_per_tx} order(s) per transaction, "
+        f"{warmup:g}s warm-up + {duration:g}s measured")
+    while any(writer.is_alive() for writer in pool):
+        time.sleep(1.0)
+        elapsed = time.perf_counter() - warmup_until
+        if elapsed > 0:
+            committed = sum(writer.committed for writer in pool)
+            log(f"   {min(elapsed, duration):6.1f}s  {committed:>9,} tx  {committed / min(elapsed, duration):>9,.0f} tx/s")
+    for writer in pool:
+        writer.join()
+
+    transaction, commit = LatencyHistogram(), LatencyHistogram()
+    timeline, errors = {}, {}
+    for writer in pool:
+        transaction.merge(writer.transaction)
+        commit.merge(writer.commit)
+        for second, count in writer.timeline.items():
+            timeline[second] = timeline.get(second, 0) + count
+        for kind, count in writer.errors.items():
+            errors[kind] = errors.get(kind, 0) + count
+
+    committed = transaction.total
+    return {
+        "writers": writers,
+        "target_tps": tps,
+        "orders_per_tx": orders_per_tx,
+        "duration": duration,
+        "transactions": committed,
+        "orders": sum(writer.orders for writer in pool),
+        "tps": round(committed / duration, 1),
+        "errors": errors,
+        "deadlocks": errors.get("deadlock", 0),
+        "transaction_latency": transaction.to_dict(),
+        "commit_latency": commit.to_dict(),
+        "throughput_timeline": [timeline.get(second, 0) for second in range(int(math.ceil(duration)))],
+        "_histograms": {"transaction": transaction, "commit": commit},
+    }
+
+
+def write_hgrm(path, histogram):
+    """Percentile distribution in HdrHistogram's .hgrm text layout (values in milliseconds)."""
+    with open(path, "w") as fh:
+        fh.write(f"{'Value':>12} {'Percentile':>14} {'TotalCount':>10} {'1/(1-Percentile)':>14}\n\n")
+        for value, fraction, count in histogram.distribution():
+            inverse = f"{1 / (1 - fraction):14.2f}" if fraction < 1 else f"{'inf':>14}"
+            fh.write(f"{value / 1000:12.3f} {fraction:14.12f} {count:10d} {inverse}\n")
+        summary = histogram.to_dict()
+        fh.write(f"#[Mean    = {summary['mean_ms']}, Max = {summary['max_ms']}]\n")
+        fh.write(f"#[Total count    = {histogram.total}]\n")
+
+
+def sqlite_connector(path):
+    def connect():
+        conn = sqlite3.connect(path, timeout=5, check_same_thread=False)
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+    return connect
+
+
+def prepare(connect, schema, customers):
+    """Recreate the schema and load a catalogue and customers to write orders against."""
+    conn = connect()
+    icd.recreate_schema(conn, schema)
+    cursor = conn.cursor()
+    icd.generate_customers(cursor, schema, customers)
+    icd.generate_flavors(cursor, schema, len(icd.get_ice_cream_flavors()))
+    icd.generate_toppings(cursor, schema, 30)
+    conn.commit()
+    conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply concurrent order-writing load and report latency")
+    target = parser.add_mutually_exclusive_group(required=True)
+    target.add_argument("--sqlite", metavar="PATH", help="SQLite database file (local stand-in)")
+    target.add_argument("--server", help="SQL Server host")
+    parser.add_argument("--database", default="IceCreamShop")
+    parser.add_argument("--user", default="")
+    parser.add_argument("--password", default="")
+    parser.add_argument("--driver", default="ODBC Driver 17 for SQL Server")
+    parser.add_argument("--encrypt", action="store_true")
+    parser.add_argument("--trust-cert", action="store_true")
+    parser.add_argument("--schema", help="schema to write to (default dbo, or main for SQLite)")
+    parser.add_argument("--writers", type=int, default=4, help="concurrent writer connections")
+    parser.add_argument("--tps", type=float, help="total target transactions/sec (default: flat out)")
+    parser.add_argument("--orders-per-tx", type=int, default=1, help="order trees per transaction")
+    parser.add_argument("--duration", type=float, default=30.0, help="measured seconds")
+    parser.add_argument("--warmup", type=float, default=2.0, help="unmeasured seconds before the run")
+    parser.add_argument("--prepare", type=int, metavar="CUSTOMERS",
+                        help="recreate the schema and load this many customers first")
+    parser.add_argument("--output", default="loadtest_results.json")
+    parser.add_argument("--hgrm", metavar="PREFIX", help="also write PREFIX-transaction.hgrm / PREFIX-commit.hgrm")
+    args = parser.parse_args(argv)
+
+    if args.sqlite:
+        connect = sqlite_connector(args.sqlite)
+        schema = args.schema or "main"
+    else:
+        connect = lambda: icd.connect_to_db(args.server, args.database, args.user, args.password, args.driver,
+                                            args.encrypt, args.trust_cert)
+        schema = args.schema or "dbo"
+
+    print("🍦 Ice Cream Database Generator - Write Load Test")
+    print("=" * 50)
+    if args.prepare:
+        prepare(connect, schema, args.prepare)
+        print(f"🗄️ Schema recreated with {args.prepare:,} customers")
+
+    results = run_load(connect, schema, args.writers, args.duration, args.tps, args.orders_per_tx, args.warmup)
+    histograms = results.pop("_histograms")
+
+    print(f"\n✅ {results['transactions']:,} transactions ({results['orders']:,} orders) at {results['tps']:,} tx/s")
+    for name in ("transaction_latency", "commit_latency"):
+        summary = results[name]
+        print(f"   {name:<20} p50 {summary['p50_ms']} ms  p95 {summary['p95_ms']} ms  "
+              f"p99 {summary['p99_ms']} ms  max {summary['max_ms']} ms")
+    errors = ", ".join(f"{kind}: {count}" for kind, count in results["errors"].items()) or "none"
+    print(f"   errors: {errors}")
+
+    report = {
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "target": args.sqlite or f"{args.server}/{args.database}",
+        "schema": schema,
+        **results,
+    }
+    with open(args.output, "w") as fh:
+        json.dump(report, fh, indent=2)
+    print(f"\n📄 Results written to {args.output}")
+    if args.hgrm:
+        for name, histogram in histograms.items():
+            write_hgrm(f"{args.hgrm}-{name}.hgrm", histogram)
+        print(f"📈 Percentile distributions written to {args.hgrm}-*.hgrm")
+    return report
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)